@@ -1,5 +1,8 @@
 import streamlit as st
 
+from services.metricas import cronometro, perfil_se_pedido
+from services.paginas import PAGINAS, renderizar
+
 # ================== CONFIGURAÇÃO GERAL ================== #
 st.set_page_config(
     page_title="Sistema Integrado REDEC 10 - Norte",
@@ -16,19 +19,7 @@ if "menu" not in st.session_state:
 st.sidebar.image("https://i.imgur.com/8nZPp9p.png", width=170)
 st.sidebar.title("REDEC 10 - Norte")
 
-MENU_ITENS = [
-    "🏠 Dashboard",
-    "👥 Equipe REDEC 10",
-    "📄 Boletins",
-    "📥 SEI",
-    "📅 Agenda de Atividades",
-    "🌊 Monitoramento de Rios",
-    "📦 Contêiner Humanitário",
-    "🚑 Controle de Viaturas",
-    "🏛 Municípios COMDECs",
-    "🏗 Bens Patrimoniais",
-    "⚙️ Configurações"
-]
+MENU_ITENS = list(PAGINAS)
 
 menu = st.sidebar.radio("Menu", MENU_ITENS, index=MENU_ITENS.index(st.session_state["menu"]))
 st.session_state["menu"] = menu
@@ -45,64 +36,8 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# ================== FUNÇÃO CARD ================== #
-def card(titulo, valor, icone, cor, destino):
-    col = st.container()
-    with col:
-        st.markdown(f"""
-        <div style="background:{cor};
-                    padding:18px;
-                    border-radius:14px;
-                    color:white;
-                    box-shadow:0 4px 10px rgba(0,0,0,.15);
-                    text-align:center;">
-            <h4>{icone} {titulo}</h4>
-            <h2>{valor}</h2>
-        </div>
-        """, unsafe_allow_html=True)
-
-        if st.button(f"Abrir {titulo}", key=destino):
-            st.session_state["menu"] = destino
-            st.rerun()
-
-# ================== DASHBOARD ================== #
-if menu == "🏠 Dashboard":
-
-    col1, col2, col3, col4 = st.columns(4)
-
-    with col1:
-        card("Monitoramento dos Rios", "3 em atenção", "🌊", "#2E8B57", "🌊 Monitoramento de Rios")
-
-    with col2:
-        card("Boletins", "5 pendentes", "📄", "#1E5AA8", "📄 Boletins")
-
-    with col3:
-        card("Equipe REDEC 10", "12 membros", "👥", "#D97925", "👥 Equipe REDEC 10")
-
-    with col4:
-        card("COMDECs", "5 municípios", "⚠️", "#C0392B", "🏛 Municípios COMDECs")
-
-    st.divider()
-
-    col5, col6, col7, col8 = st.columns(4)
-
-    with col5:
-        card("Agenda", "8 atividades", "📅", "#34495E", "📅 Agenda de Atividades")
-
-    with col6:
-        card("Contêiner", "Estoque OK", "📦", "#5D6D7E", "📦 Contêiner Humanitário")
-
-    with col7:
-        card("Viaturas", "12 ativos", "🚑", "#273746", "🚑 Controle de Viaturas")
-
-    with col8:
-        card("Patrimônio", "145 itens", "🏗", "#7D3C98", "🏗 Bens Patrimoniais")
-
-# ================== PÁGINAS ================== #
-elif menu == "👥 Equipe REDEC 10":
-    from modulos.equipe import tela_equipe
-    tela_equipe()
-
-else:
-    st.subheader(menu)
-    st.info("Módulo em desenvolvimento")
+# ================== PÁGINA SELECIONADA ================== #
+# Importada só agora (ver services/paginas.py); medida em Configurações e,
+# quando pedido lá, roda sob o cProfile
+with perfil_se_pedido(menu != "⚙️ Configurações"), cronometro(menu):
+    renderizar(menu)
@@ -0,0 +1,151 @@
+# benchmarks/bench_busca.py
+#
+# Mede o índice de busca de processos SEI e boletins (services/busca.py) com
+# documentos sintéticos: carga completa, inclusão de um documento (o caso de uma
+# escrita no app), consultas por palavras, por prefixo e por número de processo,
+# e sugestões para a última palavra digitada.
+#
+# Uso:
+#   python benchmarks/bench_busca.py                          # 20 mil processos, 5 mil boletins
+#   python benchmarks/bench_busca.py --processos 100000 --boletins 20000
+#
+# Sai com status 1 se o p95 das consultas passar de --limite-ms.
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from services.busca import IndiceBusca
+from services.documentos import TIPOS, campos
+
+ASSUNTOS = [
+    "Plano de contingência para chuvas intensas", "Solicitação de ajuda humanitária", "Relatório de vistoria",
+    "Interdição de imóvel por risco de desabamento", "Deslizamento de encosta", "Inundação em área urbana",
+    "Decretação de situação de emergência", "Reconhecimento federal de calamidade pública",
+    "Capacitação de agentes de Defesa Civil", "Aquisição de kits de limpeza e colchões",
+    "Monitoramento de barragem", "Estiagem e abastecimento por carro-pipa", "Ofício à prefeitura",
+]
+MUNICIPIOS = [
+    "Itaperuna", "Campos dos Goytacazes", "Bom Jesus do Itabapoana", "Natividade", "Porciúncula",
+    "Miracema", "Santo Antônio de Pádua", "Laje do Muriaé", "São José de Ubá", "Italva", "Cardoso Moreira",
+]
+PALAVRAS = (
+    "chuva chuvas enchente enchentes inundação inundações desabrigados desalojados vistoria interdição "
+    "ponte estrada encosta deslizamento barragem rio nível cota alerta atenção evacuação abrigo doações "
+    "cestas básicas água mineral colchões kits higiene limpeza equipe viatura apoio município prefeitura "
+    "coordenadoria regional estadual federal recurso repasse prestação contas relatório ofício decreto"
+).split()
+
+CONSULTAS = [
+    "inundação", "inundacoes itaperuna", "deslizamento encosta", "kits limpeza", "DEFESA CIVIL natividade",
+    "decretação emergência", "barragem monitoramento", "ajuda humanitaria porciuncula", "relatorio vistoria",
+    "estiagem carro-pipa", "calamidade publica", "colchões", "ponte estrada interdição",
+]
+PREFIXOS = ["inund", "desl", "itap", "calam", "vistoria enc", "kits limp", "de", "cam"]
+
+
+def gerar(processos, boletins, rnd):
+    linhas = {"sei_processos": [], "boletins": []}
+    for i in range(processos):
+        linhas["sei_processos"].append({
+            "id": i + 1,
+            "numero": f"SEI-{270000 + i % 40:06d}/{i:06d}/{2015 + i % 11}",
+            "assunto": f"{rnd.choice(ASSUNTOS)} — {rnd.choice(MUNICIPIOS)}",
+            "interessado": f"Prefeitura de {rnd.choice(MUNICIPIOS)}",
+            "unidade": "REDEC 10", "situacao": "em_andamento",
+            "observacao": " ".join(rnd.choices(PALAVRAS, k=12)),
+        })
+    for i in range(boletins):
+        linhas["boletins"].append({
+            "id": i + 1, "numero": f"{i + 1}/{2015 + i % 11}", "data": "2024-01-01",
+            "titulo": f"{rnd.choice(ASSUNTOS)} em {rnd.choice(MUNICIPIOS)}",
+            "texto": " ".join(rnd.choices(PALAVRAS + MUNICIPIOS, k=rnd.randint(80, 400))),
+            "situacao": "publicado",
+        })
+    return linhas
+
+
+def carregar(linhas):
+    indice = IndiceBusca()
+    for tabela, registros in linhas.items():
+        for linha in registros:
+            textos, numero = campos(tabela, linha)
+            indice.adicionar((TIPOS[tabela], linha["id"]), textos, numero, linha)
+    return indice
+
+
+def cronometrar(func, *args, **kwargs):
+    inicio = time.perf_counter()
+    resultado = func(*args, **kwargs)
+    return (time.perf_counter() - inicio) * 1000, resultado
+
+
+def percentis(tempos):
+    tempos = sorted(tempos)
+    return statistics.median(tempos), tempos[int(len(tempos) * 0.95)], tempos[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do índice de busca de processos SEI e boletins.")
+    parser.add_argument("--processos", type=int, default=20000)
+    parser.add_argument("--boletins", type=int, default=5000)
+    parser.add_argument("--repeticoes", type=int, default=20)
+    parser.add_argument("--limite-ms", type=float, default=50,
+                        help="p95 máximo aceito para consultas e sugestões")
+    args = parser.parse_args()
+
+    rnd = random.Random(10)
+    linhas = gerar(args.processos, args.boletins, rnd)
+    print(f"{args.processos:,} processos + {args.boletins:,} boletins")
+
+    ms, indice = cronometrar(carregar, linhas)
+    # Memória numa segunda carga: o tracemalloc deixa a primeira várias vezes mais lenta
+    tracemalloc.start()
+    copia = carregar(linhas)
+    memoria = tracemalloc.get_traced_memory()[0] / 2 ** 20
+    tracemalloc.stop()
+    del copia
+    print(f"{'carga completa':<40}{ms:>10.1f} ms   ({memoria:.0f} MB)")
+
+    novo = dict(linhas["boletins"][0], id=args.boletins + 1, titulo="Boletim extraordinário: enchente em Italva")
+    textos, numero_novo = campos("boletins", novo)
+    ms, _ = cronometrar(indice.adicionar, ("boletim", novo["id"]), textos, numero_novo, novo)
+    print(f"{'inclusão de um documento':<40}{ms:>10.3f} ms")
+    assert indice.buscar("extraordinario italva")[0][0] == ("boletim", novo["id"])
+
+    numero = linhas["sei_processos"][args.processos // 2]["numero"]
+    casos = {
+        "consulta por palavras": CONSULTAS,
+        "consulta digitando (prefixo)": PREFIXOS,
+        "número exato (outra grafia)": [numero.replace("SEI-", "").replace("/", "-")],
+        "número exato (com SEI)": [numero, numero.replace("SEI-", "SEI "), numero.replace("SEI-", "sei")],
+        "número por prefixo": [numero.split("/")[0].replace("SEI-", "")],
+        "sugestões": PREFIXOS,
+    }
+    pior = 0.0
+    for nome, consultas in casos.items():
+        funcao = indice.sugerir if nome == "sugestões" else indice.buscar
+        tempos = [cronometrar(funcao, c)[0] for _ in range(args.repeticoes) for c in consultas]
+        p50, p95, maximo = percentis(tempos)
+        pior = max(pior, p95)
+        print(f"{nome:<40}{p50:>10.2f} ms p50 {p95:>8.2f} ms p95 {maximo:>8.2f} ms máx")
+
+    assert indice.buscar(casos["número exato (outra grafia)"][0])[0][2]["numero"] == numero
+    for consulta in casos["número exato (com SEI)"]:
+        assert indice.buscar(consulta)[0][2]["numero"] == numero, consulta
+
+    if pior > args.limite_ms:
+        print(f"FALHA: p95 de {pior:.1f} ms (limite {args.limite_ms:.0f} ms)")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
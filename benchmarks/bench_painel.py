@@ -0,0 +1,97 @@
+# benchmarks/bench_painel.py
+#
+# Mede o pipeline do painel da equipe (cards + tabela de histórico) com dados sintéticos.
+# Uso: python benchmarks/bench_painel.py [linhas] [limite_segundos]
+
+import os
+import random
+import re
+import sys
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modulos.equipe import HIERARQUIA_MILITAR, montar_cards, tabela_historico
+from services.historico import FUNCOES_REDEC
+
+
+def gerar_historico(linhas, semente=10):
+    """Histórico sintético: mandatos encerrados e ~1% em aberto, com equipe(...) embutido."""
+    rnd = random.Random(semente)
+    postos = list(HIERARQUIA_MILITAR.keys())
+    inicio = date(1990, 1, 1)
+    registros = []
+    for i in range(linhas):
+        entrada = inicio + timedelta(days=rnd.randrange(13000))
+        aberto = rnd.random() < 0.01
+        registros.append({
+            "id": i + 1,
+            "equipe_id": rnd.randrange(1, 2000),
+            "funcao": rnd.choice(FUNCOES_REDEC),
+            "data_entrada": entrada.isoformat(),
+            "data_saida": None if aberto else (entrada + timedelta(days=rnd.randrange(1, 900))).isoformat(),
+            "equipe": {"nome": f"SERVIDOR {i}", "posto_graduacao": rnd.choice(postos) + (" " if i % 7 == 0 else "")},
+        })
+    return registros
+
+
+def cards_legado(registros):
+    """Implementação anterior (apply por linha + iterrows), mantida só para comparação."""
+    df_atual = pd.DataFrame(registros)
+    df_atual["data_entrada"] = pd.to_datetime(df_atual["data_entrada"])
+
+    def extrair_campo(row, campo):
+        eq = row.get("equipe", {})
+        return str(eq.get(campo, "")).strip().upper() if isinstance(eq, dict) else ""
+
+    cards = {}
+    for cargo in FUNCOES_REDEC:
+        sub = df_atual[df_atual["funcao"] == cargo].copy()
+        if sub.empty:
+            continue
+        if cargo == "Coordenador":
+            sub = sub.sort_values(by="data_entrada", ascending=False).head(1)
+        sub["posto_c"] = sub.apply(lambda x: extrair_campo(x, "posto_graduacao"), axis=1)
+        sub["nome_c"] = sub.apply(lambda x: extrair_campo(x, "nome"), axis=1)
+        sub["posto_norm"] = sub["posto_c"].apply(lambda t: re.sub(r"\s+", " ", str(t).replace(" ", " ")).strip())
+        sub["peso"] = sub["posto_norm"].apply(lambda x: HIERARQUIA_MILITAR.get(x, 99))
+        sub = sub.sort_values(by=["peso", "nome_c"])
+        cards[cargo] = [f"{row['posto_c']} {row['nome_c']}".strip() for _, row in sub.iterrows()]
+    return cards
+
+
+def cronometrar(func, *args, repeticoes=3):
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        func(*args)
+        melhor = min(melhor, time.perf_counter() - t0)
+    return melhor
+
+
+def main():
+    linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    limite = float(sys.argv[2]) if len(sys.argv) > 2 else 2.0
+
+    historico = gerar_historico(linhas)
+
+    # Pior caso para os cards: todas as linhas tratadas como mandatos em aberto
+    t_cards = cronometrar(montar_cards, historico)
+    t_tabela = cronometrar(tabela_historico, historico)
+    t_legado = cronometrar(cards_legado, historico, repeticoes=1)
+
+    print(f"linhas: {linhas}")
+    print(f"montar_cards:     {t_cards * 1000:9.1f} ms")
+    print(f"tabela_historico: {t_tabela * 1000:9.1f} ms")
+    print(f"cards (legado):   {t_legado * 1000:9.1f} ms  ({t_legado / t_cards:.1f}x mais lento)")
+
+    if t_cards + t_tabela > limite:
+        print(f"FALHA: pipeline acima do limite de {limite:.1f} s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
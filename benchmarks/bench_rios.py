@@ -0,0 +1,114 @@
+# benchmarks/bench_rios.py
+#
+# Mede o motor de séries dos rios (services/rios.py) com anos de leituras de 15 em
+# 15 minutos: carga inicial, atualização com leituras novas de todas as estações
+# (o caso do monitor), leitura atrasada, situação das estações e série reduzida.
+#
+# Uso:
+#   python benchmarks/bench_rios.py                        # 30 estações, 5 anos
+#   python benchmarks/bench_rios.py --estacoes 60 --anos 10
+#
+# Sai com status 1 se a atualização passar de --limite-ms.
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+PASTA = tempfile.mkdtemp(prefix="bench_rios_")
+os.environ["REDEC_RIOS_PASTA"] = PASTA
+
+import numpy as np
+import pandas as pd
+
+from services import rios
+
+QUINZE_MIN = 900
+
+
+def estacoes(quantidade):
+    return [{
+        "id": f"{14000000 + i}", "nome": f"ESTAÇÃO {i:02d}",
+        "cota_atencao": 6.0, "cota_alerta": 8.0, "cota_transbordo": 10.0, "taxa_atencao": 0.3,
+    } for i in range(quantidade)]
+
+
+def leituras(cadastro, inicio, quantidade, rnd):
+    """Ciclo anual com ruído, `quantidade` leituras por estação a partir de `inicio` (segundos)."""
+    instantes = inicio + np.arange(quantidade, dtype=np.int64) * QUINZE_MIN
+    ano = 2 * np.pi * instantes / (365.25 * 86400)
+    partes = []
+    for i, estacao in enumerate(cadastro):
+        nivel = 5 + 3.5 * np.sin(ano + i) + rnd.normal(0, 0.05, quantidade).cumsum() / 50
+        partes.append(pd.DataFrame({"estacao": estacao["id"], "instante": instantes, "nivel": nivel.astype(np.float32)}))
+    return pd.concat(partes, ignore_index=True)
+
+
+def cronometrar(func, *args, **kwargs):
+    inicio = time.perf_counter()
+    resultado = func(*args, **kwargs)
+    return (time.perf_counter() - inicio) * 1000, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do motor de séries dos rios.")
+    parser.add_argument("--estacoes", type=int, default=30)
+    parser.add_argument("--anos", type=float, default=5)
+    parser.add_argument("--limite-ms", type=float, default=1000,
+                        help="tempo máximo aceito para atualizar todas as estações com leituras novas")
+    args = parser.parse_args()
+
+    rnd = np.random.default_rng(10)
+    cadastro = estacoes(args.estacoes)
+    por_estacao = int(args.anos * 365.25 * 96)
+    inicio = int(np.datetime64(rios.agora(), "s").astype(np.int64)) - por_estacao * QUINZE_MIN
+    historico = leituras(cadastro, inicio, por_estacao, rnd)
+    print(f"{args.estacoes} estações x {por_estacao} leituras = {len(historico):,} leituras em {PASTA}")
+
+    ms, _ = cronometrar(rios.ingerir, historico, cadastro, publicar=False)
+    print(f"{'carga inicial':<40}{ms:>10.1f} ms")
+
+    seguinte = inicio + por_estacao * QUINZE_MIN
+    resultados = {}
+    # Monitor: uma leitura nova por estação, depois 6 horas de uma vez
+    for nome, quantidade in (("atualização (1 leitura/estação)", 1), ("atualização (6 h/estação)", 24)):
+        novas = leituras(cadastro, seguinte, quantidade, rnd)
+        seguinte += quantidade * QUINZE_MIN
+        resultados[nome], resumo = cronometrar(rios.ingerir, novas, cadastro, publicar=False)
+        assert resumo["novas"] == len(novas)
+
+    # Leitura atrasada de um mês atrás em uma estação: recalcula só dali em diante
+    atrasada = pd.DataFrame({"estacao": [cadastro[0]["id"]], "instante": [seguinte - 30 * 86400 + 60], "nivel": [7.5]})
+    resultados["leitura atrasada (30 dias)"], _ = cronometrar(rios.ingerir, atrasada, cadastro, publicar=False)
+
+    resultados["situação das estações"], _ = cronometrar(rios.situacao_estacoes, cadastro)
+    fim = rios.agora()
+    for nome, dias in (("série reduzida (7 dias)", 7), ("série reduzida (1 ano)", 365), ("série reduzida (tudo)", None)):
+        desde = fim - pd.Timedelta(days=dias) if dias else None
+        resultados[nome], _ = cronometrar(rios.serie_reduzida, cadastro[0]["id"], desde)
+
+    for nome, ms in resultados.items():
+        print(f"{nome:<40}{ms:>10.1f} ms")
+
+    # Referência: recalcular do zero as colunas derivadas de todas as estações
+    alteradas = [dict(e, cota_atencao=6.5) for e in cadastro]
+    ms, _ = cronometrar(rios.recalcular, alteradas, publicar=False)
+    print(f"{'recálculo completo (referência)':<40}{ms:>10.1f} ms")
+
+    atualizacao = max(v for k, v in resultados.items() if k.startswith("atualização"))
+    if atualizacao > args.limite_ms:
+        print(f"FALHA: atualização levou {atualizacao:.0f} ms (limite {args.limite_ms:.0f} ms)")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    finally:
+        shutil.rmtree(PASTA, ignore_errors=True)
@@ -0,0 +1,214 @@
+# benchmarks/bench_telas.py
+#
+# Roda as telas pelo AppTest (sem navegador) contra o PostgREST falso com dados
+# sintéticos de 1k, 10k e 100k linhas, medindo tempo de execução (fria e com cache),
+# chamadas remotas e pico de memória, e compara com a linha de base gravada.
+#
+# Os tempos são comparados em relação a um laço de calibração medido na mesma rodada
+# (a linha de base vale em outra máquina) e são a mediana de várias rodadas.
+#
+# Uso:
+#   python benchmarks/bench_telas.py                      # compara com baseline_telas.json
+#   python benchmarks/bench_telas.py --tamanhos 1000      # só um tamanho
+#   python benchmarks/bench_telas.py --gravar-baseline    # regrava a linha de base
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+# Réplica e fila locais desligadas: o benchmark mede só o caminho até o "Supabase"
+for variavel in ("REDEC_REPLICA", "REDEC_FILA", "REDEC_METRICAS_ARQUIVO"):
+    os.environ.pop(variavel, None)
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import supabase
+from benchmarks.postgrest_falso import Banco, Cliente, semear
+
+APP = os.path.join(RAIZ, "app.py")
+BASELINE = os.path.join(RAIZ, "benchmarks", "baseline_telas.json")
+
+MENU_EQUIPE = "👥 Equipe REDEC 10"
+CENARIOS = {
+    "dashboard": {"menu": "🏠 Dashboard"},
+    "painel_equipe": {"menu": MENU_EQUIPE, "aba_equipe": "🧭 Painel da Equipe"},
+    "funcoes": {"menu": MENU_EQUIPE, "aba_equipe": "🔁 Funções & Substituições"},
+    "ferias": {"menu": MENU_EQUIPE, "aba_equipe": "🏖 Férias / Licenças"},
+    "relatorios": {"menu": MENU_EQUIPE, "aba_equipe": "📊 Relatórios"},
+}
+
+# Métricas comparadas com a linha de base: tempos (relativos à calibração) e memória
+# com tolerância relativa, chamadas remotas sem tolerância (uma consulta a mais é sempre regressão)
+METRICAS_TEMPO = ("frio_ms", "quente_ms")
+METRICAS_MEMORIA = ("pico_mb",)
+METRICAS_EXATAS = ("chamadas_frio", "chamadas_quente")
+
+
+def calibrar(repeticoes=5):
+    """Mediana do tempo (ms) de um trabalho fixo em Python puro: a régua da máquina neste momento."""
+    def trabalho():
+        numeros = [(i * 7919) % 10007 for i in range(200_000)]
+        textos = {i: str(i) for i in numeros[:50_000]}
+        return sorted(numeros), sorted(textos.values())
+
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        trabalho()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+def preparar(banco):
+    """Todas as sessões usam o cliente falso; caches zerados como num processo novo."""
+    # services.conexao importa create_client do pacote a cada criação do cliente
+    supabase.create_client = lambda *args, **kwargs: Cliente(banco)
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+
+def nova_sessao(estado, timeout):
+    at = AppTest.from_file(APP, default_timeout=timeout)
+    at.secrets["SUPABASE_URL"] = "http://postgrest-falso"
+    at.secrets["SUPABASE_KEY"] = "chave"
+    for chave, valor in estado.items():
+        at.session_state[chave] = valor
+    return at
+
+
+def executar(at):
+    inicio = time.perf_counter()
+    at.run()
+    duracao = time.perf_counter() - inicio
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return duracao * 1000
+
+
+def medir_cenario(banco, estado, repeticoes, rodadas, timeout):
+    """
+    Em cada uma das `rodadas`: frio é a primeira execução, com caches vazios; quente, a
+    melhor de `repeticoes` reexecuções da mesma sessão. Vale a mediana das rodadas.
+    pico_mb: memória alocada no pico de uma execução fria (tracemalloc).
+    calibracao_ms: calibrar() medido junto, para comparar tempos entre máquinas.
+    """
+    frios, quentes, calibracoes = [], [], []
+    chamadas_frio = chamadas_quente = 0
+    for _ in range(rodadas):
+        calibracoes.append(calibrar())
+        preparar(banco)
+        at = nova_sessao(estado, timeout)
+        banco.zerar_contadores()
+        frios.append(executar(at))
+        chamadas_frio = max(chamadas_frio, banco.chamadas)
+
+        banco.zerar_contadores()
+        quentes.append(min(executar(at) for _ in range(repeticoes)))
+        chamadas_quente = max(chamadas_quente, banco.chamadas // repeticoes)
+
+    # Medida à parte: o tracemalloc deixa a execução bem mais lenta
+    preparar(banco)
+    at = nova_sessao(estado, timeout)
+    tracemalloc.start()
+    try:
+        executar(at)
+        pico = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "frio_ms": round(statistics.median(frios), 1), "quente_ms": round(statistics.median(quentes), 1),
+        "chamadas_frio": chamadas_frio, "chamadas_quente": chamadas_quente,
+        "pico_mb": round(pico / 2**20, 1), "calibracao_ms": round(statistics.median(calibracoes), 1),
+    }
+
+
+def comparar(resultados, baseline, tolerancia_tempo, tolerancia_memoria):
+    """Lista de regressões em relação à linha de base (vazia se tudo dentro do limite)."""
+    regressoes = []
+    for chave, atual in resultados.items():
+        base = baseline.get(chave)
+        if base is None:
+            continue
+        # Tempo em unidades de calibração: mesma régua nas duas medições
+        for metrica in METRICAS_TEMPO:
+            relativo, relativo_base = atual[metrica] / atual["calibracao_ms"], base[metrica] / base["calibracao_ms"]
+            if relativo > relativo_base * (1 + tolerancia_tempo):
+                regressoes.append(f"{chave} {metrica}: {relativo:.2f} > {relativo_base:.2f} calibrações "
+                                  f"(+{tolerancia_tempo:.0%})")
+        for metrica in METRICAS_MEMORIA:
+            if atual[metrica] > base[metrica] * (1 + tolerancia_memoria):
+                regressoes.append(f"{chave} {metrica}: {atual[metrica]} > {base[metrica]} (+{tolerancia_memoria:.0%})")
+        for metrica in METRICAS_EXATAS:
+            if atual[metrica] > base[metrica]:
+                regressoes.append(f"{chave} {metrica}: {atual[metrica]} > {base[metrica]}")
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das telas com o PostgREST falso.")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--cenarios", nargs="+", choices=list(CENARIOS), default=list(CENARIOS))
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--rodadas", type=int, default=3, help="rodadas por cenário; vale a mediana dos tempos")
+    parser.add_argument("--tolerancia", type=float, default=1.0,
+                        help="aumento relativo aceito no tempo, já normalizado pela calibração (1.0 = 100%%)")
+    parser.add_argument("--tolerancia-memoria", type=float, default=0.5,
+                        help="aumento relativo aceito no pico de memória (0.5 = 50%%)")
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--gravar-baseline", action="store_true")
+    args = parser.parse_args()
+
+    banco = Banco()
+    resultados = {}
+    # Aquecimento fora da medida: a primeira execução do processo importa os módulos do app
+    semear(banco, min(args.tamanhos))
+    preparar(banco)
+    executar(nova_sessao(CENARIOS[args.cenarios[0]], args.timeout))
+
+    print(f"{'cenário':<28}{'frio ms':>10}{'quente ms':>11}{'chamadas':>10}{'pico MB':>9}{'calib. ms':>11}")
+    for tamanho in args.tamanhos:
+        semear(banco, tamanho)
+        for nome in args.cenarios:
+            chave = f"{tamanho}/{nome}"
+            r = resultados[chave] = medir_cenario(banco, CENARIOS[nome], args.repeticoes, args.rodadas,
+                                                         args.timeout)
+            print(f"{chave:<28}{r['frio_ms']:>10.1f}{r['quente_ms']:>11.1f}"
+                  f"{r['chamadas_frio']:>6}/{r['chamadas_quente']:<3}{r['pico_mb']:>9.1f}{r['calibracao_ms']:>11.1f}")
+
+    if args.gravar_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as arquivo:
+                baseline = json.load(arquivo)
+        baseline.update(resultados)
+        with open(args.baseline, "w", encoding="utf-8") as arquivo:
+            json.dump(dict(sorted(baseline.items())), arquivo, indent=2, ensure_ascii=False)
+            arquivo.write("\n")
+        print(f"Linha de base gravada em {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("Sem linha de base: rode com --gravar-baseline para criá-la.")
+        return
+    with open(args.baseline, encoding="utf-8") as arquivo:
+        regressoes = comparar(resultados, json.load(arquivo), args.tolerancia, args.tolerancia_memoria)
+    if regressoes:
+        print("FALHA: regressões em relação à linha de base:")
+        for regressao in regressoes:
+            print(f"  {regressao}")
+        sys.exit(1)
+    print("OK: dentro da linha de base.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+# benchmarks/postgrest_falso.py
+#
+# Substituto local da API de tabelas do Supabase (PostgREST) para os benchmarks:
+# guarda as tabelas em memória, entende os filtros, ordenações, junções equipe(...)
+# estoque_*(...), viaturas(...) e sei_processos(...) e RPCs usados pelo app e conta as chamadas remotas.
+
+import itertools
+import random
+import re
+import threading
+from datetime import date, timedelta
+
+from modulos.equipe import HIERARQUIA_MILITAR, TIPOS_AFASTAMENTO
+from services.historico import FUNCOES_REDEC
+
+
+class Resposta:
+    def __init__(self, data):
+        self.data = data
+
+
+class Banco:
+    """Tabelas em memória e contadores de chamadas, compartilhados pelos clientes falsos."""
+
+    def __init__(self):
+        self.tabelas = {"equipe": [], "historico_redec": [], "ferias_licencas": [], "rios_estacoes": [],
+                        "estoque_itens": [], "estoque_lotes": [], "estoque_movimentos": [],
+                        "viaturas": [], "viaturas_registros": [], "viaturas_mensal": [],
+                        "sei_processos": [], "boletins": []}
+        self.chamadas = 0
+        self.por_operacao = {}
+        self._ids = itertools.count(1)
+        self._trava = threading.Lock()
+
+    def contar(self, operacao):
+        with self._trava:
+            self.chamadas += 1
+            self.por_operacao[operacao] = self.por_operacao.get(operacao, 0) + 1
+
+    def zerar_contadores(self):
+        self.chamadas = 0
+        self.por_operacao = {}
+
+    def novo_id(self):
+        return next(self._ids)
+
+    def membro(self, equipe_id):
+        return self._por_id.get(equipe_id)
+
+    def registro(self, tabela, id_):
+        if tabela == "equipe":
+            return self.membro(id_)
+        return next((r for r in self.tabelas[tabela] if r["id"] == id_), None)
+
+    def indexar(self):
+        self._por_id = {m["id"]: m for m in self.tabelas["equipe"]}
+
+
+class Cliente:
+    def __init__(self, banco):
+        self.banco = banco
+
+    def table(self, nome):
+        return Consulta(self.banco, nome)
+
+    def rpc(self, nome, parametros=None):
+        return ChamadaRPC(self.banco, nome, parametros or {})
+
+
+def _valor(v):
+    """Normaliza para comparação: números continuam números, o resto vira texto."""
+    return v if isinstance(v, (int, float)) else str(v)
+
+
+# or=(coluna.lt."v",and(coluna.eq."v",id.lt.N)) e a variante com gt (paginação por cursor)
+_CURSOR = re.compile(r'(\w+)\.(lt|gt)\."([^"]*)",and\(\w+\.eq\."[^"]*",id\.(?:lt|gt)\.([^)]+)\)')
+
+
+# Junção embutida -> coluna de chave estrangeira (por tabela, quando o nome foge do padrão)
+JUNCOES = {"equipe": "equipe_id", "estoque_itens": "item_id", "estoque_lotes": "lote_id", "viaturas": "viatura_id",
+           "sei_processos": "processo_id"}
+JUNCOES_POR_TABELA = {("viaturas", "equipe"): "motorista_atual_id", ("viaturas_registros", "equipe"): "motorista_id"}
+
+
+class Consulta:
+    def __init__(self, banco, tabela):
+        self.banco, self.tabela = banco, tabela
+        self.filtros, self.ordem = [], []
+        self.colunas, self.limite, self.operacao, self.dados = "*", None, "select", None
+        self.ignorar_conflito = None
+
+    # ---------- construção ----------
+    def select(self, colunas="*", count=None):
+        self.colunas = colunas
+        return self
+
+    def _filtro(self, funcao):
+        self.filtros.append(funcao)
+        return self
+
+    def eq(self, c, v): return self._filtro(lambda r: r.get(c) is not None and _valor(r[c]) == _valor(v))
+    def neq(self, c, v): return self._filtro(lambda r: r.get(c) is None or _valor(r[c]) != _valor(v))
+    def gt(self, c, v): return self._filtro(lambda r: r.get(c) is not None and _valor(r[c]) > _valor(v))
+    def gte(self, c, v): return self._filtro(lambda r: r.get(c) is not None and _valor(r[c]) >= _valor(v))
+    def lt(self, c, v): return self._filtro(lambda r: r.get(c) is not None and _valor(r[c]) < _valor(v))
+    def lte(self, c, v): return self._filtro(lambda r: r.get(c) is not None and _valor(r[c]) <= _valor(v))
+
+    def in_(self, c, valores):
+        valores = {_valor(v) for v in valores}
+        return self._filtro(lambda r: r.get(c) is not None and _valor(r[c]) in valores)
+
+    def is_(self, c, v):
+        return self._filtro(lambda r: r.get(c) is None) if v == "null" else self._filtro(lambda r: r.get(c) is not None)
+
+    def or_(self, expressao):
+        coluna, operador, valor, id_ = _CURSOR.fullmatch(expressao).groups()
+        id_ = int(id_) if id_.isdigit() else id_
+        if operador == "lt":
+            return self._filtro(lambda r: str(r[coluna]) < valor or (str(r[coluna]) == valor and r["id"] < id_))
+        return self._filtro(lambda r: str(r[coluna]) > valor or (str(r[coluna]) == valor and r["id"] > id_))
+
+    def order(self, coluna, desc=False):
+        self.ordem.append((coluna, desc))
+        return self
+
+    def limit(self, n):
+        self.limite = n
+        return self
+
+    def insert(self, dados):
+        self.operacao, self.dados = "insert", dados
+        return self
+
+    def upsert(self, dados, on_conflict=None, ignore_duplicates=False, **_):
+        # Como o PostgREST com resolution=ignore-duplicates: só as linhas inseridas voltam
+        self.ignorar_conflito = on_conflict if ignore_duplicates else None
+        return self.insert(dados)
+
+    def update(self, dados):
+        self.operacao, self.dados = "update", dados
+        return self
+
+    def delete(self):
+        self.operacao = "delete"
+        return self
+
+    # ---------- execução ----------
+    def execute(self):
+        self.banco.contar(f"{self.operacao} {self.tabela}")
+        linhas = self.banco.tabelas[self.tabela]
+
+        if self.operacao == "insert":
+            dados = self.dados if isinstance(self.dados, list) else [self.dados]
+            if self.ignorar_conflito:
+                existentes = {r.get(self.ignorar_conflito) for r in linhas}
+                dados = [r for r in dados if r.get(self.ignorar_conflito) not in existentes]
+            novos = [dict(r, id=r.get("id") or self.banco.novo_id()) for r in dados]
+            linhas.extend(novos)
+            if self.tabela == "equipe":
+                self.banco.indexar()
+            return Resposta([dict(r) for r in novos])
+
+        selecionadas = [r for r in linhas if all(f(r) for f in self.filtros)]
+        if self.operacao == "update":
+            for r in selecionadas:
+                r.update(self.dados)
+            return Resposta([dict(r) for r in selecionadas])
+        if self.operacao == "delete":
+            ids = {id(r) for r in selecionadas}
+            linhas[:] = [r for r in linhas if id(r) not in ids]
+            return Resposta([dict(r) for r in selecionadas])
+
+        for coluna, desc in reversed(self.ordem):
+            # Nulos por último, como o PostgREST em ordem crescente
+            selecionadas.sort(key=lambda r: (r.get(coluna) is None, _valor(r.get(coluna) or "")), reverse=desc)
+        if self.limite is not None:
+            selecionadas = selecionadas[:self.limite]
+        return Resposta([self._projetar(r) for r in selecionadas])
+
+    def _projetar(self, registro):
+        partes = [p.strip() for p in re.split(r",(?![^(]*\))", self.colunas)]
+        saida = {}
+        for parte in partes:
+            juncao = re.fullmatch(r"(\w+)\(([^)]*)\)", parte)
+            if juncao:
+                tabela, campos = juncao.group(1), [c.strip() for c in juncao.group(2).split(",")]
+                chave = JUNCOES_POR_TABELA.get((self.tabela, tabela), JUNCOES[tabela])
+                relacionado = self.banco.registro(tabela, registro.get(chave))
+                saida[tabela] = {c: relacionado.get(c) for c in campos} if relacionado else None
+            elif parte == "*":
+                saida.update(registro)
+            else:
+                saida[parte] = registro.get(parte)
+        return saida
+
+
+class ChamadaRPC:
+    def __init__(self, banco, nome, parametros):
+        self.banco, self.nome, self.parametros = banco, nome, parametros
+
+    def execute(self):
+        self.banco.contar(f"rpc {self.nome}")
+        return Resposta(getattr(self, f"_{self.nome}")(**self.parametros))
+
+    def _contadores_dashboard(self):
+        hoje = date.today().isoformat()
+        tabelas = self.banco.tabelas
+        return {
+            "membros_ativos": sum(1 for m in tabelas["equipe"] if m.get("ativo")),
+            "em_funcao": len({h["equipe_id"] for h in tabelas["historico_redec"] if h.get("data_saida") is None}),
+            "afastados_hoje": len({f["equipe_id"] for f in tabelas["ferias_licencas"] if f["inicio"] <= hoje <= f["fim"]}),
+            "rios_atencao": sum(1 for e in tabelas["rios_estacoes"] if e.get("ativa") and e.get("situacao") != "normal"),
+            "itens_estoque_baixo": sum(1 for i in tabelas["estoque_itens"]
+                                       if i.get("ativo") and i.get("saldo", 0) < i.get("estoque_minimo", 0)),
+            "viaturas_disponiveis": sum(1 for v in tabelas["viaturas"]
+                                        if v.get("ativa") and v.get("situacao") == "disponivel"),
+            "boletins_pendentes": sum(1 for b in tabelas["boletins"] if b.get("situacao") == "pendente"),
+        }
+
+    def _atualizar_situacao_rios(self, p_estados):
+        por_id = {e["id"]: e for e in self.banco.tabelas["rios_estacoes"]}
+        for estado in p_estados:
+            if estado["id"] in por_id:
+                por_id[estado["id"]].update(estado)
+        return None
+
+    def _movimento(self, item_id, lote, tipo, quantidade, chave, **extra):
+        delta = quantidade if tipo == "entrada" else -quantidade
+        lote["saldo"] += delta
+        item = self.banco.registro("estoque_itens", item_id)
+        item["saldo"] = item.get("saldo", 0) + delta
+        novo = dict(extra, id=self.banco.novo_id(), item_id=item_id, lote_id=lote["id"], tipo=tipo,
+                    quantidade=quantidade, criado_em=date.today().isoformat() + "T12:00:00+00:00",
+                    chave_idempotencia=chave)
+        self.banco.tabelas["estoque_movimentos"].append(novo)
+        return dict(novo)
+
+    def _entrada_estoque(self, p_item_id, p_quantidade, p_codigo_lote="", p_validade=None, p_documento=None,
+                         p_observacao=None, p_chave_idempotencia=None):
+        lotes = self.banco.tabelas["estoque_lotes"]
+        lote = next((l for l in lotes if (l["item_id"], l["codigo"], l["validade"]) ==
+                     (p_item_id, p_codigo_lote or "", p_validade)), None)
+        if lote is None:
+            lote = {"id": self.banco.novo_id(), "item_id": p_item_id, "codigo": p_codigo_lote or "",
+                    "validade": p_validade, "saldo": 0}
+            lotes.append(lote)
+        return [self._movimento(p_item_id, lote, "entrada", p_quantidade, p_chave_idempotencia,
+                                documento=p_documento, observacao=p_observacao)]
+
+    def _saida_estoque(self, p_item_id, p_quantidade, p_tipo="saida", p_municipio=None, p_documento=None,
+                       p_observacao=None, p_chave_idempotencia=None):
+        lotes = sorted((l for l in self.banco.tabelas["estoque_lotes"] if l["item_id"] == p_item_id and l["saldo"] > 0),
+                       key=lambda l: (l["validade"] is None, l["validade"] or "", l["id"]))
+        if sum(l["saldo"] for l in lotes) < p_quantidade:
+            raise RuntimeError("Saldo insuficiente")
+        movimentos, restante = [], p_quantidade
+        for lote in lotes:
+            if restante <= 0:
+                break
+            retirar = min(lote["saldo"], restante)
+            movimentos.append(self._movimento(p_item_id, lote, p_tipo, retirar, p_chave_idempotencia,
+                                              municipio=p_municipio, documento=p_documento, observacao=p_observacao))
+            restante -= retirar
+        return movimentos
+
+    def _registrar_viatura(self, p_viatura_id, p_tipo, p_km=None, p_litros=None, p_valor=None, p_destino=None,
+                           p_motorista_id=None, p_descricao=None, p_revisao=False, p_registrado_em=None,
+                           p_chave_idempotencia=None):
+        """Resumos simplificados (sem horas em manutenção nem conferência de situação) do gatilho de sql/008."""
+        viatura = self.banco.registro("viaturas", p_viatura_id)
+        novo = {"id": self.banco.novo_id(), "viatura_id": p_viatura_id, "tipo": p_tipo, "registrado_em": p_registrado_em,
+                "km": p_km, "litros": p_litros, "valor": p_valor, "destino": p_destino, "motorista_id": p_motorista_id,
+                "descricao": p_descricao, "revisao": p_revisao, "chave_idempotencia": p_chave_idempotencia}
+        registros = self.banco.tabelas["viaturas_registros"]
+        if viatura.get("ultimo_registro_em") and p_registrado_em < viatura["ultimo_registro_em"]:
+            # Registro da fila mais antigo que o último aplicado: refaz a viatura inteira na
+            # ordem dos fatos (o gatilho refaz só a cauda do diário)
+            registros.append(novo)
+            self.banco.tabelas["viaturas_mensal"] = [m for m in self.banco.tabelas["viaturas_mensal"]
+                                                     if m["viatura_id"] != p_viatura_id]
+            viatura.update(situacao="disponivel", hodometro_km=viatura.get("hodometro_inicial_km", 0),
+                           em_uso_desde=None, destino_atual=None, motorista_atual_id=None,
+                           manutencao_desde=None, ultimo_registro_em=None)
+            for registro in sorted((r for r in registros if r["viatura_id"] == p_viatura_id),
+                                   key=lambda r: (r["registrado_em"], r["id"])):
+                self._aplicar_viatura(viatura, registro)
+            return [dict(novo)]
+
+        if p_km is not None and p_km < viatura["hodometro_km"]:
+            raise RuntimeError("Hodômetro menor que o último registrado")
+        self._aplicar_viatura(viatura, novo)
+        registros.append(novo)
+        return [dict(novo)]
+
+    def _aplicar_viatura(self, viatura, registro):
+        tipo, km, em = registro["tipo"], registro["km"], registro["registrado_em"]
+        mes = em[:7] + "-01"
+        mensal = next((m for m in self.banco.tabelas["viaturas_mensal"]
+                       if (m["viatura_id"], m["mes"]) == (viatura["id"], mes)), None)
+        if mensal is None:
+            mensal = {"viatura_id": viatura["id"], "mes": mes, "km": 0, "litros": 0, "valor": 0, "viagens": 0,
+                      "manutencoes": 0, "horas_manutencao": 0}
+            self.banco.tabelas["viaturas_mensal"].append(mensal)
+        mensal["km"] += max(km - viatura["hodometro_km"], 0) if km is not None else 0
+        mensal["litros"] += registro["litros"] or 0
+        mensal["valor"] += registro["valor"] or 0
+        mensal["viagens"] += tipo == "saida"
+        mensal["manutencoes"] += tipo == "manutencao"
+        viatura["hodometro_km"] = max(viatura["hodometro_km"], km or 0)
+        viatura["ultimo_registro_em"] = em
+        viatura["situacao"] = {"saida": "em_uso", "manutencao": "manutencao", "retorno": "disponivel",
+                               "liberacao": "disponivel"}.get(tipo, viatura["situacao"])
+        if tipo == "saida":
+            viatura.update(em_uso_desde=em, destino_atual=registro["destino"], motorista_atual_id=registro["motorista_id"])
+        elif tipo == "retorno":
+            viatura.update(em_uso_desde=None, destino_atual=None, motorista_atual_id=None)
+        elif tipo == "manutencao":
+            viatura["manutencao_desde"] = em
+        elif tipo == "liberacao":
+            viatura["manutencao_desde"] = None
+
+    def _trocar_funcao(self, p_equipe_id, p_funcao, p_data_entrada=None, p_encerrar_anterior=True,
+                       p_chave_idempotencia=None):
+        data = p_data_entrada or date.today().isoformat()
+        historico = self.banco.tabelas["historico_redec"]
+        if p_encerrar_anterior:
+            for r in historico:
+                if r["funcao"] == p_funcao and r.get("data_saida") is None:
+                    r["data_saida"] = data
+        novo = {"id": self.banco.novo_id(), "equipe_id": p_equipe_id, "funcao": p_funcao,
+                "data_entrada": data, "data_saida": None, "chave_idempotencia": p_chave_idempotencia}
+        historico.append(novo)
+        return [dict(novo)]
+
+
+# ============================================================
+# DADOS SINTÉTICOS
+# ============================================================
+
+def semear(banco, linhas, semente=10):
+    """
+    Preenche o banco com `linhas` mandatos e `linhas` afastamentos para uma equipe
+    de linhas // 10 servidores (mínimo 50). Cada função tem um ocupante em aberto
+    e o Coordenador segue sucessão estrita; os demais mandatos estão encerrados.
+    """
+    rnd = random.Random(semente)
+    postos = list(HIERARQUIA_MILITAR)
+    servidores = max(50, linhas // 10)
+    hoje = date.today()
+
+    equipe = [{
+        "id": banco.novo_id(), "nome": f"SERVIDOR {i:06d}", "nome_guerra": f"S{i}",
+        "posto_graduacao": rnd.choice(postos), "rg": str(100000 + i), "id_funcional": str(500000 + i),
+        "quadro_qbmp": "Q00/00", "telefone": "", "ativo": rnd.random() < 0.9,
+    } for i in range(servidores)]
+    ids = [m["id"] for m in equipe]
+
+    historico = []
+    for i in range(linhas):
+        funcao = FUNCOES_REDEC[i % len(FUNCOES_REDEC)]
+        entrada = hoje - timedelta(days=rnd.randrange(30, 12000))
+        historico.append({
+            "id": banco.novo_id(), "equipe_id": rnd.choice(ids), "funcao": funcao,
+            "data_entrada": entrada.isoformat(),
+            "data_saida": (entrada + timedelta(days=rnd.randrange(1, 900))).isoformat(),
+        })
+    for funcao in FUNCOES_REDEC:
+        historico.append({
+            "id": banco.novo_id(), "equipe_id": rnd.choice(ids), "funcao": funcao,
+            "data_entrada": (hoje - timedelta(days=10)).isoformat(), "data_saida": None,
+        })
+
+    ferias = []
+    for _ in range(linhas):
+        inicio = hoje - timedelta(days=rnd.randrange(-120, 3650))
+        ferias.append({
+            "id": banco.novo_id(), "equipe_id": rnd.choice(ids), "tipo": rnd.choice(TIPOS_AFASTAMENTO),
+            "inicio": inicio.isoformat(), "fim": (inicio + timedelta(days=rnd.randrange(1, 31))).isoformat(),
+            "observacao": "",
+        })
+
+    banco.tabelas["equipe"][:] = equipe
+    banco.tabelas["historico_redec"][:] = historico
+    banco.tabelas["ferias_licencas"][:] = ferias
+    banco.indexar()
@@ -1 +1,112 @@
+from datetime import date
 
+import pandas as pd
+import streamlit as st
+
+from services import documentos
+from modulos.componentes import busca_documentos, paginar, secao
+
+ABAS_BOLETINS = ["📝 Pendentes", "🔎 Buscar", "📚 Todos", "➕ Novo boletim"]
+
+
+def tela_boletins():
+    st.subheader("📄 Boletins")
+
+    aba = secao("aba_boletins", ABAS_BOLETINS)
+    if aba == "📝 Pendentes":
+        pendentes()
+    elif aba == "🔎 Buscar":
+        busca_documentos("boletins_busca", tipo="boletim")
+    elif aba == "📚 Todos":
+        todos()
+    else:
+        novo_boletim()
+
+
+def formatar_data(valor):
+    return date.fromisoformat(valor[:10]).strftime("%d/%m/%Y") if valor else ""
+
+
+def numero_processo(boletim):
+    return (boletim.get("sei_processos") or {}).get("numero") or ""
+
+
+# ============================================================
+# 1. PENDENTES DE PUBLICAÇÃO
+# ============================================================
+
+def pendentes():
+    linhas = paginar("boletins_pendentes", documentos.buscar_boletins_pagina, situacao="pendente")
+    if not linhas:
+        st.success("Nenhum boletim pendente.")
+        return
+    for boletim in linhas:
+        titulo = f"{boletim.get('numero') or 'Sem número'} ({formatar_data(boletim['data'])}) — {boletim['titulo']}"
+        with st.expander(titulo):
+            if numero_processo(boletim):
+                st.caption(f"Processo SEI: {numero_processo(boletim)}")
+            st.markdown(boletim["texto"] or "_Sem texto._")
+            if st.button("Publicar", key=f"publicar_{boletim['id']}", type="primary"):
+                try:
+                    documentos.publicar_boletim(boletim["id"])
+                    st.toast("Boletim publicado!", icon="✅")
+                    st.rerun()
+                except Exception as erro:
+                    st.error(f"Erro ao publicar: {erro}")
+
+
+# ============================================================
+# 2. TODOS (PAGINADOS)
+# ============================================================
+
+def todos():
+    situacao = st.selectbox("Situação", [None] + list(documentos.SITUACOES_BOLETIM),
+                            format_func=lambda s: documentos.SITUACOES_BOLETIM.get(s, "Todas"),
+                            key="boletins_situacao")
+    linhas = paginar("boletins_lista", documentos.buscar_boletins_pagina, situacao=situacao)
+    if not linhas:
+        st.info("Nenhum boletim cadastrado.")
+        return
+    st.dataframe(pd.DataFrame({
+        "Número": [b.get("numero") or "" for b in linhas],
+        "Data": [formatar_data(b["data"]) for b in linhas],
+        "Título": [b["titulo"] for b in linhas],
+        "Situação": [documentos.SITUACOES_BOLETIM[b["situacao"]] for b in linhas],
+        "Publicado em": [formatar_data(b.get("publicado_em")) for b in linhas],
+        "Processo SEI": [numero_processo(b) for b in linhas],
+    }), use_container_width=True, hide_index=True)
+
+
+# ============================================================
+# 3. NOVO BOLETIM
+# ============================================================
+
+def novo_boletim():
+    with st.form("novo_boletim", clear_on_submit=True):
+        c1, c2, c3 = st.columns([1, 1, 2])
+        numero = c1.text_input("Número")
+        data = c2.date_input("Data", format="DD/MM/YYYY")
+        processo = c3.text_input("Processo SEI (opcional)", placeholder="SEI-270009/000123/2024")
+        titulo = st.text_input("Título")
+        texto = st.text_area("Texto", height=250)
+        if st.form_submit_button("Salvar como pendente", type="primary"):
+            if not titulo.strip():
+                st.error("Informe o título.")
+                return
+            processo_id = None
+            if processo.strip():
+                # Índice exato dos números de processo, qualquer que seja a grafia digitada
+                achado = documentos.processo_por_numero(processo)
+                if not achado:
+                    st.error("Processo SEI não encontrado. Cadastre-o antes na tela 📥 SEI.")
+                    return
+                processo_id = achado["id"]
+            try:
+                documentos.inserir_boletim({
+                    "numero": numero.strip() or None, "data": str(data), "titulo": titulo.strip(),
+                    "texto": texto.strip(), "processo_id": processo_id,
+                })
+                st.toast("Boletim salvo como pendente!", icon="✅")
+                st.rerun()
+            except Exception as erro:
+                st.error(f"Erro ao salvar: {erro}")
@@ -0,0 +1,125 @@
+import pandas as pd
+import streamlit as st
+
+from services import documentos, fila
+from services.busca import palavras, sem_acentos
+
+# Componentes de tela usados por mais de um módulo
+
+TAMANHO_PAGINA = 50
+
+
+def paginar(chave, buscar, **filtros):
+    """
+    Controles Anterior/Próxima para uma consulta paginada por cursor.
+    A pilha de cursores das páginas visitadas fica na sessão, em `chave`;
+    mudar qualquer filtro volta para a primeira página.
+    Retorna as linhas da página atual; se a consulta falhar, avisa e retorna
+    uma página vazia, sem derrubar o resto da tela.
+    """
+    estado = st.session_state.setdefault(chave, {"filtros": None, "cursores": [None]})
+    if estado["filtros"] != filtros:
+        estado["filtros"] = filtros
+        estado["cursores"] = [None]
+    cursores = estado["cursores"]
+
+    try:
+        linhas, proximo = buscar(cursor=cursores[-1], limite=TAMANHO_PAGINA, **filtros)
+    except Exception as erro:
+        st.warning(f"Falha ao carregar a página: {erro}")
+        linhas, proximo = [], None
+
+    c1, c2, c3 = st.columns([1, 2, 1])
+    c1.button("◀ Anterior", key=f"{chave}_anterior", disabled=len(cursores) == 1,
+              on_click=cursores.pop, use_container_width=True)
+    c2.caption(f"Página {len(cursores)}")
+    c3.button("Próxima ▶", key=f"{chave}_proxima", disabled=proximo is None,
+              on_click=cursores.append, args=(proximo,), use_container_width=True)
+    return linhas
+
+
+def secao(chave, abas):
+    """
+    Seletor de seção no lugar de st.tabs, como em Equipe: só a seção escolhida é
+    renderizada e busca dados. A escolha fica na sessão, em `chave`, para sobreviver
+    à troca de página. Retorna a seção atual.
+    """
+    if st.session_state.get(chave) not in abas:
+        st.session_state[chave] = abas[0]
+    if f"{chave}_radio" not in st.session_state:
+        st.session_state[f"{chave}_radio"] = st.session_state[chave]
+
+    atual = st.radio("Seção", abas, key=f"{chave}_radio", horizontal=True, label_visibility="collapsed")
+    st.session_state[chave] = atual
+    return atual
+
+
+@st.fragment(run_every=10)
+def pendentes_fila(tabela, descricao):
+    """Registros de `tabela` feitos sem conexão e ainda não confirmados pelo banco (fila ativa)."""
+    pendentes = [p for p in fila.situacao() if fila.DESTINOS.get(p["destino"]) == tabela]
+    if not pendentes:
+        return
+    falhas = [p for p in pendentes if p["situacao"] == "falhou"]
+    mensagem = f"📤 {len(pendentes)} {descricao} aguardando envio; os números abaixo ainda não os incluem."
+    if falhas:
+        st.error(mensagem + f" {len(falhas)} recusado(s): " + "; ".join(p["erro"] or "" for p in falhas))
+    else:
+        st.info(mensagem)
+
+
+def _completar(chave):
+    """Troca a última palavra da consulta pela sugestão escolhida."""
+    palavra = st.session_state[f"{chave}_sugestao"]
+    if not palavra:
+        return
+    consulta = st.session_state[f"{chave}_consulta"]
+    inicio = len(consulta.rstrip()) - len(consulta.rstrip().split()[-1])
+    st.session_state[f"{chave}_consulta"] = consulta[:inicio] + palavra + " "
+    st.session_state[f"{chave}_sugestao"] = None
+
+
+def _trecho(texto, consulta, tamanho=220):
+    """Trecho do texto em volta da primeira palavra da consulta encontrada."""
+    normal = sem_acentos(texto)
+    posicoes = [normal.find(p) for p in palavras(consulta)]
+    posicao = min([p for p in posicoes if p >= 0], default=0)
+    inicio = max(posicao - tamanho // 3, 0)
+    return ("…" if inicio else "") + texto[inicio:inicio + tamanho].strip() + ("…" if inicio + tamanho < len(texto) else "")
+
+
+@st.fragment
+def busca_documentos(chave, tipo=None):
+    """
+    Busca nos processos SEI e boletins pelo índice em memória (services/documentos.py):
+    sem acento, sem diferença de maiúsculas, singular/plural, com complemento da
+    última palavra. `tipo` ("sei" ou "boletim") restringe a um dos dois.
+    """
+    consulta = st.text_input("Buscar", key=f"{chave}_consulta",
+                             placeholder="Assunto, interessado, título, trecho ou número do processo")
+    if not consulta.strip():
+        return
+
+    sugestoes = documentos.sugerir(consulta)
+    if sugestoes:
+        st.pills("Completar com", sugestoes, key=f"{chave}_sugestao", label_visibility="collapsed",
+                 on_change=_completar, args=(chave,))
+
+    resultados = documentos.buscar(consulta, tipo)
+    if not resultados:
+        st.info("Nenhum documento encontrado.")
+        return
+    st.caption(f"{len(resultados)} resultado(s), do mais ao menos relevante.")
+    for tipo_documento, linha, _ in resultados:
+        with st.container(border=True):
+            if tipo_documento == "sei":
+                st.markdown(f"📥 **{linha['numero']}** — {linha['assunto']}")
+                st.caption(" · ".join(filter(None, [
+                    documentos.SITUACOES_PROCESSO.get(linha.get("situacao"), ""), linha.get("interessado"),
+                    linha.get("unidade"),
+                ])))
+            else:
+                data = pd.to_datetime(linha["data"]).strftime("%d/%m/%Y") if linha.get("data") else ""
+                st.markdown(f"📄 **{linha.get('numero') or 'Boletim'}** ({data}) — {linha['titulo']}")
+                st.caption(documentos.SITUACOES_BOLETIM.get(linha.get("situacao"), "") + " · "
+                           + _trecho(linha.get("texto") or "", consulta))
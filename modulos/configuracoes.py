@@ -0,0 +1,83 @@
+import streamlit as st
+
+from services import metricas, paginas
+
+
+def tela_configuracoes():
+    st.subheader("⚙️ Configurações")
+    desempenho()
+    st.divider()
+    perfil()
+
+
+# ============================================================
+# DESEMPENHO (MÉTRICAS POR OPERAÇÃO)
+# ============================================================
+
+def desempenho():
+    st.markdown("### ⏱️ Desempenho")
+    st.caption(
+        "Tempos por operação: **leitura** é cada chamada a um buscar_* (com acertos de cache), "
+        "**consulta** só as que foram ao banco, **rede** cada requisição HTTP, "
+        "**escrita** as gravações, **tela** a renderização de cada seção e **importacao** / "
+        "**primeira_tela** o custo da primeira abertura de cada página."
+    )
+
+    escopo = st.radio("Escopo", ["Esta sessão", "Todas as sessões"], horizontal=True, key="metricas_escopo")
+    resumo = metricas.resumo("sessao" if escopo == "Esta sessão" else "processo")
+    if resumo.empty:
+        st.info("Nenhuma medição ainda. Navegue pelo sistema e volte a esta página.")
+    else:
+        categorias = st.multiselect("Categorias", sorted(resumo["Categoria"].unique()), key="metricas_categorias")
+        if categorias:
+            resumo = resumo[resumo["Categoria"].isin(categorias)]
+        st.dataframe(
+            resumo, use_container_width=True, hide_index=True,
+            column_config={c: st.column_config.NumberColumn(format="%.1f")
+                           for c in ["p50 (ms)", "p90 (ms)", "p99 (ms)", "Máx (ms)", "Linhas (média)"]},
+        )
+
+    c1, c2 = st.columns(2)
+    if not resumo.empty:
+        c1.download_button("Baixar resumo (CSV)", resumo.to_csv(index=False).encode("utf-8"),
+                           "metricas_redec.csv", "text/csv", on_click="ignore", use_container_width=True)
+    c2.button("Limpar medições", on_click=metricas.limpar, use_container_width=True)
+
+    primeiras = paginas.primeiras_aberturas()
+    if primeiras:
+        with st.expander("Primeira abertura de cada página (desde o início do processo)"):
+            st.dataframe(
+                [{"Página": menu, "Importação (ms)": round(imp, 1), "Renderização (ms)": round(ren, 1)}
+                 for menu, imp, ren in primeiras],
+                use_container_width=True, hide_index=True,
+            )
+
+    if metricas.METRICAS_ARQUIVO:
+        st.caption(f"Cada medição também é gravada em `{metricas.METRICAS_ARQUIVO}` (uma linha JSON por medição).")
+    else:
+        st.caption("Defina REDEC_METRICAS_ARQUIVO para gravar as medições em arquivo.")
+
+
+# ============================================================
+# PERFIL (cProfile)
+# ============================================================
+
+def perfil():
+    st.markdown("### 🔬 Perfil de Execução")
+    st.caption("Ative e abra a página que deseja analisar: a próxima execução dela roda sob o cProfile.")
+
+    pedido = st.session_state.get(metricas.CHAVE_PERFIL, False)
+    if st.toggle("Perfilar a próxima execução", value=pedido, key="perfil_toggle") != pedido:
+        if pedido:
+            st.session_state.pop(metricas.CHAVE_PERFIL, None)
+        else:
+            metricas.perfilar_proxima_execucao()
+
+    resultado = st.session_state.get("perfil")
+    if not resultado:
+        return
+    st.download_button("Baixar perfil (.prof)", resultado["prof"], "redec.prof",
+                       "application/octet-stream", on_click="ignore")
+    st.caption("Abra com `python -m pstats redec.prof` ou snakeviz.")
+    with st.expander("Funções mais caras (tempo acumulado)"):
+        st.code(resultado["texto"], language=None)
@@ -1,2 +1,258 @@
+from datetime import date
 
+import pandas as pd
+import streamlit as st
 
+from services import estoque, fila
+from services.prefetch import prefetch
+from modulos.componentes import paginar, pendentes_fila, secao
+
+ABAS_CONTAINER = ["📊 Saldos", "🔄 Movimentar", "📜 Extrato", "🗂 Itens"]
+
+
+def tela_container():
+    st.subheader("📦 Contêiner Humanitário")
+
+    dados, erros = prefetch({"itens": estoque.buscar_itens, "lotes": estoque.buscar_lotes})
+    if erros:
+        st.error("Não foi possível carregar o estoque: " + "; ".join(str(e) for e in erros.values()))
+        return
+    itens, lotes = dados["itens"], dados["lotes"]
+
+    if fila.ativa():
+        pendentes_fila("estoque_movimentos", "movimento(s)")
+
+    aba = secao("aba_container", ABAS_CONTAINER)
+    if aba == "📊 Saldos":
+        painel_saldos(itens, lotes)
+    elif aba == "🔄 Movimentar":
+        movimentar(itens, lotes)
+    elif aba == "📜 Extrato":
+        extrato(itens)
+    else:
+        cadastro_itens(itens)
+
+
+def formatar_data(valor, vazio="Sem validade"):
+    return date.fromisoformat(valor).strftime("%d/%m/%Y") if valor else vazio
+
+
+def formatar_quantidade(valor, unidade=""):
+    valor = float(valor)
+    texto = f"{valor:,.0f}" if valor == int(valor) else f"{valor:,.2f}"
+    return f"{texto.replace(',', '.')} {unidade}".strip()
+
+
+# ============================================================
+# 1. SALDOS E ALERTAS
+# ============================================================
+
+def painel_saldos(itens, lotes):
+    por_item = estoque.lotes_por_item(lotes)
+    totais = estoque.saldos(lotes)
+    baixos = {i["id"] for i in estoque.abaixo_do_minimo(itens, lotes)}
+    vencendo = estoque.a_vencer(lotes)
+    hoje = str(date.today())
+
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Itens ativos", sum(1 for i in itens if i.get("ativo")))
+    c2.metric("Abaixo do mínimo", len(baixos))
+    c3.metric(f"Lotes a vencer ({estoque.DIAS_VENCIMENTO} dias)", sum(1 for l in vencendo if l["validade"] >= hoje))
+    c4.metric("Lotes vencidos", sum(1 for l in vencendo if l["validade"] < hoje))
+
+    if not itens:
+        st.info("Nenhum item cadastrado. Cadastre os itens na aba 🗂 Itens.")
+        return
+
+    ativos = [i for i in itens if i.get("ativo")]
+    st.dataframe(pd.DataFrame({
+        "Item": [i["nome"] for i in ativos],
+        "Categoria": [i.get("categoria") or "" for i in ativos],
+        "Saldo": [formatar_quantidade(totais.get(i["id"], 0), i["unidade"]) for i in ativos],
+        "Mínimo": [formatar_quantidade(i["estoque_minimo"] or 0, i["unidade"]) for i in ativos],
+        "Situação": ["🔴 Abaixo do mínimo" if i["id"] in baixos else "🟢 OK" for i in ativos],
+        "Lotes": [len(por_item.get(i["id"], [])) for i in ativos],
+        # Lotes já vêm em ordem FEFO: o primeiro é o próximo a sair
+        "Próxima validade": [formatar_data(por_item[i["id"]][0]["validade"]) if i["id"] in por_item else "—"
+                             for i in ativos],
+    }), use_container_width=True, hide_index=True)
+
+    if vencendo:
+        nomes = {i["id"]: i for i in itens}
+        st.markdown("#### ⏳ Lotes vencidos ou a vencer")
+        st.dataframe(pd.DataFrame({
+            "Item": [nomes[l["item_id"]]["nome"] for l in vencendo],
+            "Lote": [l["codigo"] or "—" for l in vencendo],
+            "Validade": [formatar_data(l["validade"]) for l in vencendo],
+            "Saldo": [formatar_quantidade(l["saldo"], nomes[l["item_id"]]["unidade"]) for l in vencendo],
+            "Situação": ["Vencido" if l["validade"] < hoje else "A vencer" for l in vencendo],
+        }), use_container_width=True, hide_index=True)
+
+
+# ============================================================
+# 2. ENTRADAS, SAÍDAS E TRANSFERÊNCIAS
+# ============================================================
+
+def registrar_movimento(destino, parametros, escrita, mensagem):
+    """
+    Com a fila ativa (REDEC_FILA), o movimento vai para o diário local e é enviado em
+    segundo plano (útil em campo, com a rede instável); senão, vai direto ao banco.
+    """
+    try:
+        if fila.ativa():
+            fila.enfileirar(destino, parametros)
+            st.toast(f"{mensagem} Envio em segundo plano.", icon="📤")
+        else:
+            escrita(parametros)
+            st.toast(mensagem, icon="✅")
+    except Exception as erro:
+        st.toast(f"Erro ao registrar: {erro}", icon="❌")
+    st.rerun(scope="app")
+
+
+@st.fragment
+def movimentar(itens, lotes):
+    """
+    Formulário de movimento. A saída mostra antes de confirmar quais lotes serão
+    consumidos (FEFO); o banco refaz a escolha com os lotes travados na transação.
+    Roda como fragmento: mudar item ou quantidade não refaz a tela inteira.
+    """
+    ativos = {i["id"]: i for i in itens if i.get("ativo")}
+    if not ativos:
+        st.info("Nenhum item ativo.")
+        return
+    por_item = estoque.lotes_por_item(lotes)
+
+    tipo = st.radio("Movimento", list(estoque.TIPOS_MOVIMENTO), format_func=estoque.TIPOS_MOVIMENTO.get,
+                    horizontal=True, key="estoque_tipo")
+    c1, c2 = st.columns([2, 1])
+    item_id = c1.selectbox("Item", list(ativos), format_func=lambda i: ativos[i]["nome"], key="estoque_item")
+    item = ativos[item_id]
+    quantidade = c2.number_input(f"Quantidade ({item['unidade']})", min_value=0.0, step=1.0, key="estoque_quantidade")
+    c3, c4 = st.columns(2)
+    documento = c3.text_input("Documento (nota, SEI, ofício)", key="estoque_documento")
+    observacao = c4.text_input("Observação", key="estoque_observacao")
+
+    if tipo == "entrada":
+        c5, c6 = st.columns(2)
+        codigo = c5.text_input("Lote", key="estoque_lote")
+        sem_validade = c6.checkbox("Sem validade", key="estoque_sem_validade")
+        validade = None if sem_validade else c6.date_input("Validade", format="DD/MM/YYYY", key="estoque_validade")
+        if st.button("Registrar entrada", type="primary", disabled=quantidade <= 0, use_container_width=True):
+            registrar_movimento(
+                "entrada_estoque",
+                estoque.parametros_entrada(item_id, quantidade, codigo, validade, documento, observacao),
+                estoque.registrar_entrada,
+                f"Entrada de {formatar_quantidade(quantidade, item['unidade'])} de {item['nome']} registrada!",
+            )
+        return
+
+    municipio = st.text_input("Município de destino", key="estoque_municipio") if tipo == "transferencia" else None
+    plano, falta = estoque.plano_fefo(por_item.get(item_id, []), quantidade)
+    if quantidade > 0:
+        st.caption("Lotes que serão consumidos (primeiro a vencer, primeiro a sair):")
+        st.dataframe(pd.DataFrame({
+            "Lote": [l["codigo"] or "—" for l, _ in plano],
+            "Validade": [formatar_data(l["validade"]) for l, _ in plano],
+            "Retirar": [formatar_quantidade(q, item["unidade"]) for _, q in plano],
+        }), use_container_width=True, hide_index=True)
+    if falta:
+        st.error(f"Saldo insuficiente: faltam {formatar_quantidade(falta, item['unidade'])}.")
+
+    rotulo = "Registrar transferência" if tipo == "transferencia" else "Registrar saída"
+    bloqueado = quantidade <= 0 or falta > 0 or (tipo == "transferencia" and not municipio)
+    if st.button(rotulo, type="primary", disabled=bloqueado, use_container_width=True):
+        registrar_movimento(
+            "saida_estoque",
+            estoque.parametros_saida(item_id, quantidade, tipo, municipio, documento, observacao),
+            estoque.registrar_saida,
+            f"{estoque.TIPOS_MOVIMENTO[tipo]} de {formatar_quantidade(quantidade, item['unidade'])} "
+            f"de {item['nome']} registrada!",
+        )
+
+
+# ============================================================
+# 3. EXTRATO (LIVRO-RAZÃO PAGINADO)
+# ============================================================
+
+def extrato(itens):
+    nomes = {i["id"]: i["nome"] for i in itens}
+    c1, c2 = st.columns(2)
+    item_id = c1.selectbox("Item", [None] + list(nomes), format_func=lambda i: nomes.get(i, "Todos"),
+                           key="extrato_item")
+    tipo = c2.selectbox("Tipo", [None] + list(estoque.TIPOS_MOVIMENTO),
+                        format_func=lambda t: estoque.TIPOS_MOVIMENTO.get(t, "Todos"), key="extrato_tipo")
+
+    movimentos = paginar("estoque_extrato", estoque.buscar_movimentos_pagina, item_id=item_id, tipo=tipo)
+    if not movimentos:
+        st.info("Nenhum movimento registrado.")
+        return
+    st.dataframe(pd.DataFrame({
+        "Data": pd.to_datetime([m["criado_em"] for m in movimentos], format="ISO8601").strftime("%d/%m/%Y %H:%M"),
+        "Movimento": [estoque.TIPOS_MOVIMENTO[m["tipo"]] for m in movimentos],
+        "Item": [(m.get("estoque_itens") or {}).get("nome", "") for m in movimentos],
+        "Lote": [(m.get("estoque_lotes") or {}).get("codigo") or "—" for m in movimentos],
+        "Quantidade": [
+            ("+" if m["tipo"] == "entrada" else "−")
+            + formatar_quantidade(m["quantidade"], (m.get("estoque_itens") or {}).get("unidade", ""))
+            for m in movimentos
+        ],
+        "Município": [m.get("municipio") or "" for m in movimentos],
+        "Documento": [m.get("documento") or "" for m in movimentos],
+        "Observação": [m.get("observacao") or "" for m in movimentos],
+    }), use_container_width=True, hide_index=True)
+
+
+# ============================================================
+# 4. CADASTRO DE ITENS
+# ============================================================
+
+def cadastro_itens(itens):
+    with st.form("novo_item_estoque", clear_on_submit=True):
+        st.markdown("#### Novo item")
+        c1, c2, c3, c4 = st.columns([3, 1, 2, 1])
+        nome = c1.text_input("Nome")
+        unidade = c2.text_input("Unidade", value="un")
+        categoria = c3.text_input("Categoria")
+        minimo = c4.number_input("Estoque mínimo", min_value=0.0, step=1.0)
+        if st.form_submit_button("Cadastrar item", type="primary"):
+            if not nome.strip():
+                st.error("Informe o nome do item.")
+            else:
+                try:
+                    estoque.inserir_item({"nome": nome.strip().upper(), "unidade": unidade.strip() or "un",
+                                          "categoria": categoria.strip() or None, "estoque_minimo": minimo})
+                    st.toast("Item cadastrado!", icon="✅")
+                    st.rerun()
+                except Exception as erro:
+                    st.error(f"Erro ao cadastrar: {erro}")
+
+    if itens:
+        st.markdown("#### Estoque mínimo e situação")
+        editado = st.data_editor(
+            pd.DataFrame({
+                "id": [i["id"] for i in itens],
+                "Item": [i["nome"] for i in itens],
+                "Estoque mínimo": [float(i["estoque_minimo"] or 0) for i in itens],
+                "Ativo": [bool(i.get("ativo")) for i in itens],
+            }),
+            column_config={"id": None}, disabled=["Item"], hide_index=True, use_container_width=True,
+            key="estoque_itens_editor",
+        )
+        alterados = [
+            (linha["id"], {"estoque_minimo": linha["Estoque mínimo"], "ativo": linha["Ativo"]})
+            for linha, item in zip(editado.to_dict("records"), itens)
+            if linha["Estoque mínimo"] != float(item["estoque_minimo"] or 0) or linha["Ativo"] != bool(item.get("ativo"))
+        ]
+        if alterados and st.button(f"Salvar {len(alterados)} alteração(ões)", type="primary"):
+            for id_, dados in alterados:
+                estoque.atualizar_item(id_, dados)
+            st.toast("Itens atualizados!", icon="✅")
+            st.rerun()
+
+    st.divider()
+    st.caption("Os saldos são mantidos pelo banco a cada movimento. A conferência refaz todos a partir do livro-razão.")
+    if st.button("Conferir saldos com o livro-razão"):
+        with st.spinner("Conferindo..."):
+            divergentes = estoque.conferir_saldos()
+        st.toast(f"Conferência concluída: {divergentes} lote(s) corrigido(s).", icon="✅")
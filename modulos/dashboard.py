@@ -0,0 +1,70 @@
+import streamlit as st
+
+from services.prefetch import prefetch
+from services.contadores import buscar_contadores
+from services.historico import buscar_ocupantes_atuais
+
+# Esta tela abre o sistema: nada aqui (nem nos serviços acima) importa o pandas
+
+
+# ================== FUNÇÃO CARD ================== #
+def card(titulo, valor, icone, cor, destino):
+    col = st.container()
+    with col:
+        st.markdown(f"""
+        <div style="background:{cor};
+                    padding:18px;
+                    border-radius:14px;
+                    color:white;
+                    box-shadow:0 4px 10px rgba(0,0,0,.15);
+                    text-align:center;">
+            <h4>{icone} {titulo}</h4>
+            <h2>{valor}</h2>
+        </div>
+        """, unsafe_allow_html=True)
+
+        if st.button(f"Abrir {titulo}", key=destino):
+            st.session_state["menu"] = destino
+            st.rerun()
+
+
+# ================== DASHBOARD ================== #
+def tela_dashboard():
+    # Em paralelo: os contadores (uma consulta agregada, sem baixar tabelas)
+    # e os ocupantes atuais, deixando o Painel da Equipe já em cache
+    dados, erros = prefetch({"contadores": buscar_contadores, "ocupantes": buscar_ocupantes_atuais})
+    contadores = dados.get("contadores", {})
+
+    # Módulos ainda sem tabela no banco aparecem como "—"
+    def contador(chave, sufixo):
+        return f"{contadores[chave]} {sufixo}" if chave in contadores else "—"
+
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        card("Monitoramento dos Rios", contador("rios_atencao", "em atenção"), "🌊", "#2E8B57", "🌊 Monitoramento de Rios")
+
+    with col2:
+        card("Boletins", contador("boletins_pendentes", "pendentes"), "📄", "#1E5AA8", "📄 Boletins")
+
+    with col3:
+        card("Equipe REDEC 10", contador("membros_ativos", "membros"), "👥", "#D97925", "👥 Equipe REDEC 10")
+
+    with col4:
+        card("COMDECs", contador("comdecs", "municípios"), "⚠️", "#C0392B", "🏛 Municípios COMDECs")
+
+    st.divider()
+
+    col5, col6, col7, col8 = st.columns(4)
+
+    with col5:
+        card("Agenda", contador("atividades", "atividades"), "📅", "#34495E", "📅 Agenda de Atividades")
+
+    with col6:
+        card("Contêiner", contador("itens_estoque_baixo", "abaixo do mínimo"), "📦", "#5D6D7E", "📦 Contêiner Humanitário")
+
+    with col7:
+        card("Viaturas", contador("viaturas_disponiveis", "disponíveis"), "🚑", "#273746", "🚑 Controle de Viaturas")
+
+    with col8:
+        card("Patrimônio", contador("bens_patrimoniais", "itens"), "🏗", "#7D3C98", "🏗 Bens Patrimoniais")
@@ -1,16 +1,27 @@
+from datetime import date, timedelta
+
 import streamlit as st
+import numpy as np
 import pandas as pd
-import re
+import altair as alt
 
 from services.supabase import (
-    buscar_equipe,
     inserir_membro,
     atualizar_membro,
     excluir_membro
 )
 
-from services.ferias import buscar_ferias, inserir_ferias
-from services.historico import buscar_historico, trocar_funcao
+from services.ferias import buscar_ferias_pagina, inserir_ferias
+from services.historico import (
+    FUNCAO_COM_SUCESSAO_ESTRITA, FUNCOES_REDEC, buscar_historico_pagina, parametros_troca, trocar_funcao
+)
+from services import fila
+from services.metricas import cronometro
+from modulos.componentes import paginar
+from services.snapshot import Snapshot
+from services.disponibilidade import Disponibilidade
+from services import importacao
+from services.exportacao import FORMATOS, exportar, ficha_funcional
 
 # ============================================================
 # CONFIGURAÇÕES E CONSTANTES - HIERARQUIA MILITAR
@@ -31,91 +42,306 @@ HIERARQUIA_MILITAR = {
     "SD BM": 13
 }
 
+TIPOS_AFASTAMENTO = ["Férias", "Licença Médica", "Licença Prêmio", "Outros"]
+
+# Posto como categoria ordenada: a ordenação segue a hierarquia e postos
+# desconhecidos (fora da tabela) ficam por último, como o antigo peso 99
+POSTO_DTYPE = pd.CategoricalDtype(list(HIERARQUIA_MILITAR.keys()), ordered=True)
+
+# ============================================================
+# PREPARAÇÃO DOS DADOS (VETORIZADA)
+# ============================================================
+
+def achatar_equipe(df):
+    """
+    Extrai posto_graduacao e nome do dicionário aninhado `equipe` em colunas planas,
+    em uma única passada sobre a coluna (sem apply por linha).
+    """
+    df = df.copy()
+    eq = df["equipe"] if "equipe" in df else pd.Series(None, index=df.index, dtype=object)
+    df["vinculado"] = eq.notna()
+    df["posto"] = eq.str.get("posto_graduacao").fillna("").astype(str)
+    df["nome_militar"] = eq.str.get("nome").fillna("").astype(str)
+    return df
+
+
+def converter_datas(serie):
+    """Converte uma coluna de datas ISO de uma vez só; vazios viram NaT."""
+    return pd.to_datetime(serie.replace("", None), format="ISO8601", errors="coerce")
+
+
+def formatar_datas(datas, vazio):
+    """
+    Formata datas como dd/mm/aaaa, usando `vazio` para NaT.
+    Cada data distinta é formatada uma única vez (o histórico repete muito as mesmas datas).
+    """
+    codigos, unicas = pd.factorize(datas)
+    textos = np.append(unicas.strftime("%d/%m/%Y").to_numpy(dtype=object), vazio)
+    return pd.Series(textos[codigos], index=datas.index)
+
+
+def ordenar_por_hierarquia(equipe):
+    """Lista de servidores ordenada por posto (hierarquia) e nome."""
+    df = pd.DataFrame(equipe)
+    df["posto_ord"] = df["posto_graduacao"].astype(POSTO_DTYPE)
+    return df.sort_values(["posto_ord", "nome"], na_position="last").drop(columns="posto_ord")
+
+
+def montar_cards(ocupantes):
+    """
+    Agrupa os ocupantes atuais por função, ordenados por hierarquia e nome.
+    Retorna {funcao: ["POSTO NOME", ...]} para todos os cargos de FUNCOES_REDEC.
+    """
+    cards = {cargo: [] for cargo in FUNCOES_REDEC}
+    df = pd.DataFrame(ocupantes)
+    if df.empty:
+        return cards
+
+    df = achatar_equipe(df[df["funcao"].isin(FUNCOES_REDEC)])
+    df["data_entrada"] = converter_datas(df["data_entrada"])
+
+    # Se houver mais de um Coordenador "ativo" por erro de sistema, prioriza o que entrou por último
+    df = df.sort_values("data_entrada", ascending=False)
+    df = df[~((df["funcao"] == FUNCAO_COM_SUCESSAO_ESTRITA) & df.duplicated("funcao"))]
+
+    # Normalização e Hierarquia
+    posto = df["posto"].str.replace("\u00a0", " ").str.replace(r"\s+", " ", regex=True).str.strip().str.upper()
+    nome = df["nome_militar"].str.strip().str.upper()
+    df = df.assign(
+        posto_ord=posto.astype(POSTO_DTYPE),
+        nome_c=nome,
+        rotulo=(posto + " " + nome).str.strip(),
+    ).sort_values(["posto_ord", "nome_c"], na_position="last")
+
+    cards.update(df.groupby("funcao", sort=False)["rotulo"].agg(list).to_dict())
+    return cards
+
+
+def tabela_historico(historico):
+    """Monta a tabela de ocupação para exibição: ativos primeiro, depois início mais recente."""
+    df = achatar_equipe(pd.DataFrame(historico))
+    entrada = converter_datas(df["data_entrada"])
+    saida = converter_datas(df["data_saida"])
+
+    militar = (df["posto"] + " " + df["nome_militar"]).str.strip().where(df["vinculado"], "Militar Excluído")
+    df_view = pd.DataFrame({
+        "Servidor": militar,
+        "Função": df["funcao"],
+        "Início": formatar_datas(entrada, ""),
+        "Término": formatar_datas(saida, "Ativo"),
+        "_ativo": saida.isna(),
+        "_entrada": entrada,
+    })
+    df_view = df_view.sort_values(["_ativo", "_entrada"], ascending=[False, False])
+    return df_view.drop(columns=["_ativo", "_entrada"])
+
+
 # ============================================================
 # TELA PRINCIPAL
 # ============================================================
 
+ABAS_EQUIPE = [
+    "🧭 Painel da Equipe",
+    "➕ Cadastro & Gestão",
+    "🔁 Funções & Substituições",
+    "🏖 Férias / Licenças",
+    "📊 Relatórios"
+]
+
 def tela_equipe():
     st.subheader("👥 Gestão da Equipe - REDEC 10")
 
-    abas = st.tabs([
-        "🧭 Painel da Equipe",
-        "➕ Cadastro & Gestão",
-        "🔁 Funções & Substituições",
-        "🏖 Férias / Licenças",
-        "📊 Relatórios"
-    ])
+    # Seção selecionada guardada na sessão (como o "menu" em app.py), para
+    # sobreviver à troca de página. Diferente de st.tabs, só a seção visível
+    # é renderizada e busca dados.
+    if st.session_state.get("aba_equipe") not in ABAS_EQUIPE:
+        st.session_state["aba_equipe"] = ABAS_EQUIPE[0]
+    if "aba_equipe_radio" not in st.session_state:
+        st.session_state["aba_equipe_radio"] = st.session_state["aba_equipe"]
+
+    aba_atual = st.radio(
+        "Seção", ABAS_EQUIPE, key="aba_equipe_radio",
+        horizontal=True, label_visibility="collapsed"
+    )
+    st.session_state["aba_equipe"] = aba_atual
+
+    # Renderizador de cada seção e as tabelas que ela usa
+    renderizadores = {
+        "🧭 Painel da Equipe": (painel_equipe, ["ocupantes", "equipe"]),
+        "➕ Cadastro & Gestão": (cadastro_gestao, ["equipe"]),
+        "🔁 Funções & Substituições": (funcoes_substituicoes, ["equipe", "coordenadores", "indice"]),
+        "🏖 Férias / Licenças": (ferias_licencas, ["equipe"]),
+        "📊 Relatórios": (relatorios, ["equipe", "ocupantes"]),
+    }
+    renderizar, tabelas = renderizadores[aba_atual]
+
+    # Dados carregados uma única vez por rerun, com as consultas da seção em paralelo
+    dados = Snapshot.da_sessao().carregar(*tabelas)
+    for tabela, erro in dados.erros.items():
+        st.warning(f"Falha ao carregar {tabela}: {erro}")
+
+    if fila.ativa():
+        situacao_fila()
+
+    with cronometro(aba_atual):
+        renderizar(st.container(), dados)
+
+    st.caption(
+        f"🔌 {dados.chamadas_remotas} consultas ao Supabase "
+        f"({dados.chamadas_economizadas} reaproveitadas nesta execução)"
+    )
+
+
+# ============================================================
+# PAGINAÇÃO (CURSOR / KEYSET)
+# ============================================================
+
+def intervalo(periodo):
+    """Converte o valor de um st.date_input de intervalo em filtros desde/ate."""
+    periodo = tuple(periodo)
+    return {
+        "desde": periodo[0] if len(periodo) > 0 else None,
+        "ate": periodo[1] if len(periodo) > 1 else None,
+    }
+
+
+def tabela_ferias(registros):
+    """Afastamentos para exibição, com o servidor extraído do equipe(...) embutido."""
+    df = achatar_equipe(pd.DataFrame(registros))
+    return pd.DataFrame({
+        "Servidor": (df["posto"] + " " + df["nome_militar"]).str.strip().where(df["vinculado"], "Militar Excluído"),
+        "Tipo": df["tipo"],
+        "Início": formatar_datas(converter_datas(df["inicio"]), ""),
+        "Fim": formatar_datas(converter_datas(df["fim"]), ""),
+        "Observação": df["observacao"].fillna(""),
+    })
+
 
-    painel_equipe(abas[0])
-    cadastro_gestao(abas[1])
-    funcoes_substituicoes(abas[2])
-    ferias_licencas(abas[3])
-    relatorios(abas[4])
+# ============================================================
+# ESCRITAS (ATUALIZAÇÃO OTIMISTA)
+# ============================================================
+
+def executar_escrita(dados, escrita, aplicar, mensagem):
+    """
+    Executa a escrita no Supabase e aplica no snapshot a(s) linha(s) devolvida(s),
+    que é mantido para o rerun seguinte: a tela responde sem rebuscar as tabelas.
+    Se a escrita falhar ou não devolver linha (ex.: registro removido por outro
+    operador), os dados são recarregados do banco.
+    """
+    try:
+        linhas = escrita().data
+    except Exception as erro:
+        linhas = None
+        st.toast(f"Erro ao salvar: {erro}", icon="❌")
+
+    if linhas:
+        for linha in linhas:
+            aplicar(linha)
+        dados.manter_na_sessao()
+        st.toast(mensagem, icon="✅")
+    else:
+        if linhas is not None:
+            st.toast("O registro foi alterado por outro operador. Dados recarregados.", icon="⚠️")
+        dados.recarregar()
+
+    st.rerun()
+
+
+def registrar(dados, destino, registro, escrita, aplicar, mensagem):
+    """
+    Inserções dos formulários. Com a fila ativa (REDEC_FILA), o registro vai para o
+    diário local e a tela responde sem esperar a rede; o envio é feito em segundo plano.
+    Sem a fila, equivale a executar_escrita(dados, lambda: escrita(registro), ...).
+    """
+    if not fila.ativa():
+        executar_escrita(dados, lambda: escrita(registro), aplicar, mensagem)
+        return
+    try:
+        fila.enfileirar(destino, registro)
+        st.toast(f"{mensagem} Envio em segundo plano.", icon="📤")
+    except Exception as erro:
+        st.toast(f"Erro ao registrar: {erro}", icon="❌")
+    st.rerun()
+
+
+@st.fragment
+def importar_planilha(dados, destino, validar):
+    """
+    Importação em lote: valida a planilha inteira de uma vez, mostra os erros por
+    linha e grava só as linhas válidas, em lotes. No fim, um único recarregamento.
+    Roda como fragmento: enviar e revisar o arquivo não refaz a tela inteira.
+    """
+    st.download_button("Baixar modelo", importacao.modelo_csv(destino), f"modelo_{destino}.csv",
+                       "text/csv", key=f"modelo_{destino}", on_click="ignore")
+    arquivo = st.file_uploader("Planilha", type=["csv", "xlsx"], key=f"importar_{destino}")
+    if arquivo is None:
+        return
+
+    try:
+        registros, erros = validar(importacao.ler_planilha(arquivo, arquivo.name))
+    except Exception as erro:
+        st.error(f"Não foi possível ler a planilha: {erro}")
+        return
+
+    c1, c2 = st.columns(2)
+    c1.metric("Linhas válidas", len(registros))
+    c2.metric("Linhas com erro", erros["Linha"].nunique())
+    if not erros.empty:
+        st.dataframe(erros, use_container_width=True, hide_index=True)
+
+    if registros and st.button(f"Importar {len(registros)} registro(s) válido(s)", key=f"confirmar_{destino}", type="primary"):
+        with st.spinner("Gravando..."):
+            gravados, falhas = importacao.importar(destino, registros)
+        if falhas:
+            st.session_state[f"falhas_{destino}"] = falhas
+        repetidos = len(registros) - gravados - len(falhas)
+        st.toast(f"{gravados} registro(s) importado(s)."
+                 + (f" {repetidos} já existia(m) e foi(ram) ignorado(s)." if repetidos else ""), icon="✅")
+        dados.recarregar()
+        st.rerun(scope="app")
+
+    falhas = st.session_state.pop(f"falhas_{destino}", None)
+    if falhas:
+        st.error("Linhas recusadas pelo banco:")
+        st.dataframe(pd.DataFrame(falhas, columns=["Linha", "Erro"]), use_container_width=True, hide_index=True)
+
+
+@st.fragment(run_every=10)
+def situacao_fila():
+    """Registros ainda não enviados ao Supabase; atualiza sozinho a cada 10 s."""
+    pendentes = fila.situacao()
+    if not pendentes:
+        return
+    falhas = [p for p in pendentes if p["situacao"] == "falhou"]
+    titulo = f"📤 {len(pendentes)} registro(s) aguardando envio"
+    if falhas:
+        titulo += f" — {len(falhas)} com falha"
+    with st.expander(titulo, expanded=bool(falhas)):
+        st.dataframe(pd.DataFrame({
+            "Destino": [p["destino"] for p in pendentes],
+            "Registrado em": pd.to_datetime([p["criado_em"] for p in pendentes], unit="s").strftime("%d/%m/%Y %H:%M"),
+            "Situação": [p["situacao"] for p in pendentes],
+            "Tentativas": [p["tentativas"] for p in pendentes],
+            "Último erro": [p["erro"] or "" for p in pendentes],
+        }), use_container_width=True, hide_index=True)
+        if falhas:
+            c1, c2 = st.columns(2)
+            c1.button("Tentar novamente", on_click=fila.tentar_novamente, use_container_width=True)
+            descartar = c2.selectbox("Descartar registro com falha", [p["chave"] for p in falhas],
+                                     format_func=lambda c: next(f"{p['destino']} ({p['erro']})" for p in falhas if p["chave"] == c))
+            c2.button("Descartar", on_click=fila.descartar, args=(descartar,), use_container_width=True)
 
 
 # ============================================================
 # 1. PAINEL PRINCIPAL (CARDS COM HIERARQUIA)
 # ============================================================
 
-def painel_equipe(aba):
+def painel_equipe(aba, dados):
     with aba:
         st.markdown("### 🧭 Composição Atual da REDEC 10")
 
-        historico_data = buscar_historico()
-
-        if not historico_data:
-            st.info("Nenhuma função registrada no histórico.")
-            return
-
-        # 1. Preparação dos Dados
-        df_raw = pd.DataFrame(historico_data)
-        
-        # Converter datas para garantir ordenação correta
-        df_raw["data_entrada"] = pd.to_datetime(df_raw["data_entrada"])
-        
-        # FILTRO DE ATIVOS: data_saida nula ou vazia
-        df_atual = df_raw[df_raw["data_saida"].apply(
-            lambda x: x is None or str(x).lower() == 'none' or str(x).strip() == ''
-        )].copy()
-
-        def extrair_campo(row, campo):
-            eq = row.get("equipe", {})
-            if isinstance(eq, dict):
-                return str(eq.get(campo, "")).strip().upper()
-            return ""
-
-        # 2. Processamento para os Cards
-        cargos_cards = {
-            "Coordenador": [],
-            "Subcoordenador": [],
-            "Oficial Administrativo": [],
-            "Praça Administrativo": []
-        }
-
-        for cargo in cargos_cards.keys():
-            sub = df_atual[df_atual["funcao"] == cargo].copy()
-
-            if not sub.empty:
-                # LÓGICA ESPECIAL PARA COORDENADOR: 
-                # Se houver mais de um "ativo" por erro de sistema, prioriza o que entrou por último
-                if cargo == "Coordenador":
-                    sub = sub.sort_values(by="data_entrada", ascending=False).head(1)
-                
-                # Normalização e Hierarquia
-                sub["posto_c"] = sub.apply(lambda x: extrair_campo(x, "posto_graduacao"), axis=1)
-                sub["nome_c"] = sub.apply(lambda x: extrair_campo(x, "nome"), axis=1)
-                
-                sub["posto_norm"] = sub["posto_c"].apply(
-                    lambda t: re.sub(r"\s+", " ", str(t).replace("\u00a0", " ")).strip()
-                )
-                
-                sub["peso"] = sub["posto_norm"].apply(lambda x: HIERARQUIA_MILITAR.get(x, 99))
-                sub = sub.sort_values(by=["peso", "nome_c"])
-
-                cargos_cards[cargo] = [
-                    f"{row['posto_c']} {row['nome_c']}".strip() 
-                    for _, row in sub.iterrows()
-                ]
+        # 1. Cards montados a partir dos mandatos em aberto, já filtrados no banco
+        cargos_cards = montar_cards(dados.ocupantes)
 
         # 3. Renderização Visual (Cards)
         col1, col2, col3, col4 = st.columns(4)
@@ -143,39 +369,42 @@ def painel_equipe(aba):
 
         st.divider()
 
-        # 4. Tabela de Histórico (Geral)
+        # 4. Tabela de Histórico (Geral), paginada e filtrada no banco
         st.subheader("📜 Histórico de Ocupação e Trocas")
-        if not df_raw.empty:
-            df_hist = df_raw.copy()
-            
-            # Extração de nomes para a listagem
-            df_hist["Militar"] = df_hist["equipe"].apply(
-                lambda x: f"{x.get('posto_graduacao', '')} {x.get('nome', '')}".strip() if isinstance(x, dict) else "Militar Excluído"
-            )
-            
-            # Formatação para exibição
-            df_view = df_hist[["Militar", "funcao", "data_entrada", "data_saida"]].copy()
-            df_view["data_entrada"] = df_view["data_entrada"].dt.strftime('%d/%m/%Y')
-            df_view["data_saida"] = df_view["data_saida"].apply(
-                lambda x: pd.to_datetime(x).strftime('%d/%m/%Y') if pd.notnull(x) and str(x).strip() != '' else "Ativo"
-            )
-            
-            df_view.columns = ["Servidor", "Função", "Início", "Término"]
-            
-            # Ordenação: Ativos primeiro, depois por data de início mais recente
-            st.dataframe(
-                df_view.sort_values(by=["Término", "Início"], ascending=[True, False]), 
-                use_container_width=True, 
-                hide_index=True
-            )
+        militares = {f"{m['posto_graduacao']} {m['nome']}": m["id"] for m in dados.equipe}
+
+        col_f1, col_f2, col_f3 = st.columns(3)
+        funcao = col_f1.selectbox("Função", ["Todas"] + FUNCOES_REDEC, key="hist_funcao")
+        militar = col_f2.selectbox("Militar", ["Todos"] + list(militares), key="hist_militar")
+        periodo = col_f3.date_input("Início entre", value=(), key="hist_periodo")
+
+        historico_data = paginar(
+            "pag_historico", buscar_historico_pagina,
+            funcao=None if funcao == "Todas" else funcao,
+            equipe_id=militares.get(militar),
+            **intervalo(periodo)
+        )
+
+        if not historico_data:
+            st.info("Nenhuma função registrada no histórico.")
+            return
+
+        st.dataframe(
+            tabela_historico(historico_data),
+            use_container_width=True,
+            hide_index=True
+        )
 
 
 # ============================================================
 # 2. CADASTRO & GESTÃO
 # ============================================================
 
-def cadastro_gestao(aba):
+def cadastro_gestao(aba, dados):
     with aba:
+        # Carregada antes do formulário para que o cadastro seja aplicado nela sem nova busca
+        equipe = dados.equipe
+
         st.markdown("### 👤 Cadastro de Novo Servidor")
         with st.form("novo_membro"):
             nome = st.text_input("Nome completo")
@@ -188,93 +417,80 @@ def cadastro_gestao(aba):
             salvar = st.form_submit_button("Cadastrar Servidor")
 
         if salvar and nome:
-            inserir_membro({
+            registrar(dados, "equipe", {
                 "nome": nome.strip().upper(),
                 "nome_guerra": nome_guerra.strip().upper(),
                 "rg": rg, "id_funcional": id_funcional, "posto_graduacao": posto,
                 "quadro_qbmp": quadro.upper(), "telefone": telefone, "ativo": True
-            })
-            st.success("Servidor cadastrado!")
-            st.rerun()
+            }, inserir_membro, dados.aplicar_membro, "Servidor cadastrado!")
+
+        with st.expander("📥 Importar servidores de planilha (CSV/XLSX)"):
+            importar_planilha(dados, "equipe", lambda df: importacao.validar_equipe(df, list(HIERARQUIA_MILITAR), dados.equipe))
 
         st.divider()
         st.markdown("### 📋 Listagem Geral")
-        equipe = buscar_equipe()
         if equipe:
-            df_lista = pd.DataFrame(equipe)
-            df_lista["peso"] = df_lista["posto_graduacao"].apply(lambda x: HIERARQUIA_MILITAR.get(x, 99))
-            df_lista = df_lista.sort_values(by=["peso", "nome"])
-            
+            df_lista = ordenar_por_hierarquia(equipe)
             st.dataframe(df_lista[["posto_graduacao", "nome", "ativo", "telefone"]], use_container_width=True, hide_index=True)
 
             st.divider()
-            st.markdown("### ✏️ Editar / Desativar Servidor")
-            opcoes_edicao = {f"{r['posto_graduacao']} {r['nome']} ({'ATIVO' if r['ativo'] else 'INATIVO'})": r for _, r in df_lista.iterrows()}
-            selecionado_label = st.selectbox("Selecione para editar", list(opcoes_edicao.keys()))
-            registro = opcoes_edicao[selecionado_label]
-
-            with st.expander(f"Editar dados de {registro['nome']}"):
-                col1, col2 = st.columns(2)
-                with col1:
-                    nome_edit = st.text_input("Nome", registro["nome"])
-                    idx_p = list(HIERARQUIA_MILITAR.keys()).index(registro["posto_graduacao"]) if registro["posto_graduacao"] in HIERARQUIA_MILITAR else 0
-                    posto_edit = st.selectbox("Posto", list(HIERARQUIA_MILITAR.keys()), index=idx_p, key="ed_posto")
-                with col2:
-                    quadro_edit = st.text_input("Quadro", registro["quadro_qbmp"])
-                    tel_edit = st.text_input("Telefone", registro["telefone"])
-                
-                ativo_edit = st.checkbox("Membro Ativo (Aparece em seleções)", value=bool(registro["ativo"]))
-
-                c1, c2 = st.columns(2)
-                if c1.button("Salvar Alterações", use_container_width=True):
-                    atualizar_membro(registro["id"], {
-                        "nome": nome_edit.upper(), "posto_graduacao": posto_edit,
-                        "quadro_qbmp": quadro_edit.upper(), "telefone": tel_edit,
-                        "ativo": ativo_edit
-                    })
-                    st.success("Atualizado!")
-                    st.rerun()
-                
-                if c2.button("Excluir Definitivamente", use_container_width=True, type="secondary"):
-                    excluir_membro(registro["id"])
-                    st.rerun()
+            editar_servidor(dados)
+
+
+@st.fragment
+def editar_servidor(dados):
+    """
+    Seleção e edição de um servidor.
+    Roda como fragmento: trocar a seleção re-renderiza apenas este bloco,
+    reaproveitando os dados já carregados no snapshot.
+    """
+    st.markdown("### ✏️ Editar / Desativar Servidor")
+    df_lista = ordenar_por_hierarquia(dados.equipe)
+    opcoes_edicao = {f"{r['posto_graduacao']} {r['nome']} ({'ATIVO' if r['ativo'] else 'INATIVO'})": r for r in df_lista.to_dict("records")}
+    selecionado_label = st.selectbox("Selecione para editar", list(opcoes_edicao.keys()))
+    registro = opcoes_edicao[selecionado_label]
+
+    with st.expander(f"Editar dados de {registro['nome']}"):
+        col1, col2 = st.columns(2)
+        with col1:
+            nome_edit = st.text_input("Nome", registro["nome"])
+            idx_p = list(HIERARQUIA_MILITAR.keys()).index(registro["posto_graduacao"]) if registro["posto_graduacao"] in HIERARQUIA_MILITAR else 0
+            posto_edit = st.selectbox("Posto", list(HIERARQUIA_MILITAR.keys()), index=idx_p, key="ed_posto")
+        with col2:
+            quadro_edit = st.text_input("Quadro", registro["quadro_qbmp"])
+            tel_edit = st.text_input("Telefone", registro["telefone"])
+
+        ativo_edit = st.checkbox("Membro Ativo (Aparece em seleções)", value=bool(registro["ativo"]))
+
+        c1, c2 = st.columns(2)
+        if c1.button("Salvar Alterações", use_container_width=True):
+            executar_escrita(dados, lambda: atualizar_membro(registro["id"], {
+                "nome": nome_edit.upper(), "posto_graduacao": posto_edit,
+                "quadro_qbmp": quadro_edit.upper(), "telefone": tel_edit,
+                "ativo": ativo_edit
+            }), dados.aplicar_membro, "Atualizado!")
+
+        if c2.button("Excluir Definitivamente", use_container_width=True, type="secondary"):
+            executar_escrita(dados, lambda: excluir_membro(registro["id"]), dados.remover_membro, "Servidor excluído!")
 
 # ============================================================
 # 3. FUNÇÕES & SUBSTITUIÇÕES (ORDEM: ATUAL -> ANTIGO)
 # ============================================================
 
-def funcoes_substituicoes(aba):
+def funcoes_substituicoes(aba, dados):
     with aba:
         st.markdown("### 🔁 Registro de Funções")
         
         # Busca dados atualizados
-        equipe = buscar_equipe()
-        historico_raw = buscar_historico()
+        equipe = dados.equipe
+        historico_raw = dados.coordenadores
         
         if not equipe:
             st.warning("Nenhum servidor cadastrado no sistema.")
             return
 
         # 1. Formulário de Registro (Membros Ativos)
-        ativos = [m for m in equipe if m.get("ativo") == True]
-        
-        if not ativos:
-            st.warning("Nenhum servidor ATIVO encontrado para novas funções.")
-        else:
-            nomes_id = {f"{m['posto_graduacao']} {m['nome']}": m["id"] for m in ativos}
-            
-            col_f1, col_f2, col_f3 = st.columns([1, 1, 0.8])
-            with col_f1:
-                funcao = st.selectbox("Função", ["Coordenador", "Subcoordenador", "Oficial Administrativo", "Praça Administrativo"])
-            with col_f2:
-                pessoa_label = st.selectbox("Servidor Ativo", list(nomes_id.keys()))
-            with col_f3:
-                data = st.date_input("Data de início")
-
-            if st.button("Confirmar Alteração de Função", use_container_width=True, type="primary"):
-                trocar_funcao(nomes_id[pessoa_label], funcao, data)
-                st.success(f"Registro de {funcao} atualizado!")
-                st.rerun()
+        registrar_funcao(dados)
 
         st.divider()
 
@@ -283,56 +499,155 @@ def funcoes_substituicoes(aba):
         # ============================================================
         st.markdown("### 🏛️ Histórico de Coordenadores")
         
-        if historico_raw:
-            df_hist = pd.DataFrame(historico_raw)
-            
-            # Filtra apenas Coordenadores
-            df_coord = df_hist[df_hist["funcao"] == "Coordenador"].copy()
-            
-            if not df_coord.empty:
-                # Extrair Posto e Nome
-                df_coord["Coordenador"] = df_coord["equipe"].apply(
-                    lambda x: f"{x.get('posto_graduacao', '')} {x.get('nome', '')}".strip() if isinstance(x, dict) else "Desconhecido"
-                )
-                
-                # Garantir que data_entrada seja datetime para ordenação precisa
-                df_coord["dt_entrada_sort"] = pd.to_datetime(df_coord["data_entrada"])
-                
-                # Criar as colunas de exibição formatadas
-                df_coord["Início do Mandato"] = df_coord["dt_entrada_sort"].dt.strftime('%d/%m/%Y')
-                
-                df_coord["Término"] = df_coord["data_saida"].apply(
-                    lambda x: pd.to_datetime(x).strftime('%d/%m/%Y') if pd.notnull(x) and str(x).strip() != '' else "🚩 ATUAL"
-                )
-                
-                # Selecionar colunas finais
-                df_exibicao = df_coord[["Coordenador", "Início do Mandato", "Término", "dt_entrada_sort"]]
-                
-                # ORDENAÇÃO: dt_entrada_sort em ordem decrescente (True para ascendente, False para decrescente)
-                # O Atual (data mais recente) aparecerá no topo.
-                df_exibicao = df_exibicao.sort_values(by="dt_entrada_sort", ascending=False)
-
-                # Removemos a coluna auxiliar de ordenação antes de mostrar ao usuário
-                df_final = df_exibicao.drop(columns=["dt_entrada_sort"])
-
-                st.dataframe(
-                    df_final,
-                    use_container_width=True,
-                    hide_index=True
-                )
-            else:
-                st.info("Nenhum histórico de Coordenador encontrado.")
+        # Apenas os mandatos de Coordenador, já filtrados no banco
+        df_coord = pd.DataFrame(historico_raw)
+
+        if not df_coord.empty:
+            # Extrair Posto e Nome, datas convertidas uma única vez
+            df_coord = achatar_equipe(df_coord)
+            entrada = converter_datas(df_coord["data_entrada"])
+            saida = converter_datas(df_coord["data_saida"])
+
+            df_final = pd.DataFrame({
+                "Coordenador": (df_coord["posto"] + " " + df_coord["nome_militar"]).str.strip().where(df_coord["vinculado"], "Desconhecido"),
+                "Início do Mandato": formatar_datas(entrada, ""),
+                "Término": formatar_datas(saida, "🚩 ATUAL"),
+            })
+
+            # ORDENAÇÃO decrescente por data de entrada: o Atual aparece no topo
+            df_final = df_final.assign(_entrada=entrada).sort_values("_entrada", ascending=False).drop(columns="_entrada")
+
+            st.dataframe(
+                df_final,
+                use_container_width=True,
+                hide_index=True
+            )
         else:
-            st.info("O histórico está vazio.")
+            st.info("Nenhum histórico de Coordenador encontrado.")
+
+        st.divider()
+        linha_do_tempo(dados)
+
+def rotulo_militar(registro):
+    """ "POSTO NOME" a partir do equipe(...) embutido no registro do histórico."""
+    membro = registro.get("equipe")
+    if not membro:
+        return "Militar Excluído"
+    return f"{membro.get('posto_graduacao') or ''} {membro.get('nome') or ''}".strip()
+
+def formatar_data(valor, vazio=""):
+    return valor.strftime("%d/%m/%Y") if valor else vazio
+
+MAX_MANDATOS_GRAFICO = 500
+MAX_SOBREPOSICOES_EXIBIDAS = 10
+
+@st.fragment
+def linha_do_tempo(dados):
+    """
+    Ocupação das funções ao longo do tempo, a partir do índice de intervalos:
+    quem ocupava cada cargo numa data, vacâncias e mandatos simultâneos.
+    Roda como fragmento: trocar a data consultada não refaz a tela inteira.
+    """
+    indice = dados.indice
+    st.markdown("### 🗓️ Linha do Tempo das Funções")
+
+    mandatos = indice.linha_do_tempo()
+    if not mandatos:
+        st.info("Nenhuma função registrada no histórico.")
+        return
+
+    # O gráfico vai inteiro para o navegador: só os mandatos mais recentes
+    total = len(mandatos)
+    if total > MAX_MANDATOS_GRAFICO:
+        mandatos = sorted(mandatos, key=lambda m: m["inicio"])[-MAX_MANDATOS_GRAFICO:]
+
+    df = pd.DataFrame({
+        "Função": [m["funcao"] for m in mandatos],
+        "Militar": [rotulo_militar(m["registro"]) for m in mandatos],
+        "Início": pd.to_datetime([m["inicio"] for m in mandatos]),
+        "Fim": pd.to_datetime([m["fim"] for m in mandatos]),
+        "Situação": ["Encerrado" if m["registro"].get("data_saida") else "Ativo" for m in mandatos],
+    })
+    grafico = alt.Chart(df).mark_bar().encode(
+        x=alt.X("Início:T", title=None),
+        x2="Fim:T",
+        y=alt.Y("Função:N", sort=FUNCOES_REDEC, title=None),
+        color=alt.Color("Militar:N", legend=None),
+        tooltip=["Militar", "Função", alt.Tooltip("Início:T", format="%d/%m/%Y"),
+                 alt.Tooltip("Fim:T", format="%d/%m/%Y"), "Situação"],
+    )
+    st.altair_chart(grafico, use_container_width=True)
+    if total > MAX_MANDATOS_GRAFICO:
+        st.caption(f"Exibindo os {MAX_MANDATOS_GRAFICO} mandatos mais recentes de {total}.")
+
+    consulta = st.date_input("Quem ocupava cada função em", value=date.today(), format="DD/MM/YYYY")
+    st.dataframe(pd.DataFrame({
+        "Função": FUNCOES_REDEC,
+        "Ocupante(s)": [", ".join(rotulo_militar(m) for m in indice.ocupantes(f, consulta)) or "Vago"
+                        for f in FUNCOES_REDEC],
+    }), use_container_width=True, hide_index=True)
+
+    vacancias = [(f, *v) for f in FUNCOES_REDEC for v in indice.vacancias(f)]
+    st.markdown("#### Vacâncias")
+    if vacancias:
+        st.dataframe(pd.DataFrame({
+            "Função": [v[0] for v in vacancias],
+            "Início": [formatar_data(v[1]) for v in vacancias],
+            "Fim": [formatar_data(v[2], "Em aberto") for v in vacancias],
+            "Dias": [v[3] for v in vacancias],
+        }), use_container_width=True, hide_index=True)
+    else:
+        st.caption("Nenhum período vago desde o primeiro registro de cada função.")
+
+    # Para a função de sucessão estrita, dois mandatos ao mesmo tempo são erro de cadastro.
+    # Um único aviso, com os períodos mais recentes, por maior que seja o histórico.
+    sobreposicoes = indice.sobreposicoes(FUNCAO_COM_SUCESSAO_ESTRITA)
+    if sobreposicoes:
+        recentes = sobreposicoes[-MAX_SOBREPOSICOES_EXIBIDAS:][::-1]
+        st.warning(
+            f"{FUNCAO_COM_SUCESSAO_ESTRITA}: {len(sobreposicoes)} período(s) com mandatos simultâneos.\n\n"
+            + "\n".join(
+                f"- {formatar_data(inicio)} a {formatar_data(fim, 'hoje')}: "
+                + ", ".join(rotulo_militar(m) for m in simultaneos)
+                for inicio, fim, simultaneos in recentes
+            )
+        )
+
+@st.fragment
+def registrar_funcao(dados):
+    """
+    Seletores de Função/Servidor/Data para a troca de função.
+    Roda como fragmento: mudar um seletor não refaz a tela inteira.
+    """
+    ativos = [m for m in dados.equipe if m.get("ativo") == True]
+
+    if not ativos:
+        st.warning("Nenhum servidor ATIVO encontrado para novas funções.")
+        return
+
+    nomes_id = {f"{m['posto_graduacao']} {m['nome']}": m["id"] for m in ativos}
+
+    col_f1, col_f2, col_f3 = st.columns([1, 1, 0.8])
+    with col_f1:
+        funcao = st.selectbox("Função", FUNCOES_REDEC)
+    with col_f2:
+        pessoa_label = st.selectbox("Servidor Ativo", list(nomes_id.keys()))
+    with col_f3:
+        data = st.date_input("Data de início")
+
+    if st.button("Confirmar Alteração de Função", use_container_width=True, type="primary"):
+        registrar(dados, "trocar_funcao", parametros_troca(nomes_id[pessoa_label], funcao, data),
+                  lambda _: trocar_funcao(nomes_id[pessoa_label], funcao, data),
+                  dados.aplicar_historico, f"Registro de {funcao} atualizado!")
 
 # ============================================================
 # 4. FÉRIAS / LICENÇAS
 # ============================================================
 
-def ferias_licencas(aba):
+def ferias_licencas(aba, dados):
     with aba:
         st.markdown("### 🏖 Controle de Férias / Licenças")
-        equipe = buscar_equipe()
+        equipe = dados.equipe
         if not equipe: return
 
         ativos = [m for m in equipe if m.get("ativo") == True]
@@ -345,40 +660,102 @@ def ferias_licencas(aba):
 
         with st.form("form_ferias"):
             pessoa_label = st.selectbox("Servidor Ativo", list(nomes_id.keys()))
-            tipo = st.selectbox("Tipo", ["Férias", "Licença Médica", "Licença Prêmio", "Outros"])
+            tipo = st.selectbox("Tipo", TIPOS_AFASTAMENTO)
             inicio = st.date_input("Data início")
             fim = st.date_input("Data fim")
             obs = st.text_area("Observação")
+            ignorar_conflitos = st.checkbox("Registrar mesmo com conflitos")
             salvar = st.form_submit_button("Registrar")
 
-        if salvar:
-            inserir_ferias({"equipe_id": nomes_id[pessoa_label], "tipo": tipo, "inicio": str(inicio), "fim": str(fim), "observacao": obs})
-            st.success("Afastamento salvo!")
-            st.rerun()
+        if salvar and fim < inicio:
+            st.error("A data fim não pode ser anterior à data início.")
+        elif salvar and not ignorar_conflitos and (conflitos := Disponibilidade(dados.indice, dados.ferias).conflitos(nomes_id[pessoa_label], inicio, fim)):
+            for aviso in conflitos:
+                st.warning(aviso)
+            st.info("Revise o período ou marque \"Registrar mesmo com conflitos\".")
+        elif salvar:
+            registrar(dados, "ferias_licencas", {"equipe_id": nomes_id[pessoa_label], "tipo": tipo, "inicio": str(inicio), "fim": str(fim), "observacao": obs},
+                      inserir_ferias, dados.aplicar_ferias, "Afastamento salvo!")
+
+        with st.expander("📥 Importar afastamentos de planilha (CSV/XLSX)"):
+            st.caption("O servidor é identificado pela coluna id_funcional; datas em dd/mm/aaaa ou aaaa-mm-dd.")
+            importar_planilha(dados, "ferias_licencas", lambda df: importacao.validar_ferias(df, TIPOS_AFASTAMENTO, dados.equipe))
 
         st.divider()
         st.markdown("### 📅 Registros Recentes")
-        registros = buscar_ferias()
+        todos = {f"{m['posto_graduacao']} {m['nome']}": m["id"] for m in equipe}
+
+        col_f1, col_f2 = st.columns(2)
+        militar = col_f1.selectbox("Servidor", ["Todos"] + list(todos), key="ferias_militar")
+        periodo = col_f2.date_input("Período", value=(), key="ferias_periodo")
+
+        registros = paginar(
+            "pag_ferias", buscar_ferias_pagina,
+            equipe_id=todos.get(militar),
+            **intervalo(periodo)
+        )
         if registros:
-            st.dataframe(pd.DataFrame(registros), use_container_width=True, hide_index=True)
+            st.dataframe(tabela_ferias(registros), use_container_width=True, hide_index=True)
+        else:
+            st.info("Nenhum afastamento encontrado.")
+
+        st.divider()
+        efetivo_e_coberturas(dados)
+
+@st.fragment
+def efetivo_e_coberturas(dados):
+    """
+    Efetivo por função num período (titulares menos afastados) e quem cobre cada
+    afastado. Só busca o histórico completo quando ativado.
+    """
+    st.markdown("### 🛡️ Efetivo e Coberturas")
+    if not st.toggle("Mostrar efetivo por função", key="mostrar_efetivo"):
+        return
+
+    hoje = date.today()
+    periodo = st.date_input("Período", value=(hoje, hoje + timedelta(days=30)), format="DD/MM/YYYY", key="efetivo_periodo")
+    if len(periodo) != 2:
+        return
+    inicio, fim = periodo[0], periodo[1] + timedelta(days=1)
+
+    motor = Disponibilidade(dados.indice, dados.ferias)
+    trechos = motor.efetivo(inicio, fim)
+    nomes = lambda trecho, chave: ", ".join(trecho["nomes"][m] for m in trecho[chave]) or "—"
+    st.dataframe(pd.DataFrame({
+        "Função": [t["funcao"] for t in trechos],
+        "De": [formatar_data(t["inicio"]) for t in trechos],
+        "Até": [formatar_data(t["fim"] - timedelta(days=1)) for t in trechos],
+        "Disponíveis": [len(t["disponiveis"]) for t in trechos],
+        "Afastados": [nomes(t, "afastados") for t in trechos],
+        "Titulares": [nomes(t, "titulares") for t in trechos],
+    }), use_container_width=True, hide_index=True)
+
+    coberturas = motor.coberturas(inicio, fim)
+    if coberturas:
+        st.markdown("#### Quem cobre quem")
+        st.dataframe(pd.DataFrame({
+            "Afastado": [c["afastado"] for c in coberturas],
+            "Função": [c["funcao"] for c in coberturas],
+            "De": [formatar_data(c["inicio"]) for c in coberturas],
+            "Até": [formatar_data(c["fim"] - timedelta(days=1)) for c in coberturas],
+            "Coberto por": [", ".join(c["cobrindo"]) or "⚠️ Ninguém disponível" for c in coberturas],
+        }), use_container_width=True, hide_index=True)
 
 
 # ============================================================
 # 5. RELATÓRIOS
 # ============================================================
 
-def relatorios(aba):
+def relatorios(aba, dados):
     with aba:
         st.markdown("### 📊 Relatórios Gerenciais")
-        equipe_raw = buscar_equipe()
-        historico_raw = buscar_historico()
+        equipe_raw = dados.equipe
         if not equipe_raw: return
 
         df_equipe = pd.DataFrame(equipe_raw)
-        df_hist = pd.DataFrame(historico_raw)
 
-        # Ocupantes atuais seguindo a mesma lógica do painel
-        ocupantes_atuais = df_hist[df_hist["data_saida"].isna()]["equipe_id"].nunique()
+        # Ocupantes atuais: mesma consulta de mandatos em aberto usada pelo painel
+        ocupantes_atuais = len({o["equipe_id"] for o in dados.ocupantes})
 
         col1, col2, col3 = st.columns(3)
         col1.metric("Total Cadastrado", len(df_equipe))
@@ -387,9 +764,49 @@ def relatorios(aba):
         
         st.divider()
         st.markdown("### 🖨 Exportar Dados")
-        st.download_button(
-            label="Baixar Planilha da Equipe (CSV)",
-            data=df_equipe.to_csv(index=False).encode('utf-8'),
-            file_name='equipe_redec10.csv',
-            mime='text/csv',
-        )
+        exportar_dados(dados)
+
+
+# Tabelas disponíveis para exportação completa
+TABELAS_EXPORTACAO = {
+    "Equipe": "equipe",
+    "Histórico de Funções": "historico_redec",
+    "Férias / Licenças": "ferias_licencas",
+}
+
+@st.fragment
+def exportar_dados(dados):
+    """
+    Exportação completa em CSV, Parquet ou XLSX e ficha funcional por militar.
+    Os arquivos só são gerados no clique (em lotes, direto das consultas
+    paginadas para um arquivo temporário), nunca durante o rerun da tela.
+    """
+    col1, col2 = st.columns(2)
+    rotulo = col1.selectbox("Tabela", list(TABELAS_EXPORTACAO), key="exp_tabela")
+    formato = col2.selectbox("Formato", list(FORMATOS), key="exp_formato")
+    tabela = TABELAS_EXPORTACAO[rotulo]
+    extensao, mime = FORMATOS[formato]
+
+    st.download_button(
+        label=f"Baixar {rotulo} ({formato})",
+        data=lambda: exportar(tabela, formato),
+        file_name=f"{tabela}_redec10.{extensao}",
+        mime=mime,
+        on_click="ignore",
+    )
+
+    st.markdown("#### 🗂 Ficha Funcional")
+    militares = {f"{m['posto_graduacao']} {m['nome']}": m["id"] for m in dados.equipe}
+    col3, col4 = st.columns(2)
+    militar = col3.selectbox("Militar", list(militares), key="ficha_militar")
+    formato_ficha = col4.selectbox("Formato", ["XLSX", "CSV"], key="ficha_formato")
+    equipe_id = militares[militar]
+    extensao, mime = FORMATOS[formato_ficha]
+
+    st.download_button(
+        label="Baixar Ficha Funcional",
+        data=lambda: ficha_funcional(equipe_id, formato_ficha),
+        file_name=f"ficha_{equipe_id}.{extensao}",
+        mime=mime,
+        on_click="ignore",
+    )
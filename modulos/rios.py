@@ -1 +1,182 @@
+from datetime import timedelta
 
+import altair as alt
+import pandas as pd
+import streamlit as st
+
+from services import rios
+
+ROTULOS_SITUACAO = {
+    "normal": "🟢 Normal",
+    "atencao": "🟡 Atenção",
+    "alerta": "🟠 Alerta",
+    "transbordo": "🔴 Transbordo",
+    "sem_dados": "⚪ Sem dados recentes",
+}
+
+PERIODOS = {
+    "24 horas": timedelta(days=1),
+    "7 dias": timedelta(days=7),
+    "30 dias": timedelta(days=30),
+    "1 ano": timedelta(days=365),
+    "Todo o histórico": None,
+}
+
+
+def tela_rios():
+    st.subheader("🌊 Monitoramento de Rios")
+
+    try:
+        estacoes = rios.buscar_estacoes()
+    except Exception as erro:
+        st.error(f"Não foi possível carregar as estações: {erro}")
+        return
+    if not estacoes:
+        st.info("Nenhuma estação cadastrada. Cadastre as estações e suas cotas na tabela rios_estacoes (sql/006_rios.sql).")
+        return
+
+    if rios.RIOS_INTERVALO:
+        rios.iniciar_monitor()
+
+    situacao_estacoes(estacoes)
+    st.divider()
+    serie_estacao(estacoes)
+    st.divider()
+    with st.expander("📥 Importar leituras"):
+        importar_leituras(estacoes)
+
+
+def formatar_instante(segundos):
+    return pd.to_datetime(segundos, unit="s").strftime("%d/%m/%Y %H:%M") if segundos else "—"
+
+
+# ============================================================
+# 1. SITUAÇÃO DAS ESTAÇÕES
+# ============================================================
+
+@st.fragment(run_every=rios.RIOS_INTERVALO or None)
+def situacao_estacoes(estacoes):
+    """Situação de cada estação, lida do estado local; acompanha o monitor da pasta de entrada."""
+    linhas = rios.situacao_estacoes(estacoes)
+
+    contagem = pd.Series([l["situacao"] for l in linhas]).value_counts()
+    colunas = st.columns(len(ROTULOS_SITUACAO))
+    for coluna, (situacao, rotulo) in zip(colunas, ROTULOS_SITUACAO.items()):
+        coluna.metric(rotulo, int(contagem.get(situacao, 0)))
+
+    # Mais graves primeiro
+    gravidade = {s: i for i, s in enumerate(("sem_dados",) + rios.SITUACOES)}
+    linhas.sort(key=lambda l: (-gravidade[l["situacao"]], l["nome"]))
+    st.dataframe(pd.DataFrame({
+        "Estação": [l["nome"] for l in linhas],
+        "Rio": [l.get("rio") or "" for l in linhas],
+        "Município": [l.get("municipio") or "" for l in linhas],
+        "Situação": [ROTULOS_SITUACAO[l["situacao"]] for l in linhas],
+        "Nível (m)": [l["nivel"] for l in linhas],
+        "Subida (cm/h)": [round(l["taxa"] * 100, 1) if l["taxa"] is not None else None for l in linhas],
+        "Última leitura": [formatar_instante(l["leitura_em"]) for l in linhas],
+        "Cotas atenção / alerta / transbordo (m)": [
+            f"{l['cota_atencao']} / {l['cota_alerta']} / {l['cota_transbordo']}" for l in linhas
+        ],
+    }), use_container_width=True, hide_index=True)
+
+
+# ============================================================
+# 2. SÉRIE HISTÓRICA DE UMA ESTAÇÃO
+# ============================================================
+
+@st.fragment
+def serie_estacao(estacoes):
+    """
+    Gráfico do nível com as cotas da estação. A série é reduzida antes de ir ao
+    navegador (mínimo, média e máximo por intervalo), qualquer que seja o período.
+    Roda como fragmento: trocar estação ou período não refaz a tela inteira.
+    """
+    st.markdown("### 📈 Série Histórica")
+    por_id = {e["id"]: e for e in estacoes}
+    c1, c2 = st.columns([2, 3])
+    estacao = por_id[c1.selectbox("Estação", list(por_id), format_func=lambda i: por_id[i]["nome"], key="rios_estacao")]
+    periodo = PERIODOS[c2.radio("Período", list(PERIODOS), index=1, horizontal=True, key="rios_periodo")]
+
+    fim = rios.agora()
+    df, largura = rios.serie_reduzida(estacao["id"], fim - periodo if periodo else None)
+    if df.empty:
+        st.info("Nenhuma leitura no período.")
+    else:
+        base = alt.Chart(df).encode(x=alt.X("instante:T", title=None))
+        faixa = base.mark_area(opacity=0.25).encode(y=alt.Y("minimo:Q", title="Nível (m)"), y2="maximo:Q")
+        linha = base.mark_line().encode(
+            y="media:Q",
+            tooltip=[alt.Tooltip("instante:T", format="%d/%m/%Y %H:%M"), "minimo:Q", "media:Q", "maximo:Q",
+                     alt.Tooltip("taxa:Q", format=".3f", title="subida máx. (m/h)"), "situacao:N"],
+        )
+        cotas = alt.Chart(pd.DataFrame({
+            "cota": [estacao["cota_atencao"], estacao["cota_alerta"], estacao["cota_transbordo"]],
+            "nome": ["Atenção", "Alerta", "Transbordo"],
+        })).mark_rule(strokeDash=[4, 4]).encode(
+            y="cota:Q",
+            color=alt.Color("nome:N", scale=alt.Scale(domain=["Atenção", "Alerta", "Transbordo"],
+                                                       range=["#D4AC0D", "#E67E22", "#C0392B"]), title=None),
+        )
+        st.altair_chart(faixa + linha + cotas, use_container_width=True)
+        st.caption(f"Cada ponto resume {largura} min de leituras (faixa entre o mínimo e o máximo).")
+
+    eventos = rios.eventos(estacao["id"])
+    st.markdown("#### Mudanças de situação")
+    if eventos:
+        st.dataframe(pd.DataFrame({
+            "Quando": [formatar_instante(e["instante"]) for e in eventos],
+            "De": [ROTULOS_SITUACAO[e["de"]] for e in eventos],
+            "Para": [ROTULOS_SITUACAO[e["para"]] for e in eventos],
+            "Nível (m)": [e["nivel"] for e in eventos],
+        }), use_container_width=True, hide_index=True)
+    else:
+        st.caption("Nenhuma mudança de situação registrada.")
+
+
+# ============================================================
+# 3. IMPORTAÇÃO DE LEITURAS
+# ============================================================
+
+@st.fragment
+def importar_leituras(estacoes):
+    """Leituras em CSV/XLSX (estacao, instante, nivel), enviadas aqui ou deixadas na pasta de entrada."""
+    st.caption(f"A pasta `{rios.RIOS_ENTRADA}` também é verificada automaticamente"
+               + (f" a cada {rios.RIOS_INTERVALO} s." if rios.RIOS_INTERVALO else " quando solicitado abaixo."))
+    st.download_button("Baixar modelo", rios.modelo_csv(), "modelo_leituras_rios.csv", "text/csv",
+                       key="modelo_rios", on_click="ignore")
+    arquivo = st.file_uploader("Arquivo de leituras", type=["csv", "xlsx"], key="importar_rios")
+
+    resumo = None
+    if arquivo is not None and st.button("Importar leituras", type="primary", key="confirmar_rios"):
+        try:
+            leituras, invalidas = rios.ler_leituras(arquivo, arquivo.name)
+        except Exception as erro:
+            st.error(f"Não foi possível ler o arquivo: {erro}")
+            return
+        with st.spinner("Gravando leituras..."):
+            resumo = dict(rios.ingerir(leituras, estacoes), invalidas=invalidas)
+
+    if st.button("Processar pasta de entrada agora", key="pasta_rios"):
+        with st.spinner("Processando..."):
+            resumo = rios.ingerir_pasta(estacoes)
+        if resumo is None:
+            st.info("Nenhum arquivo na pasta de entrada.")
+
+    if resumo:
+        # Exibido depois do recarregamento, com a situação já atualizada
+        st.session_state["rios_resumo"] = resumo
+        st.toast(f"{resumo['novas']} leitura(s) gravada(s).", icon="✅")
+        st.rerun(scope="app")
+
+    resumo = st.session_state.pop("rios_resumo", None)
+    if not resumo:
+        return
+    if resumo.get("invalidas"):
+        st.warning(f"{resumo['invalidas']} linha(s) ignorada(s) por data/hora ou nível inválido.")
+    if resumo["desconhecidas"]:
+        st.warning("Estações sem cadastro (leituras ignoradas): " + ", ".join(resumo["desconhecidas"]))
+    if resumo.get("com_erro"):
+        st.error("Arquivos ilegíveis, movidos para com_erro/: " + ", ".join(resumo["com_erro"]))
+    if resumo["erro_publicacao"]:
+        st.warning(f"Leituras gravadas, mas a situação não foi enviada ao banco: {resumo['erro_publicacao']}")
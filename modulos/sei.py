@@ -1 +1,102 @@
+from datetime import date
 
+import pandas as pd
+import streamlit as st
+
+from services import documentos
+from services.busca import so_digitos
+from modulos.componentes import busca_documentos, paginar, secao
+
+ABAS_SEI = ["🔎 Buscar", "📋 Processos", "➕ Novo processo"]
+
+
+def tela_sei():
+    st.subheader("📥 SEI")
+
+    aba = secao("aba_sei", ABAS_SEI)
+    if aba == "🔎 Buscar":
+        busca_documentos("sei_busca")
+    elif aba == "📋 Processos":
+        processos()
+    else:
+        novo_processo()
+
+
+def formatar_data(valor):
+    return date.fromisoformat(valor).strftime("%d/%m/%Y") if valor else ""
+
+
+# ============================================================
+# 1. PROCESSOS (PAGINADOS)
+# ============================================================
+
+def processos():
+    situacao = st.selectbox("Situação", [None] + list(documentos.SITUACOES_PROCESSO),
+                            format_func=lambda s: documentos.SITUACOES_PROCESSO.get(s, "Todas"), key="sei_situacao")
+    linhas = paginar("sei_lista", documentos.buscar_processos_pagina, situacao=situacao)
+    if not linhas:
+        st.info("Nenhum processo cadastrado.")
+        return
+    st.dataframe(pd.DataFrame({
+        "Número": [p["numero"] for p in linhas],
+        "Assunto": [p["assunto"] for p in linhas],
+        "Interessado": [p.get("interessado") or "" for p in linhas],
+        "Unidade": [p.get("unidade") or "" for p in linhas],
+        "Situação": [documentos.SITUACOES_PROCESSO[p["situacao"]] for p in linhas],
+        "Aberto em": [formatar_data(p.get("aberto_em")) for p in linhas],
+    }), use_container_width=True, hide_index=True)
+
+    with st.expander("✏️ Atualizar processo"):
+        por_id = {p["id"]: p for p in linhas}
+        processo = por_id[st.selectbox("Processo", list(por_id), key="sei_editar",
+                                       format_func=lambda i: f"{por_id[i]['numero']} — {por_id[i]['assunto']}")]
+        with st.form(f"editar_processo_{processo['id']}"):
+            situacoes = list(documentos.SITUACOES_PROCESSO)
+            situacao = st.selectbox("Situação", situacoes, index=situacoes.index(processo["situacao"]),
+                                    format_func=documentos.SITUACOES_PROCESSO.get)
+            assunto = st.text_input("Assunto", value=processo["assunto"])
+            observacao = st.text_area("Observação", value=processo.get("observacao") or "")
+            if st.form_submit_button("Salvar", type="primary"):
+                try:
+                    documentos.atualizar_processo(processo["id"], {
+                        "situacao": situacao, "assunto": assunto.strip(), "observacao": observacao.strip() or None,
+                    })
+                    st.toast("Processo atualizado!", icon="✅")
+                    st.rerun()
+                except Exception as erro:
+                    st.error(f"Erro ao atualizar: {erro}")
+
+
+# ============================================================
+# 2. CADASTRO
+# ============================================================
+
+def novo_processo():
+    with st.form("novo_processo", clear_on_submit=True):
+        c1, c2 = st.columns([1, 2])
+        numero = c1.text_input("Número", placeholder="SEI-270009/000123/2024")
+        assunto = c2.text_input("Assunto")
+        c3, c4, c5 = st.columns(3)
+        interessado = c3.text_input("Interessado")
+        unidade = c4.text_input("Unidade")
+        aberto_em = c5.date_input("Aberto em", format="DD/MM/YYYY")
+        observacao = st.text_area("Observação")
+        if st.form_submit_button("Cadastrar processo", type="primary"):
+            if len(so_digitos(numero)) < 6 or not assunto.strip():
+                st.error("Informe o número completo do processo e o assunto.")
+                return
+            # Mesmo número com outra grafia: o índice exato responde sem ir ao banco
+            existente = documentos.processo_por_numero(numero)
+            if existente:
+                st.error(f"Processo já cadastrado: {existente['numero']} — {existente['assunto']}")
+                return
+            try:
+                documentos.inserir_processo({
+                    "numero": numero.strip().upper(), "assunto": assunto.strip(),
+                    "interessado": interessado.strip() or None, "unidade": unidade.strip() or None,
+                    "aberto_em": str(aberto_em), "observacao": observacao.strip() or None,
+                })
+                st.toast("Processo cadastrado!", icon="✅")
+                st.rerun()
+            except Exception as erro:
+                st.error(f"Erro ao cadastrar: {erro}")
@@ -1 +1,318 @@
+from datetime import date
 
+import pandas as pd
+import streamlit as st
+
+from services import fila, viaturas
+from services.prefetch import prefetch
+from services.supabase import buscar_equipe
+from modulos.componentes import paginar, pendentes_fila, secao
+
+ROTULOS_SITUACAO = {"disponivel": "🟢 Disponível", "em_uso": "🔵 Em uso", "manutencao": "🟠 Em manutenção"}
+
+# Registros aceitos em cada situação (o banco recusa os demais)
+REGISTROS_POR_SITUACAO = {
+    "disponivel": ["saida", "abastecimento", "manutencao", "hodometro"],
+    "em_uso": ["retorno", "abastecimento", "hodometro"],
+    "manutencao": ["liberacao", "abastecimento", "hodometro"],
+}
+
+ABAS_VIATURAS = ["🚦 Despacho", "📝 Registrar", "📊 Resumo mensal", "📜 Diário de bordo", "🗂 Cadastro"]
+
+
+def tela_viaturas():
+    st.subheader("🚑 Controle de Viaturas")
+
+    dados, erros = prefetch({
+        "viaturas": viaturas.buscar_viaturas,
+        "mensal": lambda: viaturas.buscar_resumo_mensal(viaturas.mes_inicial()),
+        "equipe": buscar_equipe,
+    })
+    if erros:
+        st.error("Não foi possível carregar as viaturas: " + "; ".join(str(e) for e in erros.values()))
+        return
+    frota, equipe = dados["viaturas"], dados["equipe"]
+
+    if fila.ativa():
+        pendentes_fila("viaturas_registros", "registro(s) de viatura")
+
+    aba = secao("aba_viaturas", ABAS_VIATURAS)
+    if aba == "🚦 Despacho":
+        despacho(frota)
+    elif aba == "📝 Registrar":
+        registrar(frota, equipe)
+    elif aba == "📊 Resumo mensal":
+        resumo_mensal(frota, dados["mensal"])
+    elif aba == "📜 Diário de bordo":
+        diario(frota)
+    else:
+        cadastro(frota)
+
+
+def rotulo_motorista(membro):
+    if not membro:
+        return ""
+    return f"{membro.get('posto_graduacao') or ''} {membro.get('nome') or ''}".strip()
+
+
+def formatar_km(valor):
+    return f"{float(valor):,.0f} km".replace(",", ".") if valor is not None else "—"
+
+
+def formatar_instante(valor):
+    return pd.Timestamp(valor).tz_convert("America/Sao_Paulo").strftime("%d/%m/%Y %H:%M") if valor else "—"
+
+
+# ============================================================
+# 1. DESPACHO
+# ============================================================
+
+def despacho(frota):
+    """Situação atual de cada viatura, direto do resumo mantido pelo banco."""
+    ativas = [v for v in frota if v.get("ativa")]
+    hoje = date.today()
+    vencidas = [v for v in ativas if viaturas.revisao_vencida(v, hoje)]
+
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Disponíveis", len(viaturas.disponiveis(ativas)))
+    c2.metric("Em uso", sum(1 for v in ativas if v["situacao"] == "em_uso"))
+    c3.metric("Em manutenção", sum(1 for v in ativas if v["situacao"] == "manutencao"))
+    c4.metric("Revisão vencida", len(vencidas))
+
+    if not ativas:
+        st.info("Nenhuma viatura cadastrada. Cadastre as viaturas na aba 🗂 Cadastro.")
+        return
+
+    # Disponíveis primeiro: é o que o despacho procura
+    ordem = {s: i for i, s in enumerate(ROTULOS_SITUACAO)}
+    ativas = sorted(ativas, key=lambda v: (ordem[v["situacao"]], v["prefixo"]))
+    st.dataframe(pd.DataFrame({
+        "Prefixo": [v["prefixo"] for v in ativas],
+        "Modelo": [v.get("modelo") or "" for v in ativas],
+        "Situação": [ROTULOS_SITUACAO[v["situacao"]] for v in ativas],
+        "Desde": [formatar_instante(v["em_uso_desde"] or v["manutencao_desde"]) for v in ativas],
+        "Destino": [v.get("destino_atual") or "" for v in ativas],
+        "Motorista": [rotulo_motorista(v.get("equipe")) for v in ativas],
+        "Hodômetro": [formatar_km(v["hodometro_km"]) for v in ativas],
+        "Dias desde a revisão": [viaturas.dias_desde_revisao(v, hoje) for v in ativas],
+        "Revisão": [
+            "🔴 Vencida" if viaturas.revisao_vencida(v, hoje)
+            else f"🟢 em {formatar_km(v['km_para_revisao'])} ou "
+                 f"{date.fromisoformat(v['proxima_revisao_em']).strftime('%d/%m/%Y')}"
+            for v in ativas
+        ],
+    }), use_container_width=True, hide_index=True)
+
+
+# ============================================================
+# 2. REGISTROS DO DIÁRIO DE BORDO
+# ============================================================
+
+@st.fragment
+def registrar(frota, equipe):
+    """
+    Saída, retorno, abastecimento, manutenção ou leitura do hodômetro de uma viatura.
+    Só oferece os registros aceitos na situação atual, já contando os registros ainda
+    na fila de escritas; o banco confere de novo ao gravar.
+    Roda como fragmento: trocar viatura ou tipo não refaz a tela inteira.
+    """
+    pendentes = [p["dados"] for p in fila.situacao() if p["destino"] == "registrar_viatura"] if fila.ativa() else []
+    ativas = {v["id"]: viaturas.com_pendentes(v, pendentes) for v in frota if v.get("ativa")}
+    if not ativas:
+        st.info("Nenhuma viatura ativa.")
+        return
+
+    c1, c2 = st.columns(2)
+    viatura_id = c1.selectbox(
+        "Viatura", list(ativas),
+        format_func=lambda i: f"{ativas[i]['prefixo']} — {ROTULOS_SITUACAO[ativas[i]['situacao']]}",
+        key="viaturas_viatura",
+    )
+    viatura = ativas[viatura_id]
+    na_fila = sum(1 for p in pendentes if p["p_viatura_id"] == viatura_id)
+    if na_fila:
+        st.caption(f"📤 Situação e hodômetro já contam {na_fila} registro(s) desta viatura aguardando envio.")
+    tipo = c2.selectbox("Registro", REGISTROS_POR_SITUACAO[viatura["situacao"]],
+                        format_func=viaturas.TIPOS_REGISTRO.get, key="viaturas_tipo")
+
+    hodometro = float(viatura["hodometro_km"])
+    c3, c4 = st.columns(2)
+    km = c3.number_input(
+        "Hodômetro (km)" + ("" if tipo in viaturas.EXIGEM_KM else " — opcional"),
+        min_value=hodometro, value=hodometro, step=1.0, key=f"viaturas_km_{viatura_id}_{hodometro:.0f}",
+    )
+    if tipo not in viaturas.EXIGEM_KM and km == hodometro:
+        km = None
+
+    litros = valor = destino = motorista_id = None
+    revisao = False
+    if tipo == "saida":
+        ativos = {m["id"]: m for m in equipe if m.get("ativo")}
+        motorista_id = c4.selectbox("Motorista", [None] + list(ativos),
+                                    format_func=lambda i: rotulo_motorista(ativos.get(i)) or "—",
+                                    key="viaturas_motorista")
+        destino = st.text_input("Destino / missão", key="viaturas_destino")
+    elif tipo == "abastecimento":
+        litros = c4.number_input("Litros", min_value=0.0, step=1.0, key="viaturas_litros")
+        valor = st.number_input("Valor (R$)", min_value=0.0, step=10.0, key="viaturas_valor")
+    elif tipo == "liberacao":
+        revisao = c4.checkbox("Foi a revisão periódica", key="viaturas_revisao")
+    descricao = st.text_input("Observação" if tipo != "manutencao" else "Serviço / defeito",
+                              key="viaturas_descricao")
+
+    if tipo == "retorno" and km is not None:
+        st.caption(f"Percurso: {formatar_km(km - hodometro)}")
+
+    bloqueado = tipo == "abastecimento" and not litros
+    if st.button(f"Registrar {viaturas.TIPOS_REGISTRO[tipo].lower()}", type="primary", disabled=bloqueado,
+                 use_container_width=True):
+        parametros = viaturas.parametros_registro(viatura_id, tipo, km, litros, valor, destino, motorista_id,
+                                                  descricao, revisao)
+        mensagem = f"{viaturas.TIPOS_REGISTRO[tipo]}: registro salvo para a {viatura['prefixo']}."
+        try:
+            if fila.ativa():
+                fila.enfileirar("registrar_viatura", parametros)
+                st.toast(f"{mensagem} Envio em segundo plano.", icon="📤")
+            else:
+                viaturas.registrar(parametros)
+                st.toast(mensagem, icon="✅")
+        except Exception as erro:
+            st.toast(f"Erro ao registrar: {erro}", icon="❌")
+        st.rerun(scope="app")
+
+
+# ============================================================
+# 3. RESUMO MENSAL
+# ============================================================
+
+def resumo_mensal(frota, mensal):
+    """Km, consumo e disponibilidade por viatura e mês, lidos do resumo mantido pelo banco."""
+    if not mensal:
+        st.info("Nenhum registro nos últimos meses.")
+        return
+    prefixos = {v["id"]: v["prefixo"] for v in frota}
+    df = pd.DataFrame(viaturas.indicadores_mensais(mensal))
+    df["Viatura"] = df["viatura_id"].map(prefixos)
+    df["Mês"] = pd.to_datetime(df["mes"]).dt.strftime("%m/%Y")
+
+    st.markdown(f"#### Km rodados por mês (últimos {viaturas.MESES_RESUMO} meses)")
+    st.bar_chart(df.pivot_table(index="mes", columns="Viatura", values="km", aggfunc="sum").astype(float))
+
+    selecao = st.multiselect("Viaturas", sorted(df["Viatura"].dropna().unique()), key="viaturas_resumo_filtro")
+    if selecao:
+        df = df[df["Viatura"].isin(selecao)]
+    df = df.sort_values(["mes", "Viatura"], ascending=[False, True])
+    st.dataframe(pd.DataFrame({
+        "Mês": df["Mês"],
+        "Viatura": df["Viatura"],
+        "Km": df["km"].astype(float).round(0),
+        "Viagens": df["viagens"],
+        "Litros": df["litros"].astype(float).round(1),
+        "Km/l": df["consumo"],
+        "Combustível (R$)": df["valor"].astype(float).round(2),
+        "Manutenções": df["manutencoes"],
+        "Disponibilidade (%)": df["disponibilidade"],
+    }), use_container_width=True, hide_index=True)
+    st.caption("Km/l considera os km revelados pelo hodômetro e os litros abastecidos no mesmo mês. "
+               "Disponibilidade é a parte do mês fora de manutenção, contada na liberação.")
+
+
+# ============================================================
+# 4. DIÁRIO DE BORDO (PAGINADO)
+# ============================================================
+
+def diario(frota):
+    prefixos = {v["id"]: v["prefixo"] for v in frota}
+    c1, c2 = st.columns(2)
+    viatura_id = c1.selectbox("Viatura", [None] + list(prefixos), format_func=lambda i: prefixos.get(i, "Todas"),
+                              key="diario_viatura")
+    tipo = c2.selectbox("Tipo", [None] + list(viaturas.TIPOS_REGISTRO),
+                        format_func=lambda t: viaturas.TIPOS_REGISTRO.get(t, "Todos"), key="diario_tipo")
+
+    registros = paginar("viaturas_diario", viaturas.buscar_registros_pagina, viatura_id=viatura_id, tipo=tipo)
+    if not registros:
+        st.info("Nenhum registro no diário de bordo.")
+        return
+    st.dataframe(pd.DataFrame({
+        "Quando": [formatar_instante(r["registrado_em"]) for r in registros],
+        "Viatura": [(r.get("viaturas") or {}).get("prefixo", "") for r in registros],
+        "Registro": [viaturas.TIPOS_REGISTRO[r["tipo"]] + (" (revisão)" if r.get("revisao") else "") for r in registros],
+        "Hodômetro": [formatar_km(r["km"]) for r in registros],
+        "Litros": [r.get("litros") for r in registros],
+        "Valor (R$)": [r.get("valor") for r in registros],
+        "Destino": [r.get("destino") or "" for r in registros],
+        "Motorista": [rotulo_motorista(r.get("equipe")) for r in registros],
+        "Observação": [r.get("descricao") or "" for r in registros],
+    }), use_container_width=True, hide_index=True)
+
+
+# ============================================================
+# 5. CADASTRO
+# ============================================================
+
+def cadastro(frota):
+    with st.form("nova_viatura", clear_on_submit=True):
+        st.markdown("#### Nova viatura")
+        c1, c2, c3 = st.columns(3)
+        prefixo = c1.text_input("Prefixo")
+        placa = c2.text_input("Placa")
+        modelo = c3.text_input("Modelo")
+        c4, c5, c6, c7 = st.columns(4)
+        hodometro = c4.number_input("Hodômetro atual (km)", min_value=0.0, step=1.0)
+        ultima_km = c5.number_input("Km da última revisão", min_value=0.0, step=1.0)
+        ultima_em = c6.date_input("Data da última revisão", format="DD/MM/YYYY")
+        c8, c9 = c7.columns(2)
+        intervalo_km = c8.number_input("Revisão a cada (km)", min_value=1, value=10000, step=1000)
+        intervalo_dias = c9.number_input("ou (dias)", min_value=1, value=180, step=30)
+        if st.form_submit_button("Cadastrar viatura", type="primary"):
+            if not prefixo.strip():
+                st.error("Informe o prefixo.")
+            else:
+                try:
+                    viaturas.inserir_viatura({
+                        "prefixo": prefixo.strip().upper(), "placa": placa.strip().upper() or None,
+                        "modelo": modelo.strip() or None, "hodometro_inicial_km": hodometro,
+                        "ultima_revisao_km": ultima_km, "ultima_revisao_em": str(ultima_em),
+                        "intervalo_revisao_km": intervalo_km, "intervalo_revisao_dias": intervalo_dias,
+                    })
+                    st.toast("Viatura cadastrada!", icon="✅")
+                    st.rerun()
+                except Exception as erro:
+                    st.error(f"Erro ao cadastrar: {erro}")
+
+    if frota:
+        st.markdown("#### Frota")
+        # Rótulo da coluna -> campo em viaturas
+        colunas = {"Modelo": "modelo", "Revisão a cada (km)": "intervalo_revisao_km",
+                   "Revisão a cada (dias)": "intervalo_revisao_dias", "Ativa": "ativa"}
+        originais = {v["id"]: {
+            "Modelo": v.get("modelo") or "",
+            "Revisão a cada (km)": float(v["intervalo_revisao_km"]),
+            "Revisão a cada (dias)": int(v["intervalo_revisao_dias"]),
+            "Ativa": bool(v.get("ativa")),
+        } for v in frota}
+        editado = st.data_editor(
+            pd.DataFrame([dict(originais[v["id"]], id=v["id"], Prefixo=v["prefixo"]) for v in frota],
+                         columns=["id", "Prefixo", *colunas]),
+            column_config={"id": None}, disabled=["Prefixo"], hide_index=True, use_container_width=True,
+            key="viaturas_editor",
+        )
+        alterados = []
+        for linha in editado.to_dict("records"):
+            dados = {campo: linha[rotulo] for rotulo, campo in colunas.items()
+                     if linha[rotulo] != originais[linha["id"]][rotulo]}
+            if dados:
+                alterados.append((linha["id"], dados))
+        if alterados and st.button(f"Salvar {len(alterados)} alteração(ões)", type="primary"):
+            for id_, dados in alterados:
+                viaturas.atualizar_viatura(id_, dados)
+            st.toast("Frota atualizada!", icon="✅")
+            st.rerun()
+
+    st.divider()
+    st.caption("Situação, hodômetro e resumos mensais são mantidos pelo banco a cada registro. "
+               "A conferência refaz todos a partir do diário de bordo.")
+    if st.button("Conferir resumos com o diário"):
+        with st.spinner("Conferindo..."):
+            viaturas.conferir_resumos()
+        st.toast("Resumos refeitos a partir do diário.", icon="✅")
@@ -0,0 +1,282 @@
+# services/busca.py
+
+import math
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from functools import lru_cache
+
+import numpy as np
+
+# ============================================================
+# NORMALIZAÇÃO (PORTUGUÊS)
+# ============================================================
+
+STOPWORDS = frozenset("""
+a ao aos as com como da das de do dos e em entre na nas no nos o os ou para pela pelas pelo pelos
+por que se sem sob sobre sua suas seu seus um uma umas uns ja nao mais muito ate apos
+""".split())
+
+# Plural -> singular, do mais longo ao mais curto (palavras já sem acento)
+_PLURAIS = (("oes", "ao"), ("aes", "ao"), ("ais", "al"), ("eis", "el"), ("ois", "ol"),
+            ("les", "l"), ("res", "r"), ("ns", "m"), ("s", ""))
+# Sufixos derivacionais mais comuns nos textos dos processos e boletins
+_SUFIXOS = ("amento", "imento", "mente", "idade", "acao", "icao", "ador", "ancia", "encia", "ante")
+
+_PALAVRA = re.compile(r"\w+")
+# "SEI" no começo de um número de processo ("SEI-270009/...", "sei 270009..."), não de uma palavra
+_PREFIXO_SEI = re.compile(r"^\s*sei(?![^\W\d_])", re.IGNORECASE)
+
+
+def sem_acentos(texto):
+    """Minúsculas e sem acentos: "Inundação" -> "inundacao"."""
+    decomposto = unicodedata.normalize("NFKD", texto.casefold())
+    return "".join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def radical(palavra):
+    """
+    Radical leve (plural, sufixos comuns e vogal final), aplicado igual ao indexar e ao
+    buscar: "inundações", "inundação" -> "inund"; "enchentes" -> "enchent".
+    """
+    if len(palavra) < 4 or not palavra.isalpha():
+        return palavra
+    for sufixo, troca in _PLURAIS:
+        if palavra.endswith(sufixo) and not palavra.endswith("ss"):
+            palavra = palavra[:-len(sufixo)] + troca
+            break
+    for sufixo in _SUFIXOS:
+        if palavra.endswith(sufixo) and len(palavra) - len(sufixo) >= 3:
+            palavra = palavra[:-len(sufixo)]
+            break
+    if len(palavra) > 4 and palavra[-1] in "aeo":
+        palavra = palavra[:-1]
+    return palavra
+
+
+@lru_cache(maxsize=200_000)
+def _normalizar(original):
+    """(palavra sem acento, radical) de uma palavra já em minúsculas; None se for stopword."""
+    palavra = sem_acentos(original)
+    if palavra in STOPWORDS:
+        return None
+    return palavra, radical(palavra)
+
+
+def palavras(texto):
+    """Palavras normalizadas do texto, sem stopwords, na ordem em que aparecem."""
+    return [p for p in _PALAVRA.findall(sem_acentos(texto or "")) if p not in STOPWORDS]
+
+
+def so_digitos(texto):
+    """Número de processo SEI normalizado: "SEI-270009/000123/2024" -> "2700090001232024"."""
+    return re.sub(r"\D", "", texto or "")
+
+
+# ============================================================
+# ÍNDICE INVERTIDO
+# ============================================================
+
+class IndiceBusca:
+    """
+    Índice invertido dos documentos (processos SEI e boletins), mantido em memória.
+
+    Cada documento tem uma chave (tipo, id), ex.: ("sei", 12), campos de texto com peso
+    e, opcionalmente, um número exato. As palavras viram radicais (radical()); cada
+    radical aponta para os documentos que o contêm, com a frequência ponderada pelo
+    campo. A busca cruza os radicais da consulta (todos precisam aparecer) e ordena por
+    BM25; a última palavra vale como prefixo (autocompletar). Números de processo têm
+    um índice próprio, só de dígitos: uma consulta numérica vai direto a ele.
+
+    Internamente cada documento tem uma posição fixa; a pontuação é calculada em
+    vetores numpy sobre as listas de cada radical, convertidas uma vez e refeitas só
+    quando o radical ganha ou perde documentos. adicionar() substitui o documento de
+    mesma chave: atualizar é só adicionar de novo.
+    """
+
+    K1 = 1.2
+    B = 0.75
+    # Palavras do vocabulário consideradas ao expandir um prefixo
+    MAX_EXPANSAO = 50
+
+    def __init__(self):
+        self._postagens = {}      # radical -> {posição: frequência ponderada}
+        self._vetores = {}        # radical -> (posições, frequências) em numpy, montado na consulta
+        self._posicoes = {}       # chave -> posição
+        self._chaves = []         # posição -> chave
+        self._tamanhos = []       # posição -> tamanho ponderado (0 se removido)
+        self._vetor_tamanhos = None
+        self._tamanho_total = 0.0
+        self._por_documento = {}  # chave -> (radicais, palavras, número) do documento, para remover
+        self._dados = {}          # chave -> registro exibido nos resultados
+        self._numeros = {}        # número só com dígitos -> {chaves}
+        self._lista_numeros = []  # números ordenados, para prefixo
+        self._frequencia = {}     # palavra -> em quantos documentos aparece
+        self._vocabulario = []    # palavras ordenadas, para prefixo
+        self._grafia = {}         # palavra -> última grafia original vista (com acentos)
+
+    def __len__(self):
+        return len(self._dados)
+
+    def __contains__(self, chave):
+        return chave in self._dados
+
+    # ---------- atualização ----------
+    def adicionar(self, chave, campos, numero=None, dados=None):
+        """
+        `campos` é uma lista de (texto, peso). `numero`, se houver, entra no índice exato.
+        `dados` é o que buscar() devolve para o documento.
+        """
+        if chave in self._dados:
+            self.remover(chave)
+        posicao = self._posicoes.get(chave)
+        if posicao is None:
+            posicao = self._posicoes[chave] = len(self._chaves)
+            self._chaves.append(chave)
+            self._tamanhos.append(0.0)
+
+        radicais, vistas = {}, {}
+        for texto, peso in campos:
+            for original in _PALAVRA.findall((texto or "").casefold()):
+                normal = _normalizar(original)
+                if normal is None:
+                    continue
+                palavra, r = normal
+                radicais[r] = radicais.get(r, 0.0) + peso
+                vistas[palavra] = original
+
+        for r, frequencia in radicais.items():
+            self._postagens.setdefault(r, {})[posicao] = frequencia
+            self._vetores.pop(r, None)
+        for palavra, original in vistas.items():
+            if palavra not in self._frequencia:
+                insort(self._vocabulario, palavra)
+                self._frequencia[palavra] = 0
+            self._frequencia[palavra] += 1
+            self._grafia[palavra] = original
+
+        numero = so_digitos(numero) or None
+        if numero:
+            if numero not in self._numeros:
+                insort(self._lista_numeros, numero)
+            self._numeros.setdefault(numero, set()).add(chave)
+
+        tamanho = sum(radicais.values())
+        self._por_documento[chave] = (tuple(radicais), tuple(vistas), numero)
+        self._tamanhos[posicao] = tamanho
+        self._vetor_tamanhos = None
+        self._tamanho_total += tamanho
+        self._dados[chave] = dados
+
+    def remover(self, chave):
+        if chave not in self._dados:
+            return
+        posicao = self._posicoes[chave]
+        radicais, vistas, numero = self._por_documento.pop(chave)
+        for r in radicais:
+            postagem = self._postagens[r]
+            del postagem[posicao]
+            if not postagem:
+                del self._postagens[r]
+            self._vetores.pop(r, None)
+        for palavra in vistas:
+            self._frequencia[palavra] -= 1
+            if not self._frequencia[palavra]:
+                del self._frequencia[palavra]
+                del self._vocabulario[bisect_left(self._vocabulario, palavra)]
+        if numero:
+            self._numeros[numero].discard(chave)
+            if not self._numeros[numero]:
+                del self._numeros[numero]
+                del self._lista_numeros[bisect_left(self._lista_numeros, numero)]
+        self._tamanho_total -= self._tamanhos[posicao]
+        self._tamanhos[posicao] = 0.0
+        self._vetor_tamanhos = None
+        del self._dados[chave]
+
+    # ---------- consulta ----------
+    def _com_prefixo(self, lista, prefixo):
+        inicio = bisect_left(lista, prefixo)
+        fim = bisect_left(lista, prefixo + "\uffff", inicio)
+        return lista[inicio:fim]
+
+    def _vetor(self, r):
+        if r not in self._vetores:
+            postagem = self._postagens[r]
+            self._vetores[r] = (np.fromiter(postagem.keys(), np.int64, len(postagem)),
+                                np.fromiter(postagem.values(), np.float64, len(postagem)))
+        return self._vetores[r]
+
+    def _candidatos(self, palavra, prefixo):
+        """Radicais que casam com a palavra da consulta (mais as expansões, se for prefixo)."""
+        radicais = {radical(palavra)}
+        if prefixo:
+            expansoes = self._com_prefixo(self._vocabulario, palavra)
+            if len(expansoes) > self.MAX_EXPANSAO:
+                expansoes = sorted(expansoes, key=self._frequencia.get, reverse=True)[:self.MAX_EXPANSAO]
+            radicais.update(radical(p) for p in expansoes)
+        return [r for r in radicais if r in self._postagens]
+
+    def buscar(self, consulta, limite=20, tipo=None, prefixo=True):
+        """
+        Documentos que contêm todas as palavras da consulta, do mais ao menos relevante,
+        como [(chave, pontuação, dados)]; `tipo` restringe às chaves desse tipo. Uma
+        consulta só de dígitos (4 ou mais), com ou sem "SEI" na frente, busca os números
+        de processo que começam por eles, o número exato primeiro.
+        """
+        digitos = so_digitos(consulta)
+        if len(digitos) >= 4 and not re.search(r"[^\W\d_]", _PREFIXO_SEI.sub("", consulta)):
+            numeros = self._com_prefixo(self._lista_numeros, digitos)[:limite]
+            # Exato: +inf; os demais, pelo tamanho (os mais curtos são os mais próximos)
+            achados = [(c, math.inf if n == digitos else 1.0 / len(n), self._dados[c])
+                       for n in numeros for c in self._numeros[n] if tipo is None or c[0] == tipo]
+            return sorted(achados, key=lambda item: -item[1])[:limite]
+
+        # A última palavra ainda está sendo digitada se a consulta não termina em espaço
+        brutas = _PALAVRA.findall(sem_acentos(consulta))
+        termos = [p for p in brutas if p not in STOPWORDS]
+        digitando = prefixo and bool(brutas) and consulta[-1:].isalnum()
+        if digitando and brutas[-1] in STOPWORDS:
+            termos.append(brutas[-1])  # "de" pode ser o começo de "defesa"
+        if not termos or not self._dados:
+            return []
+
+        if self._vetor_tamanhos is None:
+            self._vetor_tamanhos = np.array(self._tamanhos)
+        tamanhos = self._vetor_tamanhos
+        total = len(self._dados)
+        normal = self.K1 * (1 - self.B + self.B * tamanhos / (self._tamanho_total / total))
+
+        soma = np.zeros(len(tamanhos))
+        presentes = np.ones(len(tamanhos), dtype=bool)
+        for i, termo in enumerate(termos):
+            pontos = np.zeros(len(tamanhos))
+            for r in self._candidatos(termo, digitando and i == len(termos) - 1):
+                posicoes, frequencias = self._vetor(r)
+                idf = math.log(1 + (total - len(posicoes) + 0.5) / (len(posicoes) + 0.5))
+                valor = idf * frequencias * (self.K1 + 1) / (frequencias + normal[posicoes])
+                pontos[posicoes] = np.maximum(pontos[posicoes], valor)
+            presentes &= pontos > 0
+            soma += pontos
+
+        if tipo is not None:
+            presentes &= np.fromiter((c[0] == tipo for c in self._chaves), bool, len(self._chaves))
+        achados = np.flatnonzero(presentes)
+        if len(achados) > limite:
+            achados = achados[np.argpartition(-soma[achados], limite)[:limite]]
+        achados = achados[np.argsort(-soma[achados], kind="stable")]
+        return [(self._chaves[p], float(soma[p]), self._dados[self._chaves[p]]) for p in achados]
+
+    def exato(self, numero):
+        """Documentos com exatamente este número (só os dígitos contam)."""
+        return [self._dados[c] for c in self._numeros.get(so_digitos(numero), ())]
+
+    def sugerir(self, texto, limite=8):
+        """Complementos para a última palavra digitada, as mais frequentes primeiro, com acentos."""
+        brutas = _PALAVRA.findall(sem_acentos(texto))
+        if not brutas or not texto[-1:].isalnum() or len(brutas[-1]) < 2:
+            return []
+        ultima = brutas[-1]
+        expansoes = [p for p in self._com_prefixo(self._vocabulario, ultima) if p != ultima]
+        expansoes.sort(key=lambda p: (-self._frequencia[p], p))
+        return [self._grafia.get(p, p) for p in expansoes[:limite]]
@@ -0,0 +1,58 @@
+# services/cache.py
+
+import os
+import streamlit as st
+
+from services.metricas import medir
+
+# Cache compartilhado entre todas as sessões do processo.
+# TTL (segundos) e limite de entradas por função podem ser ajustados por variável de ambiente.
+CACHE_TTL = int(os.getenv("REDEC_CACHE_TTL", "300"))
+CACHE_MAX_ENTRADAS = int(os.getenv("REDEC_CACHE_MAX_ENTRADAS", "64"))
+
+# tabela -> funções de leitura que consultam diretamente a tabela
+_LEITORES = {}
+# tabela -> funções de leitura que apenas trazem a tabela embutida (ex.: equipe(nome))
+_JUNCOES = {}
+# Chamados a cada invalidação com o nome da tabela (ex.: a réplica local)
+_OUVINTES = []
+
+
+def em_cache(tabela, juncoes=()):
+    """
+    Decorador para funções de leitura do Supabase.
+    Registra a função como dependente de `tabela` (e das tabelas embutidas em
+    `juncoes`) para que as escritas saibam exatamente o que invalidar.
+    """
+    def decorador(func):
+        # "consulta" mede só as faltas de cache (idas ao banco); "leitura", toda chamada
+        consulta = func if getattr(func, "categoria", None) == "consulta" else medir("consulta", func.__name__)(func)
+        cacheada = st.cache_data(ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRADAS, show_spinner=False)(consulta)
+        _LEITORES.setdefault(tabela, []).append(cacheada)
+        for juncao in juncoes:
+            _JUNCOES.setdefault(juncao, []).append(cacheada)
+        leitura = medir("leitura", func.__name__)(cacheada)
+        leitura.clear = cacheada.clear
+        return leitura
+    return decorador
+
+
+def ao_invalidar(func):
+    """Registra `func(tabela)` para ser chamada sempre que uma tabela for invalidada."""
+    _OUVINTES.append(func)
+    return func
+
+
+def invalidar(tabela, juncoes=False):
+    """
+    Descarta as entradas em cache das leituras de `tabela`.
+    Com juncoes=True, descarta também as leituras que embutem dados dessa tabela
+    (necessário quando nome/posto de um militar muda ou ele é excluído).
+    """
+    funcs = list(_LEITORES.get(tabela, []))
+    if juncoes:
+        funcs += _JUNCOES.get(tabela, [])
+    for func in funcs:
+        func.clear()
+    for ouvinte in _OUVINTES:
+        ouvinte(tabela)
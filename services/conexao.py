@@ -0,0 +1,41 @@
+# services/conexao.py
+
+import os
+import httpx
+import streamlit as st
+
+from services.metricas import ganchos_httpx
+
+# Pool HTTP compartilhado por todos os serviços (ajustável por variável de ambiente)
+POOL_MAX_CONEXOES = int(os.getenv("REDEC_POOL_MAX_CONEXOES", "10"))
+POOL_MAX_KEEPALIVE = int(os.getenv("REDEC_POOL_MAX_KEEPALIVE", "5"))
+POOL_KEEPALIVE_EXPIRA = float(os.getenv("REDEC_POOL_KEEPALIVE_EXPIRA", "30"))
+TIMEOUT_CONEXAO = float(os.getenv("REDEC_TIMEOUT_CONEXAO", "5"))
+TIMEOUT_LEITURA = float(os.getenv("REDEC_TIMEOUT_LEITURA", "30"))
+
+
+@st.cache_resource(show_spinner=False)
+def cliente():
+    """
+    Retorna o cliente Supabase único do processo.
+    É criado no primeiro uso (e não na importação dos módulos) e reaproveita
+    as conexões HTTP abertas entre as consultas de todas as sessões.
+    """
+    # Importado aqui: o pacote supabase leva quase um segundo para carregar
+    from supabase import ClientOptions, create_client
+
+    http = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=POOL_MAX_CONEXOES,
+            max_keepalive_connections=POOL_MAX_KEEPALIVE,
+            keepalive_expiry=POOL_KEEPALIVE_EXPIRA,
+        ),
+        timeout=httpx.Timeout(TIMEOUT_LEITURA, connect=TIMEOUT_CONEXAO),
+        # Tempo e bytes de cada requisição, exibidos em Configurações
+        event_hooks=ganchos_httpx(),
+    )
+    opcoes = ClientOptions(
+        postgrest_client_timeout=httpx.Timeout(TIMEOUT_LEITURA, connect=TIMEOUT_CONEXAO),
+        httpx_client=http,
+    )
+    return create_client(st.secrets["SUPABASE_URL"], st.secrets["SUPABASE_KEY"], opcoes)
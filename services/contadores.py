@@ -0,0 +1,60 @@
+# services/contadores.py
+
+import os
+import threading
+import time
+
+import streamlit as st
+
+from services.conexao import cliente
+from services.metricas import medir
+
+# Validade (segundos) dos contadores do Dashboard, compartilhados entre as sessões
+CONTADORES_TTL = int(os.getenv("REDEC_CONTADORES_TTL", "60"))
+
+
+@st.cache_resource(show_spinner=False)
+def _estado():
+    """Último resultado conhecido, compartilhado pelo processo."""
+    return {"valor": None, "instante": 0.0, "atualizando": False, "lock": threading.Lock()}
+
+
+@medir("consulta", "contadores_dashboard")
+def _consultar(conexao):
+    """Todos os contadores em uma única chamada (RPC contadores_dashboard, ver sql/002)."""
+    return conexao.rpc("contadores_dashboard").execute().data or {}
+
+
+def _atualizar(estado, conexao):
+    try:
+        valor = _consultar(conexao)
+        with estado["lock"]:
+            estado["valor"] = valor
+            estado["instante"] = time.monotonic()
+    finally:
+        estado["atualizando"] = False
+
+
+@medir("leitura")
+def buscar_contadores():
+    """
+    Retorna os contadores do Dashboard ({nome: número}).
+    Só a primeira chamada do processo espera pelo banco. Depois disso, vencido o TTL,
+    devolve o valor anterior na hora e atualiza em segundo plano (stale-while-revalidate).
+    """
+    estado = _estado()
+
+    if estado["valor"] is None:
+        _atualizar(estado, cliente())
+        return estado["valor"]
+
+    with estado["lock"]:
+        vencido = time.monotonic() - estado["instante"] > CONTADORES_TTL
+        disparar = vencido and not estado["atualizando"]
+        if disparar:
+            estado["atualizando"] = True
+
+    if disparar:
+        threading.Thread(target=_atualizar, args=(estado, cliente()), daemon=True).start()
+
+    return estado["valor"]
@@ -0,0 +1,189 @@
+# services/disponibilidade.py
+
+from datetime import timedelta
+
+from services.historico import FUNCOES_REDEC
+from services.intervalos import para_data
+
+# Função -> função que assume quando todos os titulares estão afastados
+SUBSTITUICAO = {"Coordenador": "Subcoordenador"}
+
+UM_DIA = timedelta(days=1)
+
+
+class Disponibilidade:
+    """
+    Cruza os mandatos (índice de intervalos do histórico) com os afastamentos de
+    ferias_licencas. Um afastamento cobre [inicio, fim] inclusive, tratado como
+    [inicio, fim + 1 dia) para seguir a convenção semiaberta dos mandatos.
+
+    As consultas varrem apenas o período pedido: o índice devolve os mandatos que o
+    tocam, os afastamentos de cada titular já estão ordenados por servidor, e uma
+    linha de varredura sobre as datas de início e fim produz os trechos em que o
+    efetivo de cada função é constante.
+    """
+
+    def __init__(self, indice, ferias):
+        self.indice = indice
+        # equipe_id -> [(inicio, fim_exclusivo, registro)], em ordem de início
+        self._afastamentos = {}
+        for registro in ferias:
+            inicio, fim = para_data(registro.get("inicio")), para_data(registro.get("fim"))
+            if inicio is None or fim is None or fim < inicio:
+                continue
+            self._afastamentos.setdefault(registro.get("equipe_id"), []).append((inicio, fim + UM_DIA, registro))
+        for lista in self._afastamentos.values():
+            lista.sort(key=lambda a: a[0])
+
+    def afastamentos(self, equipe_id, inicio, fim):
+        """Afastamentos do servidor que tocam [inicio, fim)."""
+        return [a for a in self._afastamentos.get(equipe_id, []) if a[0] < fim and a[1] > inicio]
+
+    def efetivo(self, inicio, fim, funcoes=FUNCOES_REDEC, extra=None):
+        """
+        Trechos de [inicio, fim) com efetivo constante, um dicionário por trecho e função:
+        funcao, inicio, fim (exclusivo), titulares, afastados e disponiveis (listas de
+        equipe_id) e nomes (equipe_id -> "POSTO NOME").
+        `extra` é um afastamento ainda não gravado, (equipe_id, inicio, fim_exclusivo),
+        usado para simular um novo registro antes de salvá-lo.
+        """
+        trechos = []
+        for funcao in funcoes:
+            eventos, nomes = {}, {}
+            for entrada, saida, registro in self.indice.no_periodo(funcao, inicio, fim):
+                militar = registro.get("equipe_id")
+                nomes[militar] = _rotulo(registro)
+                a, b = max(entrada, inicio), min(saida or fim, fim)
+                eventos.setdefault(a, []).append(("titular", 1, militar))
+                eventos.setdefault(b, []).append(("titular", -1, militar))
+                afastamentos = self.afastamentos(militar, a, b)
+                if extra and extra[0] == militar and extra[1] < b and extra[2] > a:
+                    afastamentos = afastamentos + [(extra[1], extra[2], None)]
+                for af_inicio, af_fim, _ in afastamentos:
+                    eventos.setdefault(max(af_inicio, a), []).append(("afastado", 1, militar))
+                    eventos.setdefault(min(af_fim, b), []).append(("afastado", -1, militar))
+            trechos += _varrer(funcao, eventos, inicio, fim, nomes)
+        return trechos
+
+    def conflitos(self, equipe_id, inicio, fim):
+        """
+        Avisos para um novo afastamento de `equipe_id` em [inicio, fim] (inclusive):
+        sobreposição com outro afastamento do próprio servidor, com afastamentos de
+        colegas da mesma função e períodos em que a função ficaria sem ninguém disponível,
+        nem na função substituta (como em coberturas).
+        """
+        fim = fim + UM_DIA
+        avisos = [
+            f"Já possui afastamento ({registro.get('tipo') or 'sem tipo'}) de "
+            f"{_formatar(a)} a {_formatar(b - UM_DIA)}."
+            for a, b, registro in self.afastamentos(equipe_id, inicio, fim)
+        ]
+
+        funcoes = [f for f in FUNCOES_REDEC if any(
+            r.get("equipe_id") == equipe_id for _, _, r in self.indice.no_periodo(f, inicio, fim)
+        )]
+        substitutas = [SUBSTITUICAO[f] for f in funcoes if SUBSTITUICAO.get(f) not in (None, *funcoes)]
+        por_funcao = {}
+        for trecho in self.efetivo(inicio, fim, funcoes + substitutas, extra=(equipe_id, inicio, fim)):
+            por_funcao.setdefault(trecho["funcao"], []).append(trecho)
+
+        for funcao in funcoes:
+            for trecho in por_funcao.get(funcao, []):
+                if equipe_id not in trecho["titulares"]:
+                    continue
+                periodo = f"de {_formatar(trecho['inicio'])} a {_formatar(trecho['fim'] - UM_DIA)}"
+                colegas = [trecho["nomes"][m] for m in trecho["afastados"] if m != equipe_id]
+                if colegas:
+                    avisos.append(f"{funcao}: coincide com o afastamento de {', '.join(colegas)} {periodo}.")
+                if trecho["disponiveis"]:
+                    continue
+                substituta = SUBSTITUICAO.get(funcao)
+                for a, b in _sem_cobertura(trecho, por_funcao.get(substituta) if substituta else None):
+                    avisos.append(f"{funcao}: ficaria sem ninguém disponível "
+                                  f"de {_formatar(a)} a {_formatar(b - UM_DIA)}.")
+        return avisos
+
+    def coberturas(self, inicio, fim):
+        """
+        Quem cobre quem em [inicio, fim): para cada titular afastado, os colegas
+        disponíveis na mesma função ou, se não houver, os da função substituta.
+        """
+        trechos = self.efetivo(inicio, fim)
+        por_funcao = {}
+        for trecho in trechos:
+            por_funcao.setdefault(trecho["funcao"], []).append(trecho)
+
+        coberturas = []
+        for trecho in trechos:
+            for militar in trecho["afastados"]:
+                cobrindo = [trecho["nomes"][m] for m in trecho["disponiveis"]]
+                substituta = SUBSTITUICAO.get(trecho["funcao"])
+                if not cobrindo and substituta:
+                    cobrindo = sorted({
+                        outro["nomes"][m]
+                        for outro in por_funcao.get(substituta, [])
+                        if outro["inicio"] < trecho["fim"] and outro["fim"] > trecho["inicio"]
+                        for m in outro["disponiveis"]
+                    })
+                coberturas.append({
+                    "funcao": trecho["funcao"], "inicio": trecho["inicio"], "fim": trecho["fim"],
+                    "afastado": trecho["nomes"][militar], "cobrindo": cobrindo,
+                })
+        return coberturas
+
+
+def _varrer(funcao, eventos, inicio, fim, nomes):
+    """Linha de varredura: aplica os eventos em ordem de data e emite um trecho por mudança."""
+    titulares, afastados, trechos = {}, {}, []
+    datas = sorted(d for d in eventos if inicio <= d < fim) + [fim]
+    for atual, proxima in zip(datas, datas[1:]):
+        for tipo, sinal, militar in eventos[atual]:
+            contagem = titulares if tipo == "titular" else afastados
+            contagem[militar] = contagem.get(militar, 0) + sinal
+        presentes = sorted(m for m, n in titulares.items() if n > 0)
+        fora = [m for m in presentes if afastados.get(m, 0) > 0]
+        trecho = {
+            "funcao": funcao, "inicio": atual, "fim": proxima, "nomes": nomes,
+            "titulares": presentes, "afastados": fora,
+            "disponiveis": [m for m in presentes if m not in fora],
+        }
+        anterior = trechos[-1] if trechos else None
+        if anterior and anterior["fim"] == atual and anterior["titulares"] == presentes and anterior["afastados"] == fora:
+            anterior["fim"] = proxima
+        else:
+            trechos.append(trecho)
+    # Antes do primeiro evento dentro do período não há titular: a função está vaga
+    if datas[0] > inicio:
+        trechos.insert(0, {
+            "funcao": funcao, "inicio": inicio, "fim": datas[0], "nomes": nomes,
+            "titulares": [], "afastados": [], "disponiveis": [],
+        })
+    return trechos
+
+
+def _sem_cobertura(trecho, substitutos):
+    """
+    Partes de um trecho sem titular disponível em que a função substituta (trechos de
+    `substitutos`, que cobrem todo o período consultado) também não tem ninguém.
+    """
+    if substitutos is None:
+        return [(trecho["inicio"], trecho["fim"])]
+    partes = []
+    for outro in substitutos:
+        a, b = max(outro["inicio"], trecho["inicio"]), min(outro["fim"], trecho["fim"])
+        if a >= b or outro["disponiveis"]:
+            continue
+        if partes and partes[-1][1] == a:
+            partes[-1] = (partes[-1][0], b)
+        else:
+            partes.append((a, b))
+    return partes
+
+
+def _rotulo(registro):
+    membro = registro.get("equipe") or {}
+    return f"{membro.get('posto_graduacao') or ''} {membro.get('nome') or ''}".strip() or "Militar Excluído"
+
+
+def _formatar(data):
+    return data.strftime("%d/%m/%Y")
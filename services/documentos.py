@@ -0,0 +1,229 @@
+# services/documentos.py
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import streamlit as st
+
+from services.conexao import cliente
+from services.metricas import medir
+from services.cache import em_cache, invalidar
+from services.busca import IndiceBusca
+
+SITUACOES_PROCESSO = {"em_andamento": "Em andamento", "concluido": "Concluído", "arquivado": "Arquivado"}
+SITUACOES_BOLETIM = {"pendente": "Pendente", "publicado": "Publicado"}
+
+# Tabela -> tipo do documento na chave do índice de busca
+TIPOS = {"sei_processos": "sei", "boletins": "boletim"}
+
+# Intervalo (segundos) entre buscas de alterações no banco para o índice de busca
+BUSCA_INTERVALO = int(os.getenv("REDEC_BUSCA_INTERVALO", "30"))
+# Intervalo entre reconstruções completas, que descartam documentos excluídos no banco
+BUSCA_RECONSTRUCAO = int(os.getenv("REDEC_BUSCA_RECONSTRUCAO", "3600"))
+# Margem relida a cada atualização, para transações gravadas com horário anterior à marca d'água
+BUSCA_MARGEM = int(os.getenv("REDEC_BUSCA_MARGEM", "300"))
+BUSCA_LOTE = int(os.getenv("REDEC_BUSCA_LOTE", "1000"))
+
+
+# ============================================================
+# LISTAGENS
+# ============================================================
+
+@medir("consulta")
+def consultar_processos_pagina(cursor=None, limite=50, situacao=None):
+    """Processos do mais recente ao mais antigo. Retorna (linhas, proximo_cursor), como as demais paginações."""
+    consulta = cliente().table("sei_processos").select("*")
+    if situacao:
+        consulta = consulta.eq("situacao", situacao)
+    if cursor:
+        consulta = consulta.lt("id", cursor)
+    linhas = consulta.order("id", desc=True).limit(limite + 1).execute().data
+
+    if len(linhas) > limite:
+        return linhas[:limite], linhas[limite - 1]["id"]
+    return linhas, None
+
+buscar_processos_pagina = em_cache("sei_processos")(consultar_processos_pagina)
+
+
+@medir("consulta")
+def consultar_boletins_pagina(cursor=None, limite=50, situacao=None):
+    """Boletins do mais recente ao mais antigo. Retorna (linhas, proximo_cursor), como as demais paginações."""
+    consulta = cliente().table("boletins").select("*, sei_processos(numero)")
+    if situacao:
+        consulta = consulta.eq("situacao", situacao)
+    if cursor:
+        consulta = consulta.lt("id", cursor)
+    linhas = consulta.order("id", desc=True).limit(limite + 1).execute().data
+
+    if len(linhas) > limite:
+        return linhas[:limite], linhas[limite - 1]["id"]
+    return linhas, None
+
+buscar_boletins_pagina = em_cache("boletins", juncoes=("sei_processos",))(consultar_boletins_pagina)
+
+
+# ============================================================
+# ÍNDICE DE BUSCA (UM POR PROCESSO, ATUALIZADO AOS POUCOS)
+# ============================================================
+
+def campos(tabela, linha):
+    """(campos com peso, número exato) de um processo ou boletim para o índice."""
+    if tabela == "sei_processos":
+        return [(linha.get("assunto"), 3), (linha.get("interessado"), 2), (linha.get("unidade"), 1),
+                (linha.get("observacao"), 1)], linha.get("numero")
+    return [(linha.get("titulo"), 3), (linha.get("numero"), 2), (linha.get("texto"), 1)], None
+
+
+def _indexar(indice, tabela, linhas):
+    for linha in linhas:
+        textos, numero = campos(tabela, linha)
+        indice.adicionar((TIPOS[tabela], linha["id"]), textos, numero, linha)
+
+
+@st.cache_resource(show_spinner=False)
+def _estado():
+    """Índice compartilhado pelo processo e as marcas d'água de cada tabela."""
+    return {"indice": None, "marcas": {}, "instante": 0.0, "reconstruido": 0.0,
+            "atualizando": False, "lock": threading.Lock(), "carga": threading.Lock()}
+
+
+@medir("consulta")
+def _ler_alteracoes(supabase, tabela, marca):
+    """Linhas com atualizado_em a partir de `marca` (menos a margem), em lotes por (atualizado_em, id)."""
+    linhas, cursor = [], None
+    while True:
+        consulta = supabase.table(tabela).select("*")
+        if marca:
+            consulta = consulta.gte("atualizado_em", (datetime.fromisoformat(marca)
+                                                      - timedelta(seconds=BUSCA_MARGEM)).isoformat())
+        if cursor:
+            valor, id_ = cursor
+            consulta = consulta.or_(f'atualizado_em.gt."{valor}",and(atualizado_em.eq."{valor}",id.gt.{id_})')
+        lote = consulta.order("atualizado_em").order("id").limit(BUSCA_LOTE).execute().data
+        linhas += lote
+        if len(lote) < BUSCA_LOTE:
+            return linhas
+        cursor = (lote[-1]["atualizado_em"], lote[-1]["id"])
+
+
+def _atualizar(estado, supabase, completa):
+    """Completa: monta um índice novo e troca no fim. Senão, aplica só as alterações."""
+    try:
+        marcas = {} if completa else dict(estado["marcas"])
+        alteracoes = {tabela: _ler_alteracoes(supabase, tabela, marcas.get(tabela)) for tabela in TIPOS}
+        for tabela, linhas in alteracoes.items():
+            if linhas:
+                marcas[tabela] = max([marcas.get(tabela) or ""] + [l["atualizado_em"] for l in linhas])
+
+        if completa:
+            indice = IndiceBusca()
+            for tabela, linhas in alteracoes.items():
+                _indexar(indice, tabela, linhas)
+        agora = time.monotonic()
+        with estado["lock"]:
+            if completa:
+                estado["indice"] = indice
+                estado["reconstruido"] = agora
+            else:
+                for tabela, linhas in alteracoes.items():
+                    _indexar(estado["indice"], tabela, linhas)
+            estado["marcas"] = marcas
+            estado["instante"] = agora
+    finally:
+        estado["atualizando"] = False
+
+
+def _indice():
+    """
+    Estado do índice. Só a primeira chamada do processo espera pelo banco (carga completa).
+    Depois, vencido o intervalo, devolve o índice atual na hora e busca as alterações em
+    segundo plano (como os contadores do Dashboard).
+    """
+    estado = _estado()
+    if estado["indice"] is None:
+        # As sessões que chegarem durante a carga esperam por ela
+        with estado["carga"]:
+            if estado["indice"] is None:
+                estado["atualizando"] = True
+                _atualizar(estado, cliente(), completa=True)
+        return estado
+
+    with estado["lock"]:
+        agora = time.monotonic()
+        completa = agora - estado["reconstruido"] > BUSCA_RECONSTRUCAO
+        disparar = (completa or agora - estado["instante"] > BUSCA_INTERVALO) and not estado["atualizando"]
+        if disparar:
+            estado["atualizando"] = True
+
+    if disparar:
+        threading.Thread(target=_atualizar, args=(estado, cliente(), completa), daemon=True).start()
+    return estado
+
+
+@medir("leitura", "busca_documentos")
+def buscar(consulta, tipo=None, limite=20):
+    """
+    Processos e boletins que casam com a consulta, do mais ao menos relevante,
+    como [(tipo, linha, pontuação)]; `tipo` ("sei" ou "boletim") restringe a um deles.
+    """
+    estado = _indice()
+    with estado["lock"]:
+        resultados = estado["indice"].buscar(consulta, limite, tipo)
+    return [(chave[0], linha, pontuacao) for chave, pontuacao, linha in resultados]
+
+
+def processo_por_numero(numero):
+    """Processo com este número em qualquer grafia ("SEI 270009/123/2024" = "270009-123-2024"), ou None."""
+    estado = _indice()
+    with estado["lock"]:
+        achados = estado["indice"].exato(numero)
+    return achados[0] if achados else None
+
+
+@medir("leitura", "sugerir_documentos")
+def sugerir(texto, limite=8):
+    """Complementos da última palavra digitada, a partir do vocabulário do índice."""
+    estado = _indice()
+    with estado["lock"]:
+        return estado["indice"].sugerir(texto, limite)
+
+
+def _gravado(tabela, resposta):
+    """Leva ao índice, na hora, as linhas que o próprio app gravou, e invalida as listagens."""
+    estado = _estado()
+    with estado["lock"]:
+        if estado["indice"] is not None:
+            _indexar(estado["indice"], tabela, resposta.data or [])
+    invalidar(tabela, juncoes=True)
+    return resposta
+
+
+# ============================================================
+# ESCRITAS
+# ============================================================
+
+@medir("escrita")
+def inserir_processo(dados):
+    return _gravado("sei_processos", cliente().table("sei_processos").insert(dados).execute())
+
+
+@medir("escrita")
+def atualizar_processo(id, dados):
+    return _gravado("sei_processos", cliente().table("sei_processos").update(dados).eq("id", id).execute())
+
+
+@medir("escrita")
+def inserir_boletim(dados):
+    return _gravado("boletins", cliente().table("boletins").insert(dados).execute())
+
+
+@medir("escrita")
+def atualizar_boletim(id, dados):
+    return _gravado("boletins", cliente().table("boletins").update(dados).eq("id", id).execute())
+
+
+def publicar_boletim(id):
+    return atualizar_boletim(id, {"situacao": "publicado", "publicado_em": datetime.now(timezone.utc).isoformat()})
@@ -0,0 +1,186 @@
+# services/estoque.py
+
+import uuid
+from datetime import date, timedelta
+
+from services.conexao import cliente
+from services.metricas import medir
+from services.cache import em_cache, invalidar
+
+# Tipos de movimento do livro-razão (ver sql/007_estoque.sql)
+TIPOS_MOVIMENTO = {"entrada": "Entrada", "saida": "Saída", "transferencia": "Transferência a município"}
+
+# Lotes que vencem em até tantos dias aparecem como "a vencer"
+DIAS_VENCIMENTO = 30
+
+
+# ============================================================
+# LEITURAS
+# ============================================================
+
+@em_cache("estoque_itens")
+def buscar_itens():
+    """Catálogo de itens. O saldo de cada item vem dos lotes (buscar_lotes), não daqui."""
+    return cliente().table("estoque_itens") \
+        .select("id, nome, unidade, categoria, estoque_minimo, ativo") \
+        .order("nome") \
+        .execute().data
+
+
+@em_cache("estoque_movimentos")
+def buscar_lotes():
+    """
+    Lotes com saldo, já em ordem FEFO por item (índice estoque_lotes_fefo).
+    O saldo é o materializado pelo gatilho: ler não soma o livro-razão.
+    """
+    return cliente().table("estoque_lotes") \
+        .select("id, item_id, codigo, validade, saldo") \
+        .gt("saldo", 0) \
+        .order("item_id") \
+        .order("validade") \
+        .order("id") \
+        .execute().data
+
+
+@medir("consulta")
+def consultar_movimentos_pagina(cursor=None, limite=50, item_id=None, tipo=None):
+    """
+    Uma página do livro-razão, do movimento mais recente para o mais antigo
+    (cursor = id do último movimento da página anterior; índice por item e id).
+    Retorna (linhas, proximo_cursor), como as demais paginações.
+    """
+    consulta = cliente().table("estoque_movimentos") \
+        .select("*, estoque_itens(nome, unidade), estoque_lotes(codigo, validade)")
+    if item_id:
+        consulta = consulta.eq("item_id", item_id)
+    if tipo:
+        consulta = consulta.eq("tipo", tipo)
+    if cursor:
+        consulta = consulta.lt("id", cursor)
+    linhas = consulta.order("id", desc=True).limit(limite + 1).execute().data
+
+    if len(linhas) > limite:
+        return linhas[:limite], linhas[limite - 1]["id"]
+    return linhas, None
+
+buscar_movimentos_pagina = em_cache("estoque_movimentos", juncoes=("estoque_itens",))(consultar_movimentos_pagina)
+
+
+# ============================================================
+# SALDOS, FEFO E ALERTAS (SOBRE OS LOTES JÁ CARREGADOS)
+# ============================================================
+
+def lotes_por_item(lotes):
+    """item_id -> lotes com saldo, mantendo a ordem FEFO da consulta."""
+    por_item = {}
+    for lote in lotes:
+        por_item.setdefault(lote["item_id"], []).append(lote)
+    return por_item
+
+
+def saldos(lotes):
+    """item_id -> saldo total."""
+    return {item_id: sum(float(l["saldo"]) for l in lista) for item_id, lista in lotes_por_item(lotes).items()}
+
+
+def plano_fefo(lotes_do_item, quantidade):
+    """
+    Prévia da saída: [(lote, quantidade retirada)] seguindo a mesma ordem que
+    saida_estoque usa no banco, e quanto faltaria se o saldo não bastar.
+    """
+    plano, restante = [], quantidade
+    for lote in lotes_do_item:
+        if restante <= 0:
+            break
+        retirar = min(float(lote["saldo"]), restante)
+        plano.append((lote, retirar))
+        restante -= retirar
+    return plano, max(restante, 0)
+
+
+def abaixo_do_minimo(itens, lotes):
+    """Itens ativos com saldo abaixo do estoque mínimo (o mesmo critério do contador do Dashboard)."""
+    totais = saldos(lotes)
+    return [dict(i, saldo=totais.get(i["id"], 0)) for i in itens
+            if i.get("ativo") and totais.get(i["id"], 0) < float(i["estoque_minimo"] or 0)]
+
+
+def a_vencer(lotes, dias=DIAS_VENCIMENTO, hoje=None):
+    """Lotes com saldo e validade até `dias` a partir de hoje (inclui os vencidos), do mais urgente ao menos."""
+    limite = str((hoje or date.today()) + timedelta(days=dias))
+    return sorted((l for l in lotes if l.get("validade") and l["validade"] <= limite), key=lambda l: l["validade"])
+
+
+# ============================================================
+# ESCRITAS (RPC IDEMPOTENTES, TAMBÉM ACEITAS PELA FILA)
+# ============================================================
+
+def parametros_entrada(item_id, quantidade, codigo_lote="", validade=None, documento=None, observacao=None):
+    """Parâmetros da RPC entrada_estoque (também gravados na fila de escritas, services/fila.py)."""
+    return {
+        "p_item_id": item_id,
+        "p_quantidade": quantidade,
+        "p_codigo_lote": codigo_lote or "",
+        "p_validade": str(validade) if validade else None,
+        "p_documento": documento or None,
+        "p_observacao": observacao or None,
+    }
+
+
+def parametros_saida(item_id, quantidade, tipo="saida", municipio=None, documento=None, observacao=None):
+    """Parâmetros da RPC saida_estoque; tipo "transferencia" exige o município de destino."""
+    if tipo not in ("saida", "transferencia"):
+        raise ValueError(f"Tipo de saída inválido: {tipo}")
+    if tipo == "transferencia" and not municipio:
+        raise ValueError("Informe o município de destino da transferência.")
+    return {
+        "p_item_id": item_id,
+        "p_quantidade": quantidade,
+        "p_tipo": tipo,
+        "p_municipio": municipio or None,
+        "p_documento": documento or None,
+        "p_observacao": observacao or None,
+    }
+
+
+def _movimentar(rpc, parametros):
+    parametros = dict(parametros)
+    parametros.setdefault("p_chave_idempotencia", str(uuid.uuid4()))
+    resposta = cliente().rpc(rpc, parametros).execute()
+    invalidar("estoque_movimentos")
+    return resposta
+
+
+@medir("escrita")
+def registrar_entrada(parametros):
+    """Entrada em um lote (criado se ainda não existir); o saldo é atualizado no banco."""
+    return _movimentar("entrada_estoque", parametros)
+
+
+@medir("escrita")
+def registrar_saida(parametros):
+    """Saída ou transferência, consumindo os lotes em ordem FEFO. Sem saldo, o banco recusa tudo."""
+    return _movimentar("saida_estoque", parametros)
+
+
+@medir("escrita")
+def inserir_item(dados):
+    resposta = cliente().table("estoque_itens").insert(dados).execute()
+    invalidar("estoque_itens")
+    return resposta
+
+
+@medir("escrita")
+def atualizar_item(id, dados):
+    resposta = cliente().table("estoque_itens").update(dados).eq("id", id).execute()
+    # Nome e unidade aparecem no extrato (estoque_itens(...) embutido)
+    invalidar("estoque_itens", juncoes=True)
+    return resposta
+
+
+@medir("escrita")
+def conferir_saldos():
+    """Refaz os saldos a partir do livro-razão; retorna quantos lotes estavam divergentes."""
+    divergentes = cliente().rpc("recalcular_saldos_estoque").execute().data
+    invalidar("estoque_movimentos")
+    return divergentes
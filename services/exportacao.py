@@ -0,0 +1,187 @@
+# services/exportacao.py
+
+import csv
+import io
+import os
+import tempfile
+
+import pandas as pd
+
+from services.supabase import consultar_equipe_pagina
+from services.historico import consultar_historico_pagina
+from services.ferias import consultar_ferias_pagina
+
+# Linhas buscadas por consulta: durante a geração, só um lote de linhas fica em memória.
+# O arquivo pronto é devolvido inteiro em bytes (o st.download_button não aceita fluxo),
+# então o tamanho da exportação é limitado pela memória do servidor.
+TAMANHO_LOTE = int(os.getenv("REDEC_EXPORT_LOTE", "1000"))
+
+# Formato -> (extensão, MIME)
+FORMATOS = {
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "XLSX": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+# Tabela -> (consulta paginada, colunas exportadas e seus tipos)
+TABELAS = {
+    "equipe": (consultar_equipe_pagina, {
+        "id": "texto", "nome": "texto", "nome_guerra": "texto", "posto_graduacao": "texto",
+        "rg": "texto", "id_funcional": "texto", "quadro_qbmp": "texto", "telefone": "texto",
+        "ativo": "logico",
+    }),
+    "historico_redec": (consultar_historico_pagina, {
+        "id": "texto", "equipe_id": "texto", "militar": "texto", "funcao": "texto",
+        "data_entrada": "data", "data_saida": "data",
+    }),
+    "ferias_licencas": (consultar_ferias_pagina, {
+        "id": "texto", "equipe_id": "texto", "militar": "texto", "tipo": "texto",
+        "inicio": "data", "fim": "data", "observacao": "texto",
+    }),
+}
+
+FORMATO_DATA = "%d/%m/%Y"
+
+
+def normalizar(linhas, colunas):
+    """
+    Converte um lote da API em DataFrame plano com colunas e tipos fixos
+    (o esquema não pode variar entre lotes num arquivo Parquet).
+    O equipe(...) embutido vira a coluna "militar" (posto + nome).
+    """
+    df = pd.DataFrame(linhas)
+    if "equipe" in df:
+        eq = df["equipe"]
+        df["militar"] = (eq.str.get("posto_graduacao").fillna("") + " " + eq.str.get("nome").fillna("")).str.strip()
+
+    saida = pd.DataFrame(index=df.index)
+    for coluna, tipo in colunas.items():
+        serie = df[coluna] if coluna in df else pd.Series(None, index=df.index, dtype=object)
+        if tipo == "data":
+            saida[coluna] = pd.to_datetime(serie.replace("", None), format="ISO8601", errors="coerce")
+        elif tipo == "logico":
+            saida[coluna] = serie.astype("boolean")
+        else:
+            saida[coluna] = serie.astype("string")
+    return saida
+
+
+def lotes(tabela, **filtros):
+    """
+    Percorre a tabela inteira pelo cursor da paginação, um DataFrame por lote.
+    O primeiro lote é sempre produzido (mesmo vazio) para que o arquivo tenha cabeçalho.
+    """
+    consultar, colunas = TABELAS[tabela]
+    cursor, primeiro = None, True
+    while True:
+        linhas, cursor = consultar(cursor=cursor, limite=TAMANHO_LOTE, **filtros)
+        if linhas or primeiro:
+            yield normalizar(linhas, colunas)
+            primeiro = False
+        if cursor is None:
+            return
+
+
+def formatar_para_texto(df):
+    """Datas como dd/mm/aaaa e vazios como "" (CSV e XLSX)."""
+    df = df.copy()
+    for coluna in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[coluna]):
+            df[coluna] = df[coluna].dt.strftime(FORMATO_DATA)
+    return df.astype(object).where(df.notna(), "")
+
+
+# ============================================================
+# ESCRITORES (recebem lotes e gravam num arquivo temporário)
+# ============================================================
+
+def _csv(secoes, arquivo):
+    texto = io.TextIOWrapper(arquivo, encoding="utf-8", newline="")
+    escritor = csv.writer(texto)
+    for titulo, dfs in secoes:
+        if titulo:
+            escritor.writerow([f"# {titulo}"])
+        cabecalho = True
+        for df in dfs:
+            df = formatar_para_texto(df)
+            if cabecalho:
+                escritor.writerow(df.columns)
+                cabecalho = False
+            escritor.writerows(df.itertuples(index=False, name=None))
+        if titulo:
+            escritor.writerow([])
+    texto.flush()
+    texto.detach()
+
+
+def _parquet(secoes, arquivo):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    (_, dfs), = secoes
+    gravador = None
+    for df in dfs:
+        lote = pa.Table.from_pandas(df, preserve_index=False)
+        if gravador is None:
+            gravador = pq.ParquetWriter(arquivo, lote.schema)
+        gravador.write_table(lote.cast(gravador.schema))
+    if gravador is not None:
+        gravador.close()
+
+
+def _xlsx(secoes, arquivo):
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise RuntimeError("Exportação XLSX requer o pacote openpyxl (pip install openpyxl).")
+
+    # write_only: as linhas vão para o disco à medida que são adicionadas
+    livro = Workbook(write_only=True)
+    for titulo, dfs in secoes:
+        planilha = livro.create_sheet(title=(titulo or "Dados")[:31])
+        cabecalho = True
+        for df in dfs:
+            df = formatar_para_texto(df)
+            if cabecalho:
+                planilha.append(list(df.columns))
+                cabecalho = False
+            for linha in df.itertuples(index=False, name=None):
+                planilha.append(list(linha))
+    livro.save(arquivo)
+
+
+ESCRITORES = {"CSV": _csv, "Parquet": _parquet, "XLSX": _xlsx}
+
+
+def _gravar(secoes, formato):
+    """
+    Grava no arquivo temporário lote a lote e devolve o conteúdo inteiro em bytes,
+    o que o st.download_button aceita: o arquivo pronto ocupa memória até o download.
+    """
+    with tempfile.TemporaryFile() as arquivo:
+        ESCRITORES[formato](secoes, arquivo)
+        arquivo.seek(0)
+        return arquivo.read()
+
+
+def exportar(tabela, formato, **filtros):
+    """
+    Exporta uma tabela completa no formato escolhido (CSV, Parquet ou XLSX),
+    lote a lote, direto da consulta paginada para um arquivo temporário.
+    Retorna o conteúdo do arquivo em bytes (inteiro em memória).
+    """
+    return _gravar([(None, lotes(tabela, **filtros))], formato)
+
+
+def ficha_funcional(equipe_id, formato):
+    """
+    Ficha funcional de um militar: cadastro, histórico de funções e afastamentos.
+    Em XLSX cada parte é uma planilha; em CSV, uma seção com título no mesmo arquivo.
+    """
+    if formato not in ("CSV", "XLSX"):
+        raise ValueError("A ficha funcional é gerada em CSV ou XLSX.")
+    return _gravar([
+        ("Cadastro", lotes("equipe", equipe_id=equipe_id)),
+        ("Funções", lotes("historico_redec", equipe_id=equipe_id)),
+        ("Afastamentos", lotes("ferias_licencas", equipe_id=equipe_id)),
+    ], formato)
@@ -1,18 +1,66 @@
 # services/ferias.py
 
-from supabase import create_client
-import streamlit as st
+from services.conexao import cliente
+from services.metricas import medir
+from services.cache import em_cache, invalidar
+from services.historico import filtro_cursor
+from services import replica
 
-url = st.secrets["SUPABASE_URL"]
-key = st.secrets["SUPABASE_KEY"]
+@em_cache("ferias_licencas", juncoes=("equipe",))
+def buscar_ferias():
+    return replica.ler(
+        lambda: cliente().table("ferias_licencas")
+            .select("*, equipe(nome)")
+            .order("inicio", desc=True)
+            .execute().data,
+        ("ferias_licencas", "equipe"),
+        lambda ferias, equipe: replica.ordenar(
+            replica.embutir_equipe(ferias, equipe, ("nome",)), "inicio", desc=True
+        )
+    )
 
-supabase = create_client(url, key)
+@medir("consulta")
+def consultar_ferias_pagina(cursor=None, limite=50, equipe_id=None, desde=None, ate=None):
+    """
+    Uma página de afastamentos, ordenada no banco por (inicio, id) decrescente.
+    Sem cache: usada diretamente pela exportação; as telas usam buscar_ferias_pagina.
+    `cursor` é o par (inicio, id) da última linha da página anterior (None na primeira).
+    O intervalo desde/ate seleciona afastamentos que se sobrepõem ao período.
+    Retorna (linhas, proximo_cursor); proximo_cursor é None na última página.
+    """
+    consulta = cliente().table("ferias_licencas") \
+        .select("id, equipe_id, tipo, inicio, fim, observacao, equipe(nome, posto_graduacao)")
+    if equipe_id:
+        consulta = consulta.eq("equipe_id", equipe_id)
+    if desde:
+        consulta = consulta.gte("fim", str(desde))
+    if ate:
+        consulta = consulta.lte("inicio", str(ate))
+    if cursor:
+        consulta = consulta.or_(filtro_cursor("inicio", cursor))
 
-def buscar_ferias():
-    return supabase.table("ferias_licencas") \
-        .select("*, equipe(nome)") \
-        .order("inicio", desc=True) \
+    linhas = consulta.order("inicio", desc=True) \
+        .order("id", desc=True) \
+        .limit(limite + 1) \
         .execute().data
 
+    if len(linhas) > limite:
+        ultima = linhas[limite - 1]
+        return linhas[:limite], (ultima["inicio"], ultima["id"])
+    return linhas, None
+
+@em_cache("ferias_licencas", juncoes=("equipe",))
+def buscar_ferias_pagina(cursor=None, limite=50, equipe_id=None, desde=None, ate=None):
+    """A mesma página, lida da réplica local quando ela está atualizada."""
+    return replica.ler_pagina(
+        lambda: consultar_ferias_pagina(cursor, limite, equipe_id, desde, ate),
+        "ferias_licencas", cursor, limite, ("nome", "posto_graduacao"),
+        # Afastamentos que se sobrepõem ao período, como na consulta remota
+        [("equipe_id", "=", equipe_id), ("data_fim", ">=", desde), ("data_inicio", "<=", ate)]
+    )
+
+@medir("escrita")
 def inserir_ferias(dados):
-    return supabase.table("ferias_licencas").insert(dados).execute()
+    resposta = cliente().table("ferias_licencas").insert(dados).execute()
+    invalidar("ferias_licencas")
+    return resposta
@@ -0,0 +1,330 @@
+# services/fila.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+import httpx
+import streamlit as st
+from postgrest.exceptions import APIError
+
+from services.metricas import medir
+from services.cache import invalidar
+from services.conexao import cliente
+
+# Fila persistente (SQLite) das inserções feitas pelos formulários.
+# Desativada se REDEC_FILA (caminho do arquivo .sqlite) não estiver definido:
+# nesse caso as inserções continuam síncronas.
+FILA_CAMINHO = os.getenv("REDEC_FILA", "")
+# Registros enviados por requisição (upsert em lote)
+FILA_LOTE = int(os.getenv("REDEC_FILA_LOTE", "50"))
+# Espera entre tentativas: dobra a cada falha, até FILA_ESPERA_MAX (segundos)
+FILA_ESPERA = int(os.getenv("REDEC_FILA_ESPERA", "5"))
+FILA_ESPERA_MAX = int(os.getenv("REDEC_FILA_ESPERA_MAX", "300"))
+# Falhas recusadas pelo banco (não de rede) antes de desistir do registro
+FILA_TENTATIVAS = int(os.getenv("REDEC_FILA_TENTATIVAS", "5"))
+
+# Destino -> tabela afetada. Destinos que não são tabelas são funções RPC,
+# chamadas uma a uma com os parâmetros gravados.
+DESTINOS = {
+    "equipe": "equipe",
+    "historico_redec": "historico_redec",
+    "ferias_licencas": "ferias_licencas",
+    "trocar_funcao": "historico_redec",
+    "entrada_estoque": "estoque_movimentos",
+    "saida_estoque": "estoque_movimentos",
+    # Chega com o instante do fato (p_registrado_em). Se outro registro mais novo da mesma
+    # viatura já foi aplicado, o resumo da viatura é refeito na ordem dos fatos e este é
+    # conferido com a situação daquele instante (ver reaplicar_viatura em sql/008).
+    "registrar_viatura": "viaturas_registros",
+}
+
+# Chamadas que dependem da ordem: destino -> (recurso, parâmetro que o identifica).
+# Enquanto uma chamada não é confirmada, as seguintes do mesmo recurso esperam por ela.
+RECURSOS = {
+    "trocar_funcao": ("funcao", "p_funcao"),
+    "entrada_estoque": ("item", "p_item_id"),
+    "saida_estoque": ("item", "p_item_id"),
+    "registrar_viatura": ("viatura", "p_viatura_id"),
+}
+
+# Respostas de banco fora do ar ou sobrecarregado: o registro espera sem gastar tentativa.
+# Status HTTP (timeout, limite de requisições, 5xx) e códigos do PostgREST/Postgres:
+# sem conexão com o banco (PGRST000-003), conexão (08), recursos (53), servidor
+# parando (57P), conflito de concorrência (40001, 40P01).
+STATUS_TRANSITORIOS = {408, 429}
+CODIGOS_TRANSITORIOS = ("PGRST000", "PGRST001", "PGRST002", "PGRST003", "08", "53", "57P", "40001", "40P01")
+
+# Coluna (tabelas) ou parâmetro (RPC) com a chave de idempotência, ver sql/005
+COLUNA_CHAVE = "chave_idempotencia"
+PARAMETRO_CHAVE = "p_chave_idempotencia"
+
+# Acorda o enviador assim que algo é enfileirado
+_acordar = threading.Event()
+
+
+def ativa():
+    return bool(FILA_CAMINHO)
+
+
+def _conectar():
+    conexao = sqlite3.connect(FILA_CAMINHO, timeout=30)
+    conexao.execute("pragma journal_mode=wal")
+    conexao.execute("""
+        create table if not exists pendentes (
+            chave text primary key,
+            destino text not null,
+            dados text not null,
+            criado_em real not null,
+            tentativas integer not null default 0,
+            proxima_tentativa real not null default 0,
+            erro text,
+            situacao text not null default 'pendente'
+        )
+    """)
+    return conexao
+
+
+# ============================================================
+# ENFILEIRAR
+# ============================================================
+
+def enfileirar(destino, dados):
+    """
+    Grava a operação no diário local e retorna na hora com a chave de idempotência.
+    A chave vai junto no envio: reenviar um registro que já chegou ao banco não o duplica.
+    """
+    chave = str(uuid.uuid4())
+    campo = PARAMETRO_CHAVE if destino in RPC else COLUNA_CHAVE
+    conexao = _conectar()
+    try:
+        conexao.execute(
+            "insert into pendentes (chave, destino, dados, criado_em) values (?, ?, ?, ?)",
+            (chave, destino, json.dumps(dict(dados, **{campo: chave}), default=str), time.time())
+        )
+        conexao.commit()
+    finally:
+        conexao.close()
+    iniciar_enviador()
+    _acordar.set()
+    return chave
+
+
+# ============================================================
+# ENVIO
+# ============================================================
+
+def _inserir(supabase, destino, registros):
+    return supabase.table(destino) \
+        .upsert(registros, on_conflict=COLUNA_CHAVE, ignore_duplicates=True) \
+        .execute()
+
+
+def _chamar_rpc(supabase, destino, registros):
+    for parametros in registros:
+        supabase.rpc(destino, parametros).execute()
+
+
+RPC = {"trocar_funcao": _chamar_rpc, "entrada_estoque": _chamar_rpc, "saida_estoque": _chamar_rpc,
+       "registrar_viatura": _chamar_rpc}
+
+
+def _recurso(destino, dados):
+    """(recurso, id) de uma chamada que depende da ordem, ou None."""
+    if destino not in RECURSOS:
+        return None
+    recurso, parametro = RECURSOS[destino]
+    return recurso, json.loads(dados).get(parametro)
+
+
+def _prontos(conexao):
+    """
+    Pendentes cuja espera terminou, na ordem em que foram registrados. Uma chamada
+    fica para depois enquanto outra anterior do mesmo recurso (função, item, viatura)
+    não foi confirmada, esperando nova tentativa ou marcada como "falhou".
+    """
+    agora = time.time()
+    prontos, bloqueados = [], set()
+    for chave, destino, dados, tentativas, estado, proxima in conexao.execute("""
+        select chave, destino, dados, tentativas, situacao, proxima_tentativa from pendentes
+         order by criado_em
+    """):
+        recurso = _recurso(destino, dados)
+        if estado != "pendente" or proxima > agora:
+            if recurso:
+                bloqueados.add(recurso)
+        elif not recurso or recurso not in bloqueados:
+            prontos.append((chave, destino, dados, tentativas))
+    return prontos
+
+
+def _lotes(prontos):
+    """Agrupa inserções consecutivas do mesmo destino; cada chamada RPC vai sozinha."""
+    lote = []
+    for item in prontos:
+        if lote and (item[1] != lote[0][1] or item[1] in RPC or len(lote) >= FILA_LOTE):
+            yield lote
+            lote = []
+        lote.append(item)
+    if lote:
+        yield lote
+
+
+def _enviar_lote(supabase, lote):
+    destino = lote[0][1]
+    enviar = RPC.get(destino, _inserir)
+    enviar(supabase, destino, [json.loads(dados) for _, _, dados, _ in lote])
+
+
+def _transitoria(erro):
+    """Falha de rede ou de banco indisponível, que não diz nada sobre o registro."""
+    if isinstance(erro, httpx.TransportError):
+        return True
+    if isinstance(erro, httpx.HTTPStatusError):
+        status = erro.response.status_code
+    elif isinstance(erro, APIError):
+        # Sem corpo JSON (gateway, limite de requisições), o PostgREST põe o status HTTP no código
+        if str(erro.code or "").startswith(CODIGOS_TRANSITORIOS):
+            return True
+        status = int(erro.code) if str(erro.code or "").isdigit() else 0
+    else:
+        return False
+    return status in STATUS_TRANSITORIOS or status >= 500
+
+
+@medir("escrita")
+def enviar_pendentes(supabase=None):
+    """
+    Envia os registros prontos, em lotes por destino. Sem conexão ou com o banco
+    indisponível, para e deixa tudo para a próxima rodada. Se o banco recusar um lote
+    de inserções, os registros são reenviados um a um para que só o inválido conte
+    tentativa; uma chamada RPC recusada segura as seguintes do mesmo recurso.
+    Retorna quantos registros foram enviados.
+    """
+    supabase = supabase or cliente()
+    conexao = _conectar()
+    enviados, tabelas, recusados = 0, set(), set()
+    try:
+        for lote in _lotes(_prontos(conexao)):
+            recurso = _recurso(lote[0][1], lote[0][2])
+            if recurso and recurso in recusados:
+                continue
+            confirmados, parar = [], False
+            try:
+                _enviar_lote(supabase, lote)
+                confirmados = lote
+            except Exception as erro:
+                if _transitoria(erro):
+                    _adiar(conexao, lote, erro, contar=False)
+                    break
+                if len(lote) == 1:
+                    _adiar(conexao, lote, erro, contar=True)
+                    if recurso:
+                        recusados.add(recurso)
+                else:
+                    for item in lote:
+                        try:
+                            _enviar_lote(supabase, [item])
+                            confirmados.append(item)
+                        except Exception as erro_item:
+                            parar = _transitoria(erro_item)
+                            _adiar(conexao, [item], erro_item, contar=not parar)
+                            if parar:
+                                break
+
+            conexao.executemany("delete from pendentes where chave = ?", [(item[0],) for item in confirmados])
+            conexao.commit()
+            enviados += len(confirmados)
+            tabelas.update(DESTINOS[item[1]] for item in confirmados)
+            if parar:
+                break
+    finally:
+        conexao.close()
+
+    for tabela in tabelas:
+        invalidar(tabela)
+    return enviados
+
+
+def _adiar(conexao, lote, erro, contar):
+    """
+    Registra a falha. Sem conexão ou banco indisponível (contar=False), o registro só
+    espera a próxima rodada; recusado pelo banco, espera em dobro a cada tentativa e,
+    esgotadas, fica como "falhou".
+    """
+    for chave, _, _, tentativas in lote:
+        if contar:
+            tentativas += 1
+            espera = min(FILA_ESPERA * 2 ** (tentativas - 1), FILA_ESPERA_MAX)
+        else:
+            espera = 0
+        situacao = "falhou" if tentativas >= FILA_TENTATIVAS else "pendente"
+        conexao.execute("""
+            update pendentes set tentativas = ?, proxima_tentativa = ?, erro = ?, situacao = ?
+             where chave = ?
+        """, (tentativas, time.time() + espera, str(erro), situacao, chave))
+    conexao.commit()
+
+
+@st.cache_resource(show_spinner=False)
+def iniciar_enviador():
+    """Thread única por processo que esvazia a fila (inclusive o que sobrou de execuções anteriores)."""
+    supabase = cliente()
+
+    def ciclo():
+        while True:
+            try:
+                enviar_pendentes(supabase)
+            except Exception:
+                pass
+            _acordar.wait(FILA_ESPERA)
+            _acordar.clear()
+
+    thread = threading.Thread(target=ciclo, name="fila-redec", daemon=True)
+    thread.start()
+    return thread
+
+
+# ============================================================
+# SITUAÇÃO (EXIBIDA NA TELA)
+# ============================================================
+
+def situacao():
+    """Registros ainda não confirmados pelo banco, do mais antigo ao mais recente."""
+    conexao = _conectar()
+    try:
+        return [
+            {"chave": chave, "destino": destino, "dados": json.loads(dados), "criado_em": criado_em,
+             "tentativas": tentativas, "erro": erro, "situacao": estado}
+            for chave, destino, dados, criado_em, tentativas, erro, estado in conexao.execute(
+                "select chave, destino, dados, criado_em, tentativas, erro, situacao from pendentes order by criado_em"
+            )
+        ]
+    finally:
+        conexao.close()
+
+
+def tentar_novamente(chave=None):
+    """Devolve à fila os registros que falharam (ou só `chave`) e antecipa o envio."""
+    conexao = _conectar()
+    try:
+        conexao.execute("""
+            update pendentes set situacao = 'pendente', tentativas = 0, proxima_tentativa = 0
+             where ? is null or chave = ?
+        """, (chave, chave))
+        conexao.commit()
+    finally:
+        conexao.close()
+    _acordar.set()
+
+
+def descartar(chave):
+    conexao = _conectar()
+    try:
+        conexao.execute("delete from pendentes where chave = ?", (chave,))
+        conexao.commit()
+    finally:
+        conexao.close()
@@ -1,48 +1,143 @@
 # services/historico.py
 
 from datetime import date
-from services.supabase import supabase
+from services.conexao import cliente
+from services.metricas import medir
+from services.cache import em_cache, invalidar
+from services import replica
 
 # Apenas o Coordenador exige a lógica de encerrar o anterior na mesma data
 # O Subcoordenador agora segue o fluxo normal, conforme sua solicitação
 FUNCAO_COM_SUCESSAO_ESTRITA = "Coordenador"
 
+# Cargos exibidos no painel da equipe
+FUNCOES_REDEC = ["Coordenador", "Subcoordenador", "Oficial Administrativo", "Praça Administrativo"]
+
+@em_cache("historico_redec", juncoes=("equipe",))
 def buscar_historico():
     """Busca todo o histórico de funções com os dados do militar vinculado."""
-    return supabase.table("historico_redec") \
-        .select("*, equipe(nome, posto_graduacao)") \
-        .order("data_entrada", desc=True) \
+    return replica.ler(
+        lambda: cliente().table("historico_redec")
+            .select("*, equipe(nome, posto_graduacao)")
+            .order("data_entrada", desc=True)
+            .execute().data,
+        ("historico_redec", "equipe"),
+        lambda historico, equipe: replica.ordenar(
+            replica.embutir_equipe(historico, equipe, ("nome", "posto_graduacao")), "data_entrada", desc=True
+        )
+    )
+
+@em_cache("historico_redec", juncoes=("equipe",))
+def buscar_ocupantes_atuais():
+    """
+    Busca em uma única consulta os ocupantes atuais (data_saida nula) de todos os cargos.
+    Traz apenas as colunas usadas nos cards, então o custo depende do número de
+    mandatos em aberto e não do tamanho do histórico.
+    """
+    return replica.ler(
+        lambda: cliente().table("historico_redec")
+            .select("id, funcao, equipe_id, data_entrada, equipe(nome, posto_graduacao)")
+            .in_("funcao", FUNCOES_REDEC)
+            .is_("data_saida", "null")
+            .order("data_entrada", desc=True)
+            .execute().data,
+        ("historico_redec", "equipe"),
+        lambda historico, equipe: replica.ordenar(replica.embutir_equipe(
+            [h for h in historico if h["funcao"] in FUNCOES_REDEC and not h.get("data_saida")],
+            equipe, ("nome", "posto_graduacao")
+        ), "data_entrada", desc=True)
+    )
+
+def filtro_cursor(coluna, cursor):
+    """
+    Filtro PostgREST (or=...) para a página seguinte em ordem decrescente de (coluna, id).
+    O valor vai entre aspas porque datas com hora têm ':' e '+'.
+    """
+    valor, id_ = cursor
+    return f'{coluna}.lt."{valor}",and({coluna}.eq."{valor}",id.lt.{id_})'
+
+@medir("consulta")
+def consultar_historico_pagina(cursor=None, limite=50, funcao=None, equipe_id=None, desde=None, ate=None):
+    """
+    Uma página do histórico, ordenada no banco por (data_entrada, id) decrescente.
+    Sem cache: usada diretamente pela exportação; as telas usam buscar_historico_pagina.
+    `cursor` é o par (data_entrada, id) da última linha da página anterior (None na primeira).
+    Filtros opcionais: função, militar e intervalo de data_entrada.
+    Retorna (linhas, proximo_cursor); proximo_cursor é None na última página.
+    """
+    consulta = cliente().table("historico_redec") \
+        .select("*, equipe(nome, posto_graduacao)")
+    if funcao:
+        consulta = consulta.eq("funcao", funcao)
+    if equipe_id:
+        consulta = consulta.eq("equipe_id", equipe_id)
+    if desde:
+        consulta = consulta.gte("data_entrada", str(desde))
+    if ate:
+        consulta = consulta.lte("data_entrada", str(ate))
+    if cursor:
+        consulta = consulta.or_(filtro_cursor("data_entrada", cursor))
+
+    # Um registro a mais indica se existe próxima página
+    linhas = consulta.order("data_entrada", desc=True) \
+        .order("id", desc=True) \
+        .limit(limite + 1) \
         .execute().data
 
+    if len(linhas) > limite:
+        ultima = linhas[limite - 1]
+        return linhas[:limite], (ultima["data_entrada"], ultima["id"])
+    return linhas, None
+
+@em_cache("historico_redec", juncoes=("equipe",))
+def buscar_historico_pagina(cursor=None, limite=50, funcao=None, equipe_id=None, desde=None, ate=None):
+    """A mesma página, lida da réplica local quando ela está atualizada."""
+    return replica.ler_pagina(
+        lambda: consultar_historico_pagina(cursor, limite, funcao, equipe_id, desde, ate),
+        "historico_redec", cursor, limite, ("nome", "posto_graduacao"),
+        [("funcao", "=", funcao), ("equipe_id", "=", equipe_id),
+         ("data_inicio", ">=", desde), ("data_inicio", "<=", ate)]
+    )
+
+@medir("escrita")
 def inserir_historico(dados):
     """Insere um novo registro de função no histórico."""
-    return supabase.table("historico_redec").insert(dados).execute()
+    resposta = cliente().table("historico_redec").insert(dados).execute()
+    invalidar("historico_redec")
+    return resposta
 
+@medir("escrita")
 def encerrar_mandato_anterior(funcao, data_saida):
     """
     Localiza o ocupante atual (data_saida nula) da função e define sua saída.
     A data de saída será exatamente a data de entrada do novo sucessor.
     """
-    return supabase.table("historico_redec") \
+    resposta = cliente().table("historico_redec") \
         .update({"data_saida": str(data_saida)}) \
         .eq("funcao", funcao) \
         .is_("data_saida", "null") \
         .execute()
+    invalidar("historico_redec")
+    return resposta
 
+@medir("escrita")
 def trocar_funcao(equipe_id, funcao, data_entrada):
     """
-    Lógica de troca de função. 
+    Lógica de troca de função, executada no banco em uma única chamada (RPC trocar_funcao,
+    ver sql/001_trocar_funcao.sql): encerrar o anterior e inserir o novo são atômicos.
     Se for Coordenador, encerra o anterior automaticamente para não haver vacância.
+    Retorna a resposta com o novo registro (data_saida nula, o atual "Ativo").
     """
-    # Lógica de continuidade automática apenas para o Coordenador
-    if funcao == FUNCAO_COM_SUCESSAO_ESTRITA:
-        encerrar_mandato_anterior(funcao, data_entrada)
-
-    # Inserção do novo registro
-    # Forçamos data_saida como None para garantir que ele seja o atual "Ativo"
-    return inserir_historico({
-        "equipe_id": equipe_id,
-        "funcao": funcao,
-        "data_entrada": str(data_entrada),
-        "data_saida": None
-    })
+    resposta = cliente().rpc("trocar_funcao", parametros_troca(equipe_id, funcao, data_entrada)).execute()
+    invalidar("historico_redec")
+    return resposta
+
+def parametros_troca(equipe_id, funcao, data_entrada):
+    """Parâmetros da RPC trocar_funcao (também gravados na fila de escritas, services/fila.py)."""
+    return {
+        "p_equipe_id": equipe_id,
+        "p_funcao": funcao,
+        "p_data_entrada": str(data_entrada),
+        # Continuidade automática apenas para o Coordenador
+        "p_encerrar_anterior": funcao == FUNCAO_COM_SUCESSAO_ESTRITA
+    }
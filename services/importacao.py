@@ -0,0 +1,185 @@
+# services/importacao.py
+
+import os
+import uuid
+
+import pandas as pd
+
+from services.conexao import cliente
+from services.metricas import medir
+from services.cache import invalidar
+
+# Registros por requisição de upsert
+IMPORTACAO_LOTE = int(os.getenv("REDEC_IMPORTACAO_LOTE", "200"))
+
+# Destino -> colunas da planilha (as obrigatórias primeiro)
+MODELOS = {
+    "equipe": {
+        "obrigatorias": ["nome", "posto_graduacao"],
+        "opcionais": ["nome_guerra", "rg", "id_funcional", "quadro_qbmp", "telefone", "ativo"],
+    },
+    "ferias_licencas": {
+        "obrigatorias": ["id_funcional", "tipo", "inicio", "fim"],
+        "opcionais": ["observacao"],
+    },
+}
+
+# Mesmo namespace em todas as importações: a chave depende só do conteúdo da linha,
+# então importar a mesma planilha de novo não duplica registros (ver sql/005)
+_NAMESPACE_CHAVE = uuid.UUID("6f1d3c2e-8a4b-4e57-9c1a-2b7d5e0f9a31")
+
+
+def ler_planilha(arquivo, nome):
+    """CSV (separador detectado) ou XLSX, com todas as células como texto."""
+    if nome.lower().endswith(".xlsx"):
+        df = pd.read_excel(arquivo, dtype=str)
+    else:
+        df = pd.read_csv(arquivo, dtype=str, sep=None, engine="python", encoding="utf-8-sig")
+    df.columns = df.columns.str.strip().str.lower()
+    return df.fillna("").apply(lambda coluna: coluna.str.strip())
+
+
+def modelo_csv(destino):
+    """Cabeçalho de exemplo para o usuário preencher."""
+    modelo = MODELOS[destino]
+    return (",".join(modelo["obrigatorias"] + modelo["opcionais"]) + "\n").encode("utf-8")
+
+
+def _converter_datas(serie):
+    """Aceita dd/mm/aaaa ou aaaa-mm-dd; inválidas viram NaT."""
+    br = pd.to_datetime(serie, format="%d/%m/%Y", errors="coerce")
+    return br.fillna(pd.to_datetime(serie.where(br.isna(), ""), format="ISO8601", errors="coerce"))
+
+
+class _Erros:
+    """Acumula (linha da planilha, mensagem) a partir de máscaras booleanas."""
+
+    def __init__(self, df):
+        self.df = df
+        self.itens = []
+
+    def marcar(self, mascara, mensagem):
+        # Linha 1 é o cabeçalho
+        self.itens += [(i + 2, mensagem) for i in self.df.index[mascara]]
+
+    def linhas(self):
+        return {linha for linha, _ in self.itens}
+
+    def tabela(self):
+        return pd.DataFrame(self.itens, columns=["Linha", "Erro"]).sort_values("Linha", kind="stable", ignore_index=True)
+
+    def validas(self):
+        return self.df[~(self.df.index + 2).isin(self.linhas())]
+
+
+def _faltantes(df, destino):
+    return [c for c in MODELOS[destino]["obrigatorias"] if c not in df]
+
+
+def validar_equipe(df, postos, equipe):
+    """
+    Valida servidores em bloco: obrigatórios preenchidos, posto conhecido e RG /
+    ID funcional sem repetição (na planilha ou já cadastrados em `equipe`).
+    Retorna (registros válidos, tabela de erros por linha); cada registro traz em
+    "_linha" a linha de origem na planilha.
+    """
+    faltantes = _faltantes(df, "equipe")
+    if faltantes:
+        raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(faltantes)}")
+    df = df.reindex(columns=MODELOS["equipe"]["obrigatorias"] + MODELOS["equipe"]["opcionais"], fill_value="")
+    df["nome"] = df["nome"].str.upper()
+    df["nome_guerra"] = df["nome_guerra"].str.upper()
+    df["quadro_qbmp"] = df["quadro_qbmp"].str.upper()
+    df["posto_graduacao"] = df["posto_graduacao"].str.replace(r"\s+", " ", regex=True).str.upper()
+
+    erros = _Erros(df)
+    erros.marcar(df["nome"] == "", "Nome não informado.")
+    erros.marcar(~df["posto_graduacao"].isin(postos), "Posto/graduação desconhecido.")
+    for coluna, rotulo in (("rg", "RG"), ("id_funcional", "ID funcional")):
+        preenchido = df[coluna] != ""
+        erros.marcar(preenchido & df[coluna].duplicated(keep=False), f"{rotulo} repetido na planilha.")
+        existentes = {str(m.get(coluna)) for m in equipe if m.get(coluna)}
+        erros.marcar(preenchido & df[coluna].isin(existentes), f"{rotulo} já cadastrado.")
+    ativo = df["ativo"].str.lower()
+    erros.marcar(~ativo.isin(["", "sim", "não", "nao", "true", "false", "1", "0"]), "Ativo deve ser sim ou não.")
+
+    validas = erros.validas()
+    # Só as linhas válidas: com a Series inteira, assign completaria as demais com NaN
+    validas = validas.assign(_linha=validas.index + 2,
+                             ativo=~ativo[validas.index].isin(["não", "nao", "false", "0"]))
+    return validas.to_dict("records"), erros.tabela()
+
+
+def validar_ferias(df, tipos, equipe):
+    """
+    Valida afastamentos em bloco: servidor identificado pelo ID funcional, tipo
+    conhecido, datas válidas e fim não anterior ao início.
+    Retorna (registros válidos, tabela de erros por linha), como validar_equipe.
+    """
+    faltantes = _faltantes(df, "ferias_licencas")
+    if faltantes:
+        raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(faltantes)}")
+    df = df.reindex(columns=MODELOS["ferias_licencas"]["obrigatorias"] + MODELOS["ferias_licencas"]["opcionais"], fill_value="")
+
+    ids = {str(m["id_funcional"]): m["id"] for m in equipe if m.get("id_funcional")}
+    # Lista em vez de .map: ids inteiros não viram float por causa das linhas sem correspondência
+    equipe_id = pd.Series([ids.get(v) for v in df["id_funcional"]], index=df.index, dtype=object)
+    inicio, fim = _converter_datas(df["inicio"]), _converter_datas(df["fim"])
+
+    erros = _Erros(df)
+    erros.marcar(equipe_id.isna(), "ID funcional não encontrado na equipe.")
+    erros.marcar(~df["tipo"].isin(tipos), f"Tipo deve ser um de: {', '.join(tipos)}.")
+    erros.marcar(inicio.isna(), "Data início inválida.")
+    erros.marcar(fim.isna(), "Data fim inválida.")
+    erros.marcar(fim < inicio, "Data fim anterior à data início.")
+
+    validas = erros.validas().index
+    registros = pd.DataFrame({
+        "_linha": validas + 2,
+        "equipe_id": equipe_id[validas],
+        "tipo": df.loc[validas, "tipo"],
+        "inicio": inicio[validas].dt.strftime("%Y-%m-%d"),
+        "fim": fim[validas].dt.strftime("%Y-%m-%d"),
+        "observacao": df.loc[validas, "observacao"],
+    })
+    return registros.to_dict("records"), erros.tabela()
+
+
+def _upsert(destino, registros):
+    """Quantas linhas foram de fato inseridas: as já existentes (mesma chave) não voltam na resposta."""
+    resposta = cliente().table(destino) \
+        .upsert(registros, on_conflict="chave_idempotencia", ignore_duplicates=True) \
+        .execute()
+    return len(resposta.data or [])
+
+
+@medir("escrita")
+def importar(destino, registros):
+    """
+    Grava os registros em lotes de IMPORTACAO_LOTE com upsert pela chave de
+    idempotência. Se um lote for recusado, as linhas são enviadas uma a uma para
+    identificar as inválidas. O cache da tabela é invalidado uma única vez no fim.
+    Retorna (quantidade gravada, [(linha da planilha, erro)]); linhas já importadas
+    antes (mesma chave) não entram na quantidade gravada.
+    """
+    linhas, preparados = [], []
+    for registro in registros:
+        registro = dict(registro)
+        linhas.append(registro.pop("_linha", None))
+        chave = uuid.uuid5(_NAMESPACE_CHAVE, f"{destino}:{sorted(registro.items())}")
+        preparados.append(dict(registro, chave_idempotencia=str(chave)))
+
+    gravados, erros = 0, []
+    for inicio in range(0, len(registros), IMPORTACAO_LOTE):
+        lote = preparados[inicio:inicio + IMPORTACAO_LOTE]
+        try:
+            gravados += _upsert(destino, lote)
+        except Exception:
+            for linha, registro in zip(linhas[inicio:inicio + IMPORTACAO_LOTE], lote):
+                try:
+                    gravados += _upsert(destino, [registro])
+                except Exception as erro:
+                    erros.append((linha, str(erro)))
+    if gravados:
+        invalidar(destino)
+    return gravados, erros
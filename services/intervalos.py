@@ -0,0 +1,177 @@
+# services/intervalos.py
+
+from bisect import bisect_left, bisect_right
+from datetime import date
+
+from services.cache import em_cache
+from services.historico import buscar_historico
+
+# A cada quantos segmentos o índice guarda o conjunto completo de mandatos em vigor;
+# nos demais, só as entradas e saídas que acontecem no seu início
+PASSO_MARCOS = 64
+
+
+def para_data(valor):
+    """'2024-03-01' ou '2024-03-01T00:00:00+00:00' -> date; vazio ou inválido -> None."""
+    try:
+        return date.fromisoformat(str(valor)[:10]) if valor else None
+    except ValueError:
+        return None
+
+
+def _aplicar(atuais, delta):
+    """Entradas (+1) e saídas (-1) no início de um segmento."""
+    for sinal, i in delta:
+        if sinal > 0:
+            atuais.add(i)
+        else:
+            atuais.discard(i)
+
+
+class IndiceIntervalos:
+    """
+    Índice dos mandatos de historico_redec por função, para consultas no tempo.
+    Cada mandato é o intervalo [data_entrada, data_saida) — a saída de um coincide com a
+    entrada do sucessor sem contar como sobreposição; data_saida nula é mandato em aberto.
+    Um mandato com saída igual à entrada (substituído no mesmo dia) não fica em vigor em
+    nenhum dia, mas continua na linha do tempo.
+
+    As datas de entrada e saída de uma função dividem o tempo em segmentos elementares.
+    Cada segmento guarda as entradas e saídas no seu início e quantos mandatos o cobrem;
+    a cada PASSO_MARCOS segmentos, também o conjunto completo (marco). "Quem ocupava em X"
+    é uma busca binária pelo segmento (O(log n)) mais as entradas e saídas desde o marco
+    anterior; vacâncias são segmentos com zero mandatos e sobreposições, com mais de um.
+    """
+
+    def __init__(self, historico):
+        por_funcao = {}
+        for registro in historico:
+            entrada, saida = para_data(registro.get("data_entrada")), para_data(registro.get("data_saida"))
+            # Sem entrada, ou com saída antes da entrada: não é um mandato
+            if entrada is None or (saida is not None and saida < entrada):
+                continue
+            por_funcao.setdefault(registro["funcao"], []).append((entrada, saida, registro))
+
+        # funcao -> (limites, deltas, contagens, marcos, mandatos), por segmento [limites[i], limites[i + 1])
+        self._funcoes = {
+            funcao: self._segmentar(sorted(mandatos, key=lambda mandato: mandato[0]))
+            for funcao, mandatos in por_funcao.items()
+        }
+
+    @staticmethod
+    def _segmentar(mandatos):
+        eventos = {}
+        for i, (entrada, saida, _) in enumerate(mandatos):
+            if saida == entrada:
+                continue
+            eventos.setdefault(entrada, []).append((1, i))
+            if saida is not None:
+                eventos.setdefault(saida, []).append((-1, i))
+
+        limites = sorted(eventos)
+        deltas = [eventos[limite] for limite in limites]
+        contagens, marcos, atuais = [], [], set()
+        for posicao, delta in enumerate(deltas):
+            _aplicar(atuais, delta)
+            contagens.append(len(atuais))
+            if posicao % PASSO_MARCOS == 0:
+                marcos.append(frozenset(atuais))
+        return limites, deltas, contagens, marcos, [registro for _, _, registro in mandatos]
+
+    @staticmethod
+    def _ativos(segmentos, posicao):
+        """Índices dos mandatos que cobrem o segmento `posicao`: o marco anterior e as alterações desde ele."""
+        _, deltas, _, marcos, _ = segmentos
+        marco = posicao // PASSO_MARCOS
+        atuais = set(marcos[marco])
+        for delta in deltas[marco * PASSO_MARCOS + 1:posicao + 1]:
+            _aplicar(atuais, delta)
+        return atuais
+
+    def funcoes(self):
+        return list(self._funcoes)
+
+    def ocupantes(self, funcao, data):
+        """Mandatos da função em vigor na data (lista vazia se vaga ou antes do primeiro registro)."""
+        if funcao not in self._funcoes:
+            return []
+        segmentos = self._funcoes[funcao]
+        limites, _, contagens, _, mandatos = segmentos
+        posicao = bisect_right(limites, data) - 1
+        if posicao < 0 or not contagens[posicao]:
+            return []
+        return [mandatos[i] for i in sorted(self._ativos(segmentos, posicao))]
+
+    def no_periodo(self, funcao, inicio, fim):
+        """
+        Mandatos da função em vigor em algum dia de [inicio, fim), como
+        (entrada, saida, registro); saida=None para mandato em aberto.
+        """
+        if funcao not in self._funcoes:
+            return []
+        segmentos = self._funcoes[funcao]
+        limites, deltas, _, _, mandatos = segmentos
+        primeiro, ultimo = max(bisect_right(limites, inicio) - 1, 0), bisect_left(limites, fim)
+        if primeiro >= ultimo:
+            return []
+        indices = self._ativos(segmentos, primeiro)
+        for delta in deltas[primeiro + 1:ultimo]:
+            indices.update(i for sinal, i in delta if sinal > 0)
+        return [
+            (para_data(mandatos[i]["data_entrada"]), para_data(mandatos[i].get("data_saida")), mandatos[i])
+            for i in sorted(indices)
+        ]
+
+    def _trechos(self, funcao, ate, incluir):
+        """
+        Trechos contíguos (inicio, fim, mandatos) em que `incluir(quantidade de mandatos)`
+        vale, do primeiro registro até `ate`. fim=None: o trecho continua em aberto.
+        """
+        if funcao not in self._funcoes:
+            return []
+        limites, deltas, contagens, _, mandatos = self._funcoes[funcao]
+        trechos, atuais = [], set()
+        for posicao, inicio in enumerate(limites):
+            if inicio >= ate:
+                break
+            _aplicar(atuais, deltas[posicao])
+            if not incluir(contagens[posicao]):
+                continue
+            fim = limites[posicao + 1] if posicao + 1 < len(limites) else None
+            indices = tuple(sorted(atuais))
+            if trechos and trechos[-1][1] == inicio and trechos[-1][2] == indices:
+                trechos[-1] = (trechos[-1][0], fim, indices)
+            else:
+                trechos.append((inicio, fim, indices))
+        return [(inicio, fim, [mandatos[i] for i in indices]) for inicio, fim, indices in trechos]
+
+    def vacancias(self, funcao, ate=None):
+        """
+        Períodos sem ocupante desde o primeiro registro da função, como
+        (inicio, fim, dias); fim=None indica que a função continua vaga.
+        """
+        ate = ate or date.today()
+        return [
+            (inicio, fim, ((fim or ate) - inicio).days)
+            for inicio, fim, _ in self._trechos(funcao, ate, lambda quantidade: quantidade == 0)
+        ]
+
+    def sobreposicoes(self, funcao, ate=None):
+        """Períodos com mais de um mandato em vigor, como (inicio, fim, mandatos)."""
+        return self._trechos(funcao, ate or date.today(), lambda quantidade: quantidade > 1)
+
+    def linha_do_tempo(self, ate=None):
+        """Um item por mandato: funcao, registro, inicio e fim (mandatos em aberto vão até `ate`)."""
+        ate = ate or date.today()
+        return [
+            {"funcao": funcao, "registro": mandato, "inicio": para_data(mandato["data_entrada"]),
+             "fim": para_data(mandato.get("data_saida")) or max(ate, para_data(mandato["data_entrada"]))}
+            for funcao, (*_, mandatos) in self._funcoes.items()
+            for mandato in mandatos
+        ]
+
+
+@em_cache("historico_redec", juncoes=("equipe",))
+def buscar_indice():
+    """Índice de intervalos de todo o histórico, reconstruído só quando o histórico muda."""
+    return IndiceIntervalos(buscar_historico())
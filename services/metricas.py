@@ -0,0 +1,198 @@
+# services/metricas.py
+
+import cProfile
+import functools
+import io
+import json
+import marshal
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Medições guardadas por operação (as mais antigas são descartadas)
+METRICAS_AMOSTRAS = int(os.getenv("REDEC_METRICAS_AMOSTRAS", "500"))
+# Se definido, cada medição também é gravada nesse arquivo (uma linha JSON por medição)
+METRICAS_ARQUIVO = os.getenv("REDEC_METRICAS_ARQUIVO", "")
+
+CHAVE_SESSAO = "metricas"
+CHAVE_PERFIL = "perfil_proxima_execucao"
+
+# Categorias:
+#   leitura  - chamada a um buscar_* (inclui acertos de cache)
+#   consulta - leitura que foi ao banco (falta no cache)
+#   escrita  - inserções, atualizações, exclusões e RPCs de escrita
+#   rede     - requisição HTTP (tempo até o corpo da resposta e bytes recebidos)
+#   tela     - renderização de uma seção
+#   importacao    - importação do módulo de uma página, na primeira abertura
+#   primeira_tela - primeira renderização de cada página no processo
+
+
+@st.cache_resource(show_spinner=False)
+def _processo():
+    """Medições de todas as sessões do processo: (nome, categoria) -> deque de amostras."""
+    return {"amostras": {}, "trava": threading.Lock()}
+
+
+def _amostras_da_sessao():
+    # Threads sem contexto do Streamlit (ex.: sincronizadores) só contam no processo
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return None
+    return st.session_state.setdefault(CHAVE_SESSAO, {})
+
+
+def registrar(nome, categoria, segundos, linhas=None, bytes_=None):
+    amostra = (segundos * 1000, linhas, bytes_)
+    processo = _processo()
+    with processo["trava"]:
+        processo["amostras"].setdefault((nome, categoria), deque(maxlen=METRICAS_AMOSTRAS)).append(amostra)
+    sessao = _amostras_da_sessao()
+    if sessao is not None:
+        sessao.setdefault((nome, categoria), deque(maxlen=METRICAS_AMOSTRAS)).append(amostra)
+    if METRICAS_ARQUIVO:
+        _gravar_no_arquivo(nome, categoria, amostra)
+
+
+_trava_arquivo = threading.Lock()
+
+
+def _gravar_no_arquivo(nome, categoria, amostra):
+    linha = json.dumps({
+        "momento": time.time(), "nome": nome, "categoria": categoria,
+        "ms": round(amostra[0], 3), "linhas": amostra[1], "bytes": amostra[2],
+    }, ensure_ascii=False)
+    with _trava_arquivo, open(METRICAS_ARQUIVO, "a", encoding="utf-8") as arquivo:
+        arquivo.write(linha + "\n")
+
+
+def contar_linhas(resultado):
+    """Linhas de um resultado: lista, resposta do Supabase (.data) ou página (linhas, cursor)."""
+    if isinstance(resultado, tuple) and resultado and isinstance(resultado[0], list):
+        resultado = resultado[0]
+    resultado = getattr(resultado, "data", resultado)
+    return len(resultado) if isinstance(resultado, list) else None
+
+
+# ============================================================
+# INSTRUMENTAÇÃO
+# ============================================================
+
+def medir(categoria, nome=None):
+    """Decorador: registra tempo e linhas devolvidas a cada chamada (inclusive as que falham)."""
+    def decorador(func):
+        rotulo = nome or func.__name__
+
+        @functools.wraps(func)
+        def medida(*args, **kwargs):
+            inicio = time.perf_counter()
+            resultado = None
+            try:
+                resultado = func(*args, **kwargs)
+                return resultado
+            finally:
+                registrar(rotulo, categoria, time.perf_counter() - inicio, contar_linhas(resultado))
+        medida.categoria = categoria
+        return medida
+    return decorador
+
+
+@contextmanager
+def cronometro(nome, categoria="tela"):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        registrar(nome, categoria, time.perf_counter() - inicio)
+
+
+def ganchos_httpx():
+    """
+    event_hooks do httpx: mede cada requisição do início ao fim da leitura do
+    corpo e os bytes recebidos, rotulada por método e recurso (ex.: GET equipe).
+    """
+    def ao_enviar(requisicao):
+        requisicao.extensions["redec_inicio"] = time.perf_counter()
+
+    def ao_receber(resposta):
+        resposta.read()
+        requisicao = resposta.request
+        inicio = requisicao.extensions.get("redec_inicio")
+        if inicio is None:
+            return
+        recurso = requisicao.url.path.rstrip("/").rsplit("/", 1)[-1]
+        registrar(f"{requisicao.method} {recurso}", "rede", time.perf_counter() - inicio,
+                  bytes_=len(resposta.content))
+
+    return {"request": [ao_enviar], "response": [ao_receber]}
+
+
+# ============================================================
+# AGREGAÇÃO
+# ============================================================
+
+def resumo(escopo="processo"):
+    """Percentis por operação: chamadas, p50/p90/p99/máx (ms), linhas médias e bytes."""
+    # Importado aqui: registrar medições não deve carregar o pandas
+    import pandas as pd
+
+    if escopo == "processo":
+        processo = _processo()
+        with processo["trava"]:
+            amostras = {chave: list(valores) for chave, valores in processo["amostras"].items()}
+    else:
+        amostras = {chave: list(valores) for chave, valores in (_amostras_da_sessao() or {}).items()}
+
+    linhas = []
+    for (nome, categoria), valores in amostras.items():
+        df = pd.DataFrame(valores, columns=["ms", "linhas", "bytes"])
+        ms = df["ms"]
+        linhas.append({
+            "Categoria": categoria, "Operação": nome, "Chamadas": len(df),
+            "p50 (ms)": ms.quantile(0.5), "p90 (ms)": ms.quantile(0.9),
+            "p99 (ms)": ms.quantile(0.99), "Máx (ms)": ms.max(),
+            "Linhas (média)": df["linhas"].mean(), "Bytes (total)": df["bytes"].sum(min_count=1),
+        })
+    if not linhas:
+        return pd.DataFrame()
+    return pd.DataFrame(linhas).sort_values(["Categoria", "p90 (ms)"], ascending=[True, False], ignore_index=True)
+
+
+def limpar():
+    processo = _processo()
+    with processo["trava"]:
+        processo["amostras"].clear()
+    st.session_state.pop(CHAVE_SESSAO, None)
+
+
+# ============================================================
+# PERFIL (cProfile de uma execução)
+# ============================================================
+
+def perfilar_proxima_execucao():
+    st.session_state[CHAVE_PERFIL] = True
+
+
+@contextmanager
+def perfil_se_pedido(permitido=True):
+    """
+    Envolve a execução do script: se o perfil foi pedido, roda esta execução sob o
+    cProfile e guarda o resultado na sessão (arquivo .prof e texto com as funções mais caras).
+    Com permitido=False o pedido fica guardado para a próxima execução.
+    """
+    if not permitido or not st.session_state.pop(CHAVE_PERFIL, False):
+        yield
+        return
+    perfil = cProfile.Profile()
+    perfil.enable()
+    try:
+        yield
+    finally:
+        perfil.disable()
+        texto = io.StringIO()
+        pstats.Stats(perfil, stream=texto).sort_stats("cumulative").print_stats(40)
+        st.session_state["perfil"] = {"texto": texto.getvalue(), "prof": marshal.dumps(perfil.stats)}
@@ -0,0 +1,80 @@
+# services/paginas.py
+
+import importlib
+import sys
+import threading
+import time
+
+import streamlit as st
+
+from services.metricas import registrar
+
+# Item do menu -> (módulo, função da tela), na ordem do menu.
+# Nenhum módulo é importado antes de a página ser aberta: o pandas, o cliente
+# Supabase e os serviços de cada tela só são carregados quando ela é usada.
+PAGINAS = {
+    "🏠 Dashboard": ("modulos.dashboard", "tela_dashboard"),
+    "👥 Equipe REDEC 10": ("modulos.equipe", "tela_equipe"),
+    "📄 Boletins": ("modulos.boletins", "tela_boletins"),
+    "📥 SEI": ("modulos.sei", "tela_sei"),
+    "📅 Agenda de Atividades": ("modulos.agenda", "tela_agenda"),
+    "🌊 Monitoramento de Rios": ("modulos.rios", "tela_rios"),
+    "📦 Contêiner Humanitário": ("modulos.container", "tela_container"),
+    "🚑 Controle de Viaturas": ("modulos.viaturas", "tela_viaturas"),
+    "🏛 Municípios COMDECs": ("modulos.comdecs", "tela_comdecs"),
+    "🏗 Bens Patrimoniais": ("modulos.patrimonio", "tela_patrimonio"),
+    "⚙️ Configurações": ("modulos.configuracoes", "tela_configuracoes"),
+}
+
+
+@st.cache_resource(show_spinner=False)
+def _aberturas():
+    """Primeira abertura de cada página no processo: menu -> tempos (ms)."""
+    return {"paginas": {}, "trava": threading.Lock()}
+
+
+def carregar(menu):
+    """
+    Função da tela do item de menu, importando o módulo no primeiro uso.
+    Retorna (tela, ms gastos na importação); tela é None se o módulo ainda não tem tela.
+    """
+    modulo, funcao = PAGINAS[menu]
+    novo = modulo not in sys.modules
+    inicio = time.perf_counter()
+    tela = getattr(importlib.import_module(modulo), funcao, None)
+    segundos = time.perf_counter() - inicio if novo else 0.0
+    if novo:
+        registrar(modulo, "importacao", segundos)
+    return tela, segundos * 1000
+
+
+def renderizar(menu):
+    """Mostra a página; a primeira abertura no processo tem importação e renderização medidas à parte."""
+    tela, importacao_ms = carregar(menu)
+    aberturas = _aberturas()
+    primeira = menu not in aberturas["paginas"]
+    inicio = time.perf_counter()
+    try:
+        if tela is None:
+            st.subheader(menu)
+            st.info("Módulo em desenvolvimento")
+        else:
+            tela()
+    finally:
+        if primeira:
+            segundos = time.perf_counter() - inicio
+            registrar(menu, "primeira_tela", segundos)
+            with aberturas["trava"]:
+                aberturas["paginas"].setdefault(menu, {
+                    "importacao_ms": importacao_ms, "renderizacao_ms": segundos * 1000,
+                    "momento": time.time(),
+                })
+
+
+def primeiras_aberturas():
+    """[(menu, ms de importação, ms da primeira renderização)] na ordem do menu."""
+    aberturas = _aberturas()
+    with aberturas["trava"]:
+        paginas = dict(aberturas["paginas"])
+    return [(menu, paginas[menu]["importacao_ms"], paginas[menu]["renderizacao_ms"])
+            for menu in PAGINAS if menu in paginas]
@@ -0,0 +1,39 @@
+# services/prefetch.py
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+# Limite de consultas simultâneas por chamada de prefetch
+PREFETCH_MAX_THREADS = int(os.getenv("REDEC_PREFETCH_MAX_THREADS", "4"))
+
+
+def prefetch(fontes):
+    """
+    Executa em paralelo as consultas independentes de uma tela.
+    `fontes` é um dicionário {nome: função_de_busca}. Retorna quando a mais lenta
+    terminar, como (dados, erros): {nome: resultado} e {nome: exceção}.
+    A falha de uma tabela não impede o carregamento das demais.
+    """
+    if not fontes:
+        return {}, {}
+
+    # As threads herdam o contexto do rerun atual (necessário para st.cache_data/st.secrets)
+    ctx = get_script_run_ctx()
+
+    def executar(func):
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        return func()
+
+    dados, erros = {}, {}
+    with ThreadPoolExecutor(max_workers=min(PREFETCH_MAX_THREADS, len(fontes))) as executor:
+        futuros = {nome: executor.submit(executar, func) for nome, func in fontes.items()}
+        for nome, futuro in futuros.items():
+            try:
+                dados[nome] = futuro.result()
+            except Exception as erro:
+                erros[nome] = erro
+    return dados, erros
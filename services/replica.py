@@ -0,0 +1,359 @@
+# services/replica.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+import streamlit as st
+
+from services.metricas import medir
+from services.cache import ao_invalidar
+from services.conexao import cliente
+
+# Réplica local (SQLite) de equipe, historico_redec e ferias_licencas.
+# Desativada se REDEC_REPLICA (caminho do arquivo .sqlite) não estiver definido.
+REPLICA_CAMINHO = os.getenv("REDEC_REPLICA", "")
+# Intervalo entre sincronizações incrementais (segundos)
+REPLICA_INTERVALO = int(os.getenv("REDEC_REPLICA_INTERVALO", "30"))
+# Idade máxima (segundos) para a réplica ser lida no lugar do Supabase
+REPLICA_VALIDADE = int(os.getenv("REDEC_REPLICA_VALIDADE", "120"))
+# Intervalo entre reconciliações completas, que detectam exclusões (segundos)
+REPLICA_RECONCILIACAO = int(os.getenv("REDEC_REPLICA_RECONCILIACAO", "3600"))
+# Margem relida a cada sincronização, para transações que gravaram com horário anterior à marca d'água
+REPLICA_MARGEM = int(os.getenv("REDEC_REPLICA_MARGEM", "300"))
+REPLICA_LOTE = int(os.getenv("REDEC_REPLICA_LOTE", "1000"))
+
+TABELAS = ("equipe", "historico_redec", "ferias_licencas")
+# Tabelas com linhas que apontam para outra (equipe_id): podem perder linhas junto com ela
+DEPENDENTES = {"equipe": ("historico_redec", "ferias_licencas")}
+# Colunas de início e fim de cada tabela, copiadas para colunas indexadas da réplica:
+# as páginas (ordem, cursor e filtros) são montadas em SQL, sem decodificar a tabela toda
+PERIODOS = {"historico_redec": ("data_entrada", "data_saida"), "ferias_licencas": ("inicio", "fim")}
+
+# Acorda o sincronizador antes do intervalo (ex.: logo após uma escrita)
+_acordar = threading.Event()
+
+
+def ativa():
+    return bool(REPLICA_CAMINHO)
+
+
+def _conectar():
+    conexao = sqlite3.connect(REPLICA_CAMINHO, timeout=30)
+    conexao.execute("pragma journal_mode=wal")
+    conexao.executescript("""
+        create table if not exists linhas (
+            tabela text not null,
+            id text not null,
+            atualizado_em text,
+            dados text not null,
+            primary key (tabela, id)
+        );
+        create table if not exists controle (
+            tabela text primary key,
+            marca_dagua text,
+            ultima_sync real default 0,
+            ultima_reconciliacao real default 0
+        );
+    """)
+    _migrar(conexao)
+    return conexao
+
+
+def _migrar(conexao):
+    """Colunas indexadas para paginação e a hora da última invalidação, em réplicas criadas antes delas."""
+    colunas = {c[1] for c in conexao.execute("pragma table_info(linhas)")}
+    if "id_num" not in colunas:
+        for coluna in ("id_num integer", "equipe_id integer", "funcao text", "data_inicio text", "data_fim text"):
+            conexao.execute(f"alter table linhas add column {coluna}")
+        # Linhas antigas não têm as colunas novas: a próxima sincronização relê tudo
+        conexao.execute("delete from linhas")
+        conexao.execute("update controle set marca_dagua = null, ultima_sync = 0")
+    if "invalidada_em" not in {c[1] for c in conexao.execute("pragma table_info(controle)")}:
+        conexao.execute("alter table controle add column invalidada_em real default 0")
+    conexao.executescript("""
+        create index if not exists linhas_pagina on linhas (tabela, data_inicio desc, id_num desc);
+        create index if not exists linhas_equipe on linhas (tabela, equipe_id, data_inicio desc, id_num desc);
+        create index if not exists linhas_funcao on linhas (tabela, funcao, data_inicio desc, id_num desc);
+    """)
+    conexao.commit()
+
+
+def _valores(tabela, linha):
+    """Valores gravados para uma linha do Supabase: dados em JSON mais as colunas indexadas."""
+    inicio, fim = PERIODOS.get(tabela, (None, None))
+    return (tabela, str(linha["id"]), linha.get("atualizado_em"), json.dumps(linha, default=str),
+            linha["id"] if isinstance(linha["id"], int) else None, linha.get("equipe_id"), linha.get("funcao"),
+            linha.get(inicio) if inicio else None, linha.get(fim) if fim else None)
+
+
+def _controle(conexao, tabela):
+    linha = conexao.execute(
+        "select marca_dagua, ultima_sync, ultima_reconciliacao from controle where tabela = ?", (tabela,)
+    ).fetchone()
+    return linha or (None, 0, 0)
+
+
+# ============================================================
+# SINCRONIZAÇÃO
+# ============================================================
+
+@medir("consulta")
+def sincronizar(tabela, supabase=None):
+    """
+    Sincronização incremental: busca só as linhas com atualizado_em a partir da
+    marca d'água (menos uma margem de segurança), em lotes ordenados por (atualizado_em, id).
+    Retorna quantas linhas foram gravadas.
+    """
+    supabase = supabase or cliente()
+    conexao = _conectar()
+    try:
+        marca, _, _ = _controle(conexao, tabela)
+        inicio = time.time()
+        total, cursor = 0, None
+        while True:
+            consulta = supabase.table(tabela).select("*")
+            if marca:
+                consulta = consulta.gte("atualizado_em", _recuar(marca))
+            if cursor:
+                valor, id_ = cursor
+                consulta = consulta.or_(f'atualizado_em.gt."{valor}",and(atualizado_em.eq."{valor}",id.gt.{id_})')
+            linhas = consulta.order("atualizado_em").order("id").limit(REPLICA_LOTE).execute().data
+
+            conexao.executemany("""
+                insert or replace into linhas
+                    (tabela, id, atualizado_em, dados, id_num, equipe_id, funcao, data_inicio, data_fim)
+                values (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [_valores(tabela, l) for l in linhas])
+            total += len(linhas)
+            if len(linhas) < REPLICA_LOTE:
+                break
+            cursor = (linhas[-1]["atualizado_em"], linhas[-1]["id"])
+
+        nova_marca = conexao.execute(
+            "select max(atualizado_em) from linhas where tabela = ?", (tabela,)
+        ).fetchone()[0]
+        # Escrita invalidada depois do início desta sincronização pode ter sido gravada depois
+        # da leitura: a tabela continua desatualizada e o próximo ciclo vem logo em seguida
+        conexao.execute("""
+            insert into controle (tabela, marca_dagua, ultima_sync) values (?, ?, ?)
+            on conflict (tabela) do update set
+                marca_dagua = excluded.marca_dagua,
+                ultima_sync = case when controle.invalidada_em >= excluded.ultima_sync then 0
+                                   else excluded.ultima_sync end
+        """, (tabela, nova_marca, inicio))
+        conexao.commit()
+        if _controle(conexao, tabela)[1] == 0:
+            _acordar.set()
+        return total
+    finally:
+        conexao.close()
+
+
+def _recuar(marca):
+    """Marca d'água menos REPLICA_MARGEM segundos, no formato ISO aceito pelo PostgREST."""
+    return (datetime.fromisoformat(marca) - timedelta(seconds=REPLICA_MARGEM)).isoformat()
+
+
+@medir("consulta")
+def reconciliar(tabela, supabase=None):
+    """
+    Reconciliação completa: compara os ids locais com os do Supabase
+    (consultando só a coluna id) e remove da réplica as linhas excluídas no banco.
+    Retorna quantas linhas foram removidas.
+    """
+    supabase = supabase or cliente()
+    remotos, cursor = set(), None
+    while True:
+        consulta = supabase.table(tabela).select("id")
+        if cursor is not None:
+            consulta = consulta.gt("id", cursor)
+        lote = consulta.order("id").limit(REPLICA_LOTE).execute().data
+        remotos.update(str(l["id"]) for l in lote)
+        if len(lote) < REPLICA_LOTE:
+            break
+        cursor = lote[-1]["id"]
+
+    conexao = _conectar()
+    try:
+        locais = {l[0] for l in conexao.execute("select id from linhas where tabela = ?", (tabela,))}
+        excluidos = locais - remotos
+        conexao.executemany("delete from linhas where tabela = ? and id = ?", [(tabela, i) for i in excluidos])
+        conexao.execute("update controle set ultima_reconciliacao = ? where tabela = ?", (time.time(), tabela))
+        conexao.commit()
+        return len(excluidos)
+    finally:
+        conexao.close()
+
+
+@ao_invalidar
+def marcar_desatualizada(tabela):
+    """Após uma escrita, a tabela deixa de ser lida da réplica até a próxima sincronização."""
+    if not ativa() or tabela not in TABELAS:
+        return
+    conexao = _conectar()
+    try:
+        conexao.execute("""
+            insert into controle (tabela, ultima_sync, invalidada_em) values (?, 0, ?)
+            on conflict (tabela) do update set ultima_sync = 0, invalidada_em = excluded.invalidada_em
+        """, (tabela, time.time()))
+        conexao.commit()
+    finally:
+        conexao.close()
+    _acordar.set()
+
+
+def remover(tabela, ids):
+    """
+    Após uma exclusão feita pelo próprio app: a sincronização incremental não enxerga
+    linhas excluídas, então elas saem da réplica na hora. As tabelas dependentes (que
+    podem ter perdido linhas em cascata) ficam fora da réplica até a próxima reconciliação.
+    """
+    if not ativa() or tabela not in TABELAS:
+        return
+    conexao = _conectar()
+    try:
+        conexao.executemany("delete from linhas where tabela = ? and id = ?", [(tabela, str(i)) for i in ids])
+        for dependente in DEPENDENTES.get(tabela, ()):
+            conexao.execute("update controle set ultima_sync = 0, ultima_reconciliacao = 0 where tabela = ?",
+                            (dependente,))
+        conexao.commit()
+    finally:
+        conexao.close()
+    _acordar.set()
+
+
+@st.cache_resource(show_spinner=False)
+def iniciar_sincronizador():
+    """Thread única por processo que mantém a réplica atualizada."""
+    supabase = cliente()
+
+    def ciclo():
+        while True:
+            for tabela in TABELAS:
+                try:
+                    # Reconciliação pendente vem antes: a sincronização é que marca a tabela como atualizada
+                    conexao = _conectar()
+                    _, _, ultima_reconciliacao = _controle(conexao, tabela)
+                    conexao.close()
+                    if time.time() - ultima_reconciliacao > REPLICA_RECONCILIACAO:
+                        reconciliar(tabela, supabase)
+                    sincronizar(tabela, supabase)
+                except Exception:
+                    # Sem conexão: a réplica envelhece e as leituras voltam ao Supabase
+                    pass
+            _acordar.wait(REPLICA_INTERVALO)
+            _acordar.clear()
+
+    thread = threading.Thread(target=ciclo, name="replica-redec", daemon=True)
+    thread.start()
+    return thread
+
+
+# ============================================================
+# LEITURA
+# ============================================================
+
+def linhas(tabela):
+    conexao = _conectar()
+    try:
+        return [json.loads(d) for (d,) in conexao.execute("select dados from linhas where tabela = ?", (tabela,))]
+    finally:
+        conexao.close()
+
+
+def _estado(tabelas):
+    """(todas_atualizadas, todas_com_dados) para as tabelas informadas."""
+    conexao = _conectar()
+    try:
+        agora = time.time()
+        atualizadas = all(agora - _controle(conexao, t)[1] <= REPLICA_VALIDADE for t in tabelas)
+        com_dados = all(_controle(conexao, t)[0] is not None for t in tabelas)
+        return atualizadas, com_dados
+    finally:
+        conexao.close()
+
+
+def _ler(remoto, tabelas, local):
+    """Lê da réplica (`local()`) quando ela está atualizada; senão, do Supabase (`remoto()`)."""
+    if not ativa():
+        return remoto()
+
+    iniciar_sincronizador()
+    atualizadas, com_dados = _estado(tabelas)
+    if atualizadas:
+        return local()
+    try:
+        return remoto()
+    except Exception:
+        # Supabase fora do ar: a réplica, mesmo desatualizada, é melhor que nada
+        if not com_dados:
+            raise
+        return local()
+
+
+def ler(remoto, tabelas, montar):
+    """
+    Lê da réplica quando ela está atualizada; senão, do Supabase (`remoto()`).
+    Se o Supabase falhar e a réplica tiver dados, usa a réplica mesmo desatualizada.
+    `montar` recebe as linhas locais de cada tabela em `tabelas` e produz o mesmo
+    resultado que a consulta remota (filtros, ordenação, dados embutidos).
+    """
+    return _ler(remoto, tabelas, lambda: montar(*[linhas(t) for t in tabelas]))
+
+
+def ler_pagina(remoto, tabela, cursor, limite, campos_equipe, filtros):
+    """
+    Como ler(), para as consultas *_pagina: a página sai da réplica por SQL, pelos índices
+    de (data_inicio, id_num), sem decodificar a tabela inteira. `filtros` é uma lista de
+    (coluna, operador, valor) sobre as colunas indexadas (equipe_id, funcao, data_inicio,
+    data_fim); valores None são ignorados. Só os servidores da página são embutidos.
+    """
+    return _ler(remoto, (tabela, "equipe"), lambda: _pagina(tabela, cursor, limite, campos_equipe, filtros))
+
+
+def _pagina(tabela, cursor, limite, campos_equipe, filtros):
+    condicoes, parametros = ["tabela = ?"], [tabela]
+    for coluna, operador, valor in filtros:
+        if valor is not None:
+            condicoes.append(f"{coluna} {operador} ?")
+            parametros.append(str(valor) if coluna.startswith("data_") else valor)
+    if cursor:
+        valor, id_ = cursor
+        condicoes.append("(data_inicio < ? or (data_inicio = ? and id_num < ?))")
+        parametros += [valor, valor, id_]
+
+    conexao = _conectar()
+    try:
+        registros = [json.loads(d) for (d,) in conexao.execute(
+            f"select dados from linhas where {' and '.join(condicoes)} "
+            "order by data_inicio desc, id_num desc limit ?", parametros + [limite + 1])]
+        ids = sorted({str(r["equipe_id"]) for r in registros if r.get("equipe_id") is not None})
+        equipe = [json.loads(d) for (d,) in conexao.execute(
+            f"select dados from linhas where tabela = 'equipe' and id in ({','.join('?' * len(ids))})", ids)]
+    finally:
+        conexao.close()
+
+    registros = embutir_equipe(registros, equipe, campos_equipe)
+    coluna = PERIODOS[tabela][0]
+    if len(registros) > limite:
+        ultima = registros[limite - 1]
+        return registros[:limite], (ultima[coluna], ultima["id"])
+    return registros, None
+
+
+def embutir_equipe(registros, equipe, campos):
+    """Reproduz localmente o equipe(campos...) que o PostgREST embute nas consultas."""
+    por_id = {m["id"]: m for m in equipe}
+    for registro in registros:
+        membro = por_id.get(registro.get("equipe_id"))
+        registro["equipe"] = {c: membro.get(c) for c in campos} if membro else None
+    return registros
+
+
+def ordenar(registros, coluna, desc=False):
+    return sorted(registros, key=lambda r: r.get(coluna) or "", reverse=desc)
+
@@ -0,0 +1,476 @@
+# services/rios.py
+
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import streamlit as st
+
+from services.conexao import cliente
+from services.metricas import medir
+from services.cache import em_cache, invalidar
+
+# Armazenamento colunar das leituras: uma pasta por estação, um arquivo binário por coluna
+RIOS_PASTA = os.getenv("REDEC_RIOS_PASTA", os.path.join("dados", "rios"))
+# Pasta onde a telemetria (ou um operador) deposita arquivos CSV/XLSX de leituras
+RIOS_ENTRADA = os.getenv("REDEC_RIOS_ENTRADA", os.path.join(RIOS_PASTA, "entrada"))
+# Intervalo (segundos) entre verificações da pasta de entrada; 0 desativa o monitor
+RIOS_INTERVALO = int(os.getenv("REDEC_RIOS_INTERVALO", "60"))
+# Janela (horas) da taxa de subida
+RIOS_JANELA_TAXA = float(os.getenv("REDEC_RIOS_JANELA_TAXA", "3"))
+# Sem leitura há mais que isso (horas), a estação aparece como sem dados
+RIOS_SEM_DADOS = float(os.getenv("REDEC_RIOS_SEM_DADOS", "6"))
+# Mudanças de situação guardadas por estação
+RIOS_EVENTOS = int(os.getenv("REDEC_RIOS_EVENTOS", "200"))
+# Horários com fuso (telemetria em UTC, por exemplo) são convertidos para este
+FUSO = ZoneInfo(os.getenv("REDEC_FUSO", "America/Sao_Paulo"))
+
+# Em ordem de gravidade: o código gravado na coluna situacao é o índice aqui
+SITUACOES = ("normal", "atencao", "alerta", "transbordo")
+
+# Colunas de cada estação. instante em segundos (hora local), estritamente crescente;
+# taxa (m/h) e situacao são derivadas de instante e nivel
+COLUNAS = {"instante": np.int64, "nivel": np.float32, "taxa": np.float32, "situacao": np.uint8}
+
+# Colunas do arquivo de leituras e nomes alternativos aceitos
+MODELO = ["estacao", "instante", "nivel"]
+SINONIMOS = {"codigo": "estacao", "data_hora": "instante", "cota": "nivel"}
+
+# Uma ingestão por vez no processo (página e monitor gravam nos mesmos arquivos)
+_trava = threading.Lock()
+
+
+# ============================================================
+# ESTAÇÕES (CADASTRO NO SUPABASE, VER sql/006)
+# ============================================================
+
+def _consultar_estacoes(supabase):
+    return supabase.table("rios_estacoes").select("*").eq("ativa", True).order("nome").execute().data
+
+
+@em_cache("rios_estacoes")
+def buscar_estacoes():
+    return _consultar_estacoes(cliente())
+
+
+@medir("escrita")
+def publicar_situacao(estados):
+    """Grava a situação calculada de várias estações em uma chamada (alimenta o Dashboard)."""
+    if not estados:
+        return
+    cliente().rpc("atualizar_situacao_rios", {"p_estados": estados}).execute()
+    invalidar("rios_estacoes")
+
+
+def _parametros(estacao):
+    """O que define a classificação: se mudar, as colunas derivadas são refeitas."""
+    taxa = estacao.get("taxa_atencao")
+    return [float(estacao["cota_atencao"]), float(estacao["cota_alerta"]), float(estacao["cota_transbordo"]),
+            float(taxa) if taxa is not None else None, RIOS_JANELA_TAXA]
+
+
+# ============================================================
+# ARMAZENAMENTO COLUNAR
+# ============================================================
+
+def _pasta(estacao_id):
+    return os.path.join(RIOS_PASTA, re.sub(r"[^0-9A-Za-z_-]", "_", str(estacao_id)))
+
+
+def _arquivo(estacao_id, coluna):
+    return os.path.join(_pasta(estacao_id), f"{coluna}.bin")
+
+
+def _tamanho(estacao_id, coluna):
+    caminho = _arquivo(estacao_id, coluna)
+    return os.path.getsize(caminho) // np.dtype(COLUNAS[coluna]).itemsize if os.path.exists(caminho) else 0
+
+
+def _ler(estacao_id, coluna, inicio=0, fim=None):
+    """Posições [inicio, fim) de uma coluna, lidas direto do arquivo."""
+    tipo = np.dtype(COLUNAS[coluna])
+    fim = _tamanho(estacao_id, coluna) if fim is None else fim
+    if fim <= inicio:
+        return np.empty(0, tipo)
+    return np.fromfile(_arquivo(estacao_id, coluna), dtype=tipo, count=fim - inicio, offset=inicio * tipo.itemsize)
+
+
+def _gravar(estacao_id, coluna, valores, a_partir):
+    """Grava `valores` a partir da posição `a_partir`, descartando o que houver depois dela."""
+    tipo = np.dtype(COLUNAS[coluna])
+    caminho = _arquivo(estacao_id, coluna)
+    with open(caminho, "r+b" if os.path.exists(caminho) else "wb") as arquivo:
+        arquivo.truncate(a_partir * tipo.itemsize)
+        arquivo.seek(a_partir * tipo.itemsize)
+        arquivo.write(np.ascontiguousarray(valores, dtype=tipo).tobytes())
+
+
+def _ler_estado(estacao_id):
+    try:
+        with open(os.path.join(_pasta(estacao_id), "estado.json"), encoding="utf-8") as arquivo:
+            return json.load(arquivo)
+    except FileNotFoundError:
+        return None
+
+
+def _gravar_estado(estacao_id, estado):
+    # Gravado por último e de forma atômica: "leituras" marca até onde as colunas valem
+    caminho = os.path.join(_pasta(estacao_id), "estado.json")
+    with open(caminho + ".tmp", "w", encoding="utf-8") as arquivo:
+        json.dump(estado, arquivo)
+    os.replace(caminho + ".tmp", caminho)
+
+
+# ============================================================
+# CÁLCULO INCREMENTAL (TAXA DE SUBIDA E SITUAÇÃO)
+# ============================================================
+
+def _inicio_janela(estacao_id, posicao, janela):
+    """Primeira posição cujo instante está dentro da janela que termina na leitura `posicao`."""
+    limite = int(_ler(estacao_id, "instante", posicao, posicao + 1)[0]) - janela
+    recuo = 64
+    while True:
+        inicio = max(0, posicao - recuo)
+        instantes = _ler(estacao_id, "instante", inicio, posicao + 1)
+        if inicio == 0 or instantes[0] <= limite:
+            return inicio + int(np.searchsorted(instantes, limite))
+        recuo *= 4
+
+
+def classificar(niveis, taxas, parametros):
+    """Código de situação de cada leitura: pela cota e, abaixo da cota de atenção, pela subida."""
+    atencao, alerta, transbordo, taxa_atencao, _ = parametros
+    codigos = np.searchsorted(np.array([atencao, alerta, transbordo], np.float32), niveis, side="right")
+    if taxa_atencao is not None:
+        codigos = np.where((codigos == 0) & (taxas >= taxa_atencao), 1, codigos)
+    return codigos.astype(np.uint8)
+
+
+def _atualizar(estacao, instantes, niveis):
+    """
+    Acrescenta as leituras de uma estação (ordenadas e sem instantes repetidos) e
+    recalcula taxa, situação e mudanças de situação só a partir da primeira posição
+    afetada: o fim da série, normalmente, ou o ponto onde entra uma leitura atrasada.
+    Leituras já gravadas com o mesmo valor são ignoradas. Retorna (leituras gravadas,
+    novas ou corrigidas, e o estado da estação).
+    """
+    ident = estacao["id"]
+    os.makedirs(_pasta(ident), exist_ok=True)
+    parametros = _parametros(estacao)
+    estado = _ler_estado(ident)
+    if estado:
+        n = estado["leituras"]
+        derivadas = n if estado["parametros"] == parametros else 0
+    else:
+        # Sem estado (primeira carga ou estado perdido): vale o que as duas colunas têm em comum
+        n = min(_tamanho(ident, "instante"), _tamanho(ident, "nivel"))
+        derivadas = 0
+
+    k, novas = n, 0
+    if len(instantes) and n and instantes[0] <= _ler(ident, "instante", n - 1, n)[0]:
+        # Lote que volta no tempo: só então a coluna de instantes é lida inteira
+        gravados = _ler(ident, "instante", 0, n)
+        k = int(np.searchsorted(gravados, instantes[0]))
+        antigos_i, antigos_n = gravados[k:], _ler(ident, "nivel", k, n)
+        # Reenvio de leituras já gravadas com o mesmo valor: nada muda
+        pos = np.searchsorted(antigos_i, instantes)
+        dentro = pos < len(antigos_i)
+        repetida = np.zeros(len(instantes), bool)
+        repetida[dentro] = (antigos_i[pos[dentro]] == instantes[dentro]) & (antigos_n[pos[dentro]] == niveis[dentro])
+        instantes, niveis = instantes[~repetida], niveis[~repetida]
+        k = int(np.searchsorted(gravados, instantes[0])) if len(instantes) else n
+
+    if len(instantes):
+        cauda_i = np.concatenate([_ler(ident, "instante", k, n), instantes])
+        cauda_n = np.concatenate([_ler(ident, "nivel", k, n), niveis])
+        if k < n:
+            # Leituras atrasadas: intercala com as gravadas; no mesmo instante, vale a nova
+            ordem = np.argsort(cauda_i, kind="stable")
+            cauda_i, cauda_n = cauda_i[ordem], cauda_n[ordem]
+            ultima = np.r_[cauda_i[1:] != cauda_i[:-1], True]
+            cauda_i, cauda_n = cauda_i[ultima], cauda_n[ultima]
+        _gravar(ident, "instante", cauda_i, k)
+        _gravar(ident, "nivel", cauda_n, k)
+        novas = len(instantes)
+        n = k + len(cauda_i)
+
+    d = min(derivadas, k)
+    if estado and d == n == estado["leituras"]:
+        return 0, estado
+
+    # Derivadas de [d, n): a janela da taxa começa algumas leituras antes de d
+    eventos = [e for e in (estado or {}).get("eventos", []) if e["posicao"] < d]
+    if d < n:
+        janela = int(RIOS_JANELA_TAXA * 3600)
+        base = _inicio_janela(ident, d, janela)
+        inst, niv = _ler(ident, "instante", base, n), _ler(ident, "nivel", base, n)
+        novos_i, novos_n = inst[d - base:], niv[d - base:]
+        origem = np.searchsorted(inst, novos_i - janela)
+        horas = (novos_i - inst[origem]) / 3600
+        taxas = np.divide(novos_n - niv[origem], horas, out=np.zeros(len(novos_i)), where=horas > 0)
+        codigos = classificar(novos_n, taxas, parametros)
+        _gravar(ident, "taxa", taxas, d)
+        _gravar(ident, "situacao", codigos, d)
+
+        anterior = int(_ler(ident, "situacao", d - 1, d)[0]) if d else 0
+        previos = np.r_[anterior, codigos[:-1]]
+        for i in np.flatnonzero(codigos != previos):
+            eventos.append({
+                "posicao": d + int(i), "instante": int(novos_i[i]), "nivel": round(float(novos_n[i]), 3),
+                "de": SITUACOES[previos[i]], "para": SITUACOES[codigos[i]],
+            })
+
+    ultima = {c: _ler(ident, c, n - 1, n)[0] for c in COLUNAS} if n else {}
+    estado = {
+        "leituras": n, "parametros": parametros,
+        "instante": int(ultima["instante"]) if n else None,
+        "nivel": round(float(ultima["nivel"]), 3) if n else None,
+        "taxa": round(float(ultima["taxa"]), 4) if n else None,
+        "situacao": SITUACOES[ultima["situacao"]] if n else "normal",
+        "eventos": eventos[-RIOS_EVENTOS:],
+    }
+    _gravar_estado(ident, estado)
+    return novas, estado
+
+
+def _para_publicar(ident, estado):
+    return {
+        "id": ident, "situacao": estado["situacao"], "nivel_atual": estado["nivel"],
+        "taxa_subida": estado["taxa"],
+        "leitura_em": _texto(estado["instante"]),
+    }
+
+
+# ============================================================
+# INGESTÃO
+# ============================================================
+
+def _converter_instantes(serie):
+    """dd/mm/aaaa HH:MM[:SS] ou ISO 8601; com fuso, convertido para FUSO. Inválidos viram NaT."""
+    import pandas as pd
+
+    com_fuso = serie.str.contains(r"(?:Z|[+-]\d\d:?\d\d)$")
+    sem_fuso = serie.where(~com_fuso, "")
+    instantes = pd.to_datetime(sem_fuso, format="%d/%m/%Y %H:%M", errors="coerce")
+    for formato in ("%d/%m/%Y %H:%M:%S", "ISO8601"):
+        instantes = instantes.fillna(pd.to_datetime(sem_fuso.where(instantes.isna(), ""), format=formato, errors="coerce"))
+    if com_fuso.any():
+        utc = pd.to_datetime(serie.where(com_fuso, ""), format="ISO8601", errors="coerce", utc=True)
+        instantes = instantes.fillna(utc.dt.tz_convert(FUSO).dt.tz_localize(None))
+    return instantes
+
+
+def ler_leituras(arquivo, nome):
+    """
+    Leituras de um CSV/XLSX com estacao, instante e nivel (metros; vírgula decimal aceita).
+    Retorna (DataFrame com instante em segundos, quantidade de linhas inválidas).
+    """
+    import pandas as pd
+    from services.importacao import ler_planilha
+
+    df = ler_planilha(arquivo, nome).rename(columns=SINONIMOS)
+    faltantes = [c for c in MODELO if c not in df]
+    if faltantes:
+        raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(faltantes)}")
+    instantes = _converter_instantes(df["instante"])
+    niveis = pd.to_numeric(df["nivel"].str.replace(",", ".", regex=False), errors="coerce")
+    validas = instantes.notna() & niveis.notna() & (df["estacao"] != "")
+    return pd.DataFrame({
+        "estacao": df.loc[validas, "estacao"],
+        "instante": instantes[validas].to_numpy("datetime64[s]").astype(np.int64),
+        "nivel": niveis[validas].to_numpy(np.float32),
+    }), int((~validas).sum())
+
+
+def modelo_csv():
+    return b"estacao,instante,nivel\n14990000,01/03/2025 08:15,\"12,34\"\n"
+
+
+@medir("escrita", "ingerir_leituras")
+def ingerir(leituras, estacoes, publicar=True):
+    """
+    Grava as leituras (DataFrame estacao, instante em segundos, nivel) das estações
+    cadastradas e atualiza a situação de cada uma. No mesmo lote, um instante repetido
+    vale pela última linha. Retorna {"novas", "estacoes" (ids alterados),
+    "desconhecidas" (códigos sem cadastro), "erro_publicacao"}.
+    """
+    por_id = {str(e["id"]): e for e in estacoes}
+    leituras = leituras.assign(estacao=leituras["estacao"].astype(str))
+    conhecidas = leituras["estacao"].isin(por_id)
+    resumo = {"novas": 0, "estacoes": [], "desconhecidas": sorted(leituras.loc[~conhecidas, "estacao"].unique()),
+              "erro_publicacao": None}
+    leituras = leituras[conhecidas].sort_values(["estacao", "instante"], kind="stable") \
+        .drop_duplicates(["estacao", "instante"], keep="last")
+
+    estados = []
+    with _trava:
+        for ident, grupo in leituras.groupby("estacao", sort=False):
+            estacao = dict(por_id[ident], id=ident)
+            novas, estado = _atualizar(estacao, grupo["instante"].to_numpy(np.int64), grupo["nivel"].to_numpy(np.float32))
+            if novas:
+                resumo["novas"] += novas
+                resumo["estacoes"].append(ident)
+                estados.append(_para_publicar(ident, estado))
+
+    if publicar and estados:
+        try:
+            publicar_situacao(estados)
+        except Exception as erro:
+            # A série local já está gravada; a situação sobe na próxima ingestão
+            resumo["erro_publicacao"] = str(erro)
+    return resumo
+
+
+@medir("escrita", "recalcular_rios")
+def recalcular(estacoes, publicar=True):
+    """Reclassifica as estações cujas cotas mudaram desde a última ingestão (sem novas leituras)."""
+    estados = []
+    with _trava:
+        for estacao in estacoes:
+            ident = str(estacao["id"])
+            anterior = _ler_estado(ident)
+            if anterior is None or anterior["parametros"] == _parametros(estacao):
+                continue
+            _, estado = _atualizar(dict(estacao, id=ident), np.empty(0, np.int64), np.empty(0, np.float32))
+            estados.append(_para_publicar(ident, estado))
+    if publicar and estados:
+        publicar_situacao(estados)
+    return len(estados)
+
+
+def ingerir_pasta(estacoes):
+    """
+    Processa de uma vez os arquivos da pasta de entrada, em ordem de chegada, e os
+    move para processados/ (ou com_erro/, se ilegíveis). Sem arquivos, retorna None.
+    """
+    if not os.path.isdir(RIOS_ENTRADA):
+        return None
+    arquivos = sorted(
+        (e for e in os.scandir(RIOS_ENTRADA) if e.is_file() and e.name.lower().endswith((".csv", ".xlsx"))),
+        key=lambda e: e.stat().st_mtime,
+    )
+    if not arquivos:
+        return None
+
+    import pandas as pd
+
+    partes, invalidas, destinos = [], 0, {}
+    for entrada in arquivos:
+        try:
+            with open(entrada.path, "rb") as arquivo:
+                df, ruins = ler_leituras(arquivo, entrada.name)
+            partes.append(df)
+            invalidas += ruins
+            destinos[entrada.path] = "processados"
+        except Exception:
+            destinos[entrada.path] = "com_erro"
+
+    resumo = ingerir(pd.concat(partes, ignore_index=True), estacoes) if partes else \
+        {"novas": 0, "estacoes": [], "desconhecidas": [], "erro_publicacao": None}
+
+    # Só depois de gravadas: se a ingestão falhar, os arquivos ficam para a próxima vez
+    carimbo = time.strftime("%Y%m%d%H%M%S")
+    for caminho, destino in destinos.items():
+        os.makedirs(os.path.join(RIOS_ENTRADA, destino), exist_ok=True)
+        os.replace(caminho, os.path.join(RIOS_ENTRADA, destino, f"{carimbo}_{os.path.basename(caminho)}"))
+    return dict(resumo, arquivos=len(arquivos), invalidas=invalidas,
+                com_erro=[os.path.basename(c) for c, d in destinos.items() if d == "com_erro"])
+
+
+@st.cache_resource(show_spinner=False)
+def iniciar_monitor():
+    """Thread única por processo que ingere o que chegar na pasta de entrada."""
+    supabase = cliente()
+
+    def ciclo():
+        while True:
+            try:
+                estacoes = _consultar_estacoes(supabase)
+                recalcular(estacoes)
+                ingerir_pasta(estacoes)
+            except Exception:
+                # Sem conexão: os arquivos continuam na pasta até o próximo ciclo
+                pass
+            time.sleep(RIOS_INTERVALO)
+
+    thread = threading.Thread(target=ciclo, name="rios-redec", daemon=True)
+    thread.start()
+    return thread
+
+
+# ============================================================
+# CONSULTAS (EXIBIDAS NA TELA)
+# ============================================================
+
+def _segundos(momento):
+    return int(np.datetime64(momento, "s").astype(np.int64))
+
+
+def _texto(segundos):
+    return None if segundos is None else str(np.datetime64(int(segundos), "s"))
+
+
+def agora():
+    """Hora local atual, na mesma escala das leituras."""
+    return datetime.now(FUSO).replace(tzinfo=None)
+
+
+def situacao_estacoes(estacoes):
+    """Cadastro de cada estação com a última leitura, taxa e situação calculadas localmente."""
+    limite = _segundos(agora()) - RIOS_SEM_DADOS * 3600
+    linhas = []
+    for estacao in estacoes:
+        estado = _ler_estado(estacao["id"]) or {}
+        instante = estado.get("instante")
+        linhas.append(dict(
+            estacao,
+            situacao=estado.get("situacao", "normal") if instante and instante >= limite else "sem_dados",
+            nivel=estado.get("nivel"), taxa=estado.get("taxa"), leitura_em=instante, leituras=estado.get("leituras", 0),
+        ))
+    return linhas
+
+
+def eventos(estacao_id):
+    """Mudanças de situação da estação, da mais recente para a mais antiga."""
+    return list(reversed((_ler_estado(estacao_id) or {}).get("eventos", [])))
+
+
+def serie_reduzida(estacao_id, inicio=None, fim=None, pontos=600):
+    """
+    Série de [inicio, fim) reduzida a no máximo `pontos` intervalos de largura fixa
+    (múltipla de 15 min): mínimo, média e máximo do nível, maior taxa e pior situação
+    de cada intervalo, para que um pico nunca desapareça do gráfico.
+    Retorna (DataFrame, largura do intervalo em minutos).
+    """
+    import pandas as pd
+
+    with _trava:
+        n = (_ler_estado(estacao_id) or {}).get("leituras", 0)
+        instantes = _ler(estacao_id, "instante", 0, n)
+        a = int(np.searchsorted(instantes, _segundos(inicio))) if inicio else 0
+        b = int(np.searchsorted(instantes, _segundos(fim))) if fim else n
+        instantes = instantes[a:b]
+        niveis, taxas = _ler(estacao_id, "nivel", a, b), _ler(estacao_id, "taxa", a, b)
+        situacoes = _ler(estacao_id, "situacao", a, b)
+
+    colunas = ["instante", "minimo", "media", "maximo", "taxa", "situacao"]
+    if not len(instantes):
+        return pd.DataFrame(columns=colunas), 15
+
+    largura = max(900, -(-int(instantes[-1] - instantes[0] + 1) // pontos // 900) * 900)
+    grupos = (instantes - instantes[0]) // largura
+    inicios = np.r_[0, np.flatnonzero(np.diff(grupos)) + 1]
+    contagem = np.diff(np.r_[inicios, len(instantes)])
+    return pd.DataFrame({
+        "instante": pd.to_datetime(instantes[0] + grupos[inicios] * largura, unit="s"),
+        "minimo": np.minimum.reduceat(niveis, inicios),
+        "media": np.add.reduceat(niveis.astype(np.float64), inicios) / contagem,
+        "maximo": np.maximum.reduceat(niveis, inicios),
+        "taxa": np.maximum.reduceat(taxas, inicios),
+        "situacao": np.array(SITUACOES)[np.maximum.reduceat(situacoes, inicios)],
+    }), largura // 60
@@ -0,0 +1,193 @@
+# services/snapshot.py
+
+import streamlit as st
+
+from services.cache import invalidar
+from services.metricas import cronometro
+from services.prefetch import prefetch
+from services.supabase import buscar_equipe
+from services.historico import FUNCAO_COM_SUCESSAO_ESTRITA, buscar_historico, buscar_ocupantes_atuais
+from services.ferias import buscar_ferias
+from services.cargos import historico as historico_funcao
+from services.intervalos import IndiceIntervalos, buscar_indice
+
+# Chave da sessão onde o snapshot atualizado por uma escrita espera o próximo rerun
+CHAVE_SESSAO = "snapshot_pos_escrita"
+
+
+class Snapshot:
+    """
+    Retrato dos dados usados em uma execução (rerun) da tela.
+    Cada tabela é buscada no Supabase no máximo uma vez; os acessos
+    seguintes reaproveitam o que já foi carregado.
+    """
+
+    FONTES = {
+        "equipe": buscar_equipe,
+        "historico": buscar_historico,
+        "ocupantes": buscar_ocupantes_atuais,
+        "ferias": buscar_ferias,
+        "coordenadores": lambda: historico_funcao(FUNCAO_COM_SUCESSAO_ESTRITA),
+        "indice": buscar_indice,
+    }
+
+    # Valor entregue às telas quando a tabela falhou no carregamento desta execução
+    VAZIOS = {
+        "equipe": list, "historico": list, "ocupantes": list, "ferias": list, "coordenadores": list,
+        "indice": lambda: IndiceIntervalos([]),
+    }
+
+    def __init__(self):
+        self._dados = {}
+        self.erros = {}
+        self.chamadas_remotas = 0
+        self.chamadas_economizadas = 0
+
+    @classmethod
+    def da_sessao(cls):
+        """
+        Retorna o snapshot deixado por uma escrita no rerun anterior (já com a
+        alteração aplicada) ou um snapshot novo.
+        """
+        dados = st.session_state.pop(CHAVE_SESSAO, None)
+        if dados is None:
+            return cls()
+        dados.erros = {}
+        dados.chamadas_remotas = 0
+        dados.chamadas_economizadas = 0
+        return dados
+
+    def manter_na_sessao(self):
+        """Guarda este snapshot para ser reaproveitado no próximo rerun da sessão."""
+        st.session_state[CHAVE_SESSAO] = self
+
+    def recarregar(self):
+        """Descarta os dados locais e o cache compartilhado: o próximo acesso vai ao banco."""
+        self._dados.clear()
+        st.session_state.pop(CHAVE_SESSAO, None)
+        invalidar("equipe", juncoes=True)
+        invalidar("historico_redec")
+        invalidar("ferias_licencas")
+
+    def carregar(self, *nomes):
+        """
+        Busca em paralelo as tabelas informadas que ainda não foram carregadas.
+        Tabelas que falharem ficam em `erros`: nesta execução as telas recebem uma
+        tabela vazia (o aviso já foi exibido) e a busca é refeita no próximo rerun.
+        """
+        pendentes = {nome: self.FONTES[nome] for nome in nomes if nome not in self._dados}
+        with cronometro("Snapshot.carregar", "leitura"):
+            dados, erros = prefetch(pendentes)
+        self._dados.update(dados)
+        self.erros.update(erros)
+        self.chamadas_remotas += len(pendentes)
+        return self
+
+    def _obter(self, nome):
+        if nome in self._dados:
+            self.chamadas_economizadas += 1
+        elif nome in self.erros:
+            # Não entra em _dados: o próximo rerun tenta o banco de novo
+            return self.VAZIOS[nome]()
+        else:
+            self._dados[nome] = self.FONTES[nome]()
+            self.chamadas_remotas += 1
+        return self._dados[nome]
+
+    @property
+    def equipe(self):
+        return self._obter("equipe")
+
+    @property
+    def historico(self):
+        return self._obter("historico")
+
+    @property
+    def ocupantes(self):
+        return self._obter("ocupantes")
+
+    @property
+    def ferias(self):
+        return self._obter("ferias")
+
+    @property
+    def coordenadores(self):
+        return self._obter("coordenadores")
+
+    @property
+    def indice(self):
+        return self._obter("indice")
+
+    # ============================================================
+    # ATUALIZAÇÃO OTIMISTA (aplica a linha devolvida pelo Supabase)
+    # Só altera tabelas já carregadas; as demais serão buscadas do banco.
+    # O índice de intervalos não é atualizado aos poucos: é descartado e reconstruído.
+    # ============================================================
+
+    def _embutir_equipe(self, equipe_id):
+        """Monta o equipe(nome, posto_graduacao) embutido a partir da equipe carregada."""
+        membro = next((m for m in self._dados.get("equipe", []) if m["id"] == equipe_id), None)
+        if membro is None:
+            return None
+        return {"nome": membro.get("nome"), "posto_graduacao": membro.get("posto_graduacao")}
+
+    def aplicar_membro(self, linha):
+        """Inclui ou substitui (pelo id) um servidor e propaga nome/posto às tabelas que o embutem."""
+        self._dados.pop("indice", None)
+        if "equipe" in self._dados:
+            equipe = [m for m in self._dados["equipe"] if m["id"] != linha["id"]]
+            equipe.append(linha)
+            self._dados["equipe"] = sorted(equipe, key=lambda m: m.get("nome") or "")
+
+        embutido = {"nome": linha.get("nome"), "posto_graduacao": linha.get("posto_graduacao")}
+        for nome in ("historico", "ocupantes"):
+            for registro in self._dados.get(nome, []):
+                if registro.get("equipe_id") == linha["id"]:
+                    registro["equipe"] = dict(embutido)
+        for registro in self._dados.get("ferias", []):
+            if registro.get("equipe_id") == linha["id"]:
+                registro["equipe"] = {"nome": linha.get("nome")}
+
+    def remover_membro(self, linha):
+        """Retira um servidor excluído; os registros que o embutiam ficam sem vínculo."""
+        self._dados.pop("indice", None)
+        if "equipe" in self._dados:
+            self._dados["equipe"] = [m for m in self._dados["equipe"] if m["id"] != linha["id"]]
+        for nome in ("historico", "ocupantes", "ferias"):
+            for registro in self._dados.get(nome, []):
+                if registro.get("equipe_id") == linha["id"]:
+                    registro["equipe"] = None
+
+    def aplicar_historico(self, linha):
+        """
+        Registra um novo mandato. Para a função de sucessão estrita, o mandato
+        em aberto anterior é encerrado na data de entrada do novo, como no banco.
+        """
+        linha = dict(linha, equipe=self._embutir_equipe(linha.get("equipe_id")))
+        self._dados.pop("indice", None)
+
+        if linha["funcao"] == FUNCAO_COM_SUCESSAO_ESTRITA:
+            for registro in self._dados.get("historico", []):
+                if registro["funcao"] == linha["funcao"] and not registro.get("data_saida"):
+                    registro["data_saida"] = linha["data_entrada"]
+            for registro in self._dados.get("coordenadores", []):
+                if not registro.get("data_saida"):
+                    registro["data_saida"] = linha["data_entrada"]
+            if "coordenadores" in self._dados:
+                self._dados["coordenadores"].insert(0, linha)
+            if "ocupantes" in self._dados:
+                self._dados["ocupantes"] = [o for o in self._dados["ocupantes"] if o["funcao"] != linha["funcao"]]
+
+        if "historico" in self._dados:
+            self._dados["historico"].insert(0, linha)
+        if "ocupantes" in self._dados and not linha.get("data_saida"):
+            self._dados["ocupantes"].insert(0, linha)
+
+    def aplicar_ferias(self, linha):
+        """Registra um novo afastamento no topo da lista (ordem decrescente de início)."""
+        if "ferias" in self._dados:
+            embutido = self._embutir_equipe(linha.get("equipe_id"))
+            linha = dict(linha, equipe={"nome": embutido["nome"]} if embutido else None)
+            self._dados["ferias"] = sorted(
+                self._dados["ferias"] + [linha], key=lambda f: f.get("inicio") or "", reverse=True
+            )
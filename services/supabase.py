@@ -1,23 +1,53 @@
 # services/supabase.py
 
-from supabase import create_client
-import streamlit as st
-
-url = st.secrets["SUPABASE_URL"]
-key = st.secrets["SUPABASE_KEY"]
-
-supabase = create_client(url, key)
+from services.conexao import cliente
+from services.metricas import medir
+from services.cache import em_cache, invalidar
+from services import replica
 
+@em_cache("equipe")
 def buscar_equipe():
-    response = supabase.table("equipe").select("*").order("nome").execute()
-    return response.data
-
+    return replica.ler(
+        lambda: cliente().table("equipe").select("*").order("nome").execute().data,
+        ("equipe",),
+        lambda equipe: replica.ordenar(equipe, "nome")
+    )
+
+@medir("consulta")
+def consultar_equipe_pagina(cursor=None, limite=500, equipe_id=None):
+    """
+    Uma página da equipe em ordem de id, continuando após o id `cursor` (sem cache;
+    usada pela exportação). Retorna (linhas, proximo_cursor), como as demais paginações.
+    """
+    consulta = cliente().table("equipe").select("*")
+    if equipe_id:
+        consulta = consulta.eq("id", equipe_id)
+    if cursor:
+        consulta = consulta.gt("id", cursor)
+    linhas = consulta.order("id").limit(limite + 1).execute().data
+
+    if len(linhas) > limite:
+        return linhas[:limite], linhas[limite - 1]["id"]
+    return linhas, None
+
+@medir("escrita")
 def inserir_membro(dados):
-    return supabase.table("equipe").insert(dados).execute()
+    resposta = cliente().table("equipe").insert(dados).execute()
+    # Novo membro ainda não aparece em histórico/férias: só a listagem fica desatualizada
+    invalidar("equipe")
+    return resposta
 
+@medir("escrita")
 def atualizar_membro(id, dados):
-    return supabase.table("equipe").update(dados).eq("id", id).execute()
+    resposta = cliente().table("equipe").update(dados).eq("id", id).execute()
+    # Nome e posto são exibidos nas consultas que embutem equipe(...)
+    invalidar("equipe", juncoes=True)
+    return resposta
 
+@medir("escrita")
 def excluir_membro(id):
-    return supabase.table("equipe").delete().eq("id", id).execute()
-
+    resposta = cliente().table("equipe").delete().eq("id", id).execute()
+    # A sincronização incremental não enxerga exclusões
+    replica.remover("equipe", [id])
+    invalidar("equipe", juncoes=True)
+    return resposta
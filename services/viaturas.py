@@ -0,0 +1,203 @@
+# services/viaturas.py
+
+import uuid
+from datetime import date, datetime, timezone
+
+from services.conexao import cliente
+from services.metricas import medir
+from services.cache import em_cache, invalidar
+
+# Tipos de registro do diário de bordo (ver sql/008_viaturas.sql)
+TIPOS_REGISTRO = {
+    "saida": "Saída",
+    "retorno": "Retorno",
+    "abastecimento": "Abastecimento",
+    "manutencao": "Entrada em manutenção",
+    "liberacao": "Liberação da manutenção",
+    "hodometro": "Leitura do hodômetro",
+}
+
+SITUACOES = {"disponivel": "Disponível", "em_uso": "Em uso", "manutencao": "Em manutenção"}
+
+# Situação depois de cada registro (os demais não a mudam), como no gatilho de sql/008
+SITUACAO_APOS = {"saida": "em_uso", "retorno": "disponivel", "manutencao": "manutencao", "liberacao": "disponivel"}
+
+# Registros que exigem km ou litros (os mesmos checks da tabela)
+EXIGEM_KM = ("saida", "retorno", "hodometro")
+EXIGEM_LITROS = ("abastecimento",)
+
+# Meses de resumo exibidos na tela
+MESES_RESUMO = 12
+
+
+# ============================================================
+# LEITURAS
+# ============================================================
+
+# O resumo de cada viatura muda a cada registro do diário: as leituras abaixo
+# dependem de viaturas_registros, e o cadastro (viaturas) as invalida como junção.
+
+@em_cache("viaturas_registros", juncoes=("viaturas", "equipe"))
+def buscar_viaturas():
+    """Viaturas com o resumo mantido pelo banco (situação, hodômetro, revisão) e o motorista em viagem."""
+    return cliente().table("viaturas") \
+        .select("*, equipe(nome, posto_graduacao)") \
+        .order("prefixo") \
+        .execute().data
+
+
+@em_cache("viaturas_registros", juncoes=("viaturas",))
+def buscar_resumo_mensal(desde):
+    """Resumos mensais (km, litros, horas em manutenção) de todas as viaturas a partir do mês `desde`."""
+    return cliente().table("viaturas_mensal") \
+        .select("*") \
+        .gte("mes", str(desde)) \
+        .order("mes") \
+        .execute().data
+
+
+@medir("consulta")
+def consultar_registros_pagina(cursor=None, limite=50, viatura_id=None, tipo=None):
+    """
+    Uma página do diário de bordo, do registro mais recente para o mais antigo
+    (cursor = id do último registro da página anterior; índice por viatura e id).
+    Retorna (linhas, proximo_cursor), como as demais paginações.
+    """
+    consulta = cliente().table("viaturas_registros") \
+        .select("*, viaturas(prefixo), equipe(nome, posto_graduacao)")
+    if viatura_id:
+        consulta = consulta.eq("viatura_id", viatura_id)
+    if tipo:
+        consulta = consulta.eq("tipo", tipo)
+    if cursor:
+        consulta = consulta.lt("id", cursor)
+    linhas = consulta.order("id", desc=True).limit(limite + 1).execute().data
+
+    if len(linhas) > limite:
+        return linhas[:limite], linhas[limite - 1]["id"]
+    return linhas, None
+
+buscar_registros_pagina = em_cache("viaturas_registros", juncoes=("viaturas", "equipe"))(consultar_registros_pagina)
+
+
+# ============================================================
+# INDICADORES (SOBRE OS RESUMOS JÁ CARREGADOS)
+# ============================================================
+
+def dias_desde_revisao(viatura, hoje=None):
+    return ((hoje or date.today()) - date.fromisoformat(viatura["ultima_revisao_em"])).days
+
+
+def revisao_vencida(viatura, hoje=None):
+    """Vencida por data ou por quilometragem (o mesmo critério dos índices de revisão)."""
+    return (date.fromisoformat(viatura["proxima_revisao_em"]) <= (hoje or date.today())
+            or float(viatura["km_para_revisao"]) <= 0)
+
+
+def com_pendentes(viatura, registros):
+    """
+    A viatura como ficará depois dos registros ainda na fila de escritas (parâmetros de
+    registrar_viatura, na ordem em que foram feitos): situação e hodômetro.
+    """
+    viatura = dict(viatura)
+    for registro in registros:
+        if registro["p_viatura_id"] != viatura["id"]:
+            continue
+        viatura["situacao"] = SITUACAO_APOS.get(registro["p_tipo"], viatura["situacao"])
+        if registro.get("p_km") is not None:
+            viatura["hodometro_km"] = max(float(viatura["hodometro_km"]), float(registro["p_km"]))
+    return viatura
+
+
+def disponiveis(viaturas):
+    return [v for v in viaturas if v.get("ativa") and v["situacao"] == "disponivel"]
+
+
+def mes_inicial(meses=MESES_RESUMO, hoje=None):
+    """Primeiro dia do mês `meses - 1` meses antes do atual."""
+    hoje = hoje or date.today()
+    indice = hoje.year * 12 + hoje.month - 1 - (meses - 1)
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def indicadores_mensais(resumos):
+    """
+    Acrescenta a cada resumo mensal o consumo (km/l) e a disponibilidade (% do mês
+    fora de manutenção; o mês corrente conta até agora).
+    """
+    agora = datetime.now()
+    saida = []
+    for r in resumos:
+        inicio = date.fromisoformat(r["mes"])
+        seguinte = date(inicio.year + inicio.month // 12, inicio.month % 12 + 1, 1)
+        fim = min(datetime.combine(seguinte, datetime.min.time()), agora)
+        horas = max((fim - datetime.combine(inicio, datetime.min.time())).total_seconds() / 3600, 1)
+        litros = float(r["litros"])
+        saida.append(dict(
+            r,
+            consumo=round(float(r["km"]) / litros, 2) if litros else None,
+            disponibilidade=round(max(0.0, 100 * (1 - float(r["horas_manutencao"]) / horas)), 1),
+        ))
+    return saida
+
+
+# ============================================================
+# ESCRITAS (RPC IDEMPOTENTE, TAMBÉM ACEITA PELA FILA)
+# ============================================================
+
+def parametros_registro(viatura_id, tipo, km=None, litros=None, valor=None, destino=None, motorista_id=None,
+                        descricao=None, revisao=False):
+    """Parâmetros da RPC registrar_viatura (também gravados na fila de escritas, services/fila.py)."""
+    if tipo not in TIPOS_REGISTRO:
+        raise ValueError(f"Tipo de registro inválido: {tipo}")
+    if tipo in EXIGEM_KM and km is None:
+        raise ValueError("Informe o hodômetro (km).")
+    if tipo in EXIGEM_LITROS and not litros:
+        raise ValueError("Informe os litros abastecidos.")
+    return {
+        "p_viatura_id": viatura_id,
+        "p_tipo": tipo,
+        "p_km": km,
+        "p_litros": litros or None,
+        "p_valor": valor or None,
+        "p_destino": destino or None,
+        "p_motorista_id": motorista_id,
+        "p_descricao": descricao or None,
+        "p_revisao": bool(revisao) and tipo == "liberacao",
+        # Instante do fato, não do envio: registros da fila podem chegar depois
+        "p_registrado_em": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+@medir("escrita")
+def registrar(parametros):
+    """Grava um registro do diário; o banco atualiza os resumos ou recusa (viatura indisponível, hodômetro menor)."""
+    parametros = dict(parametros)
+    parametros.setdefault("p_chave_idempotencia", str(uuid.uuid4()))
+    resposta = cliente().rpc("registrar_viatura", parametros).execute()
+    invalidar("viaturas_registros")
+    return resposta
+
+
+@medir("escrita")
+def inserir_viatura(dados):
+    # O hodômetro do cadastro é o ponto de partida dos km rodados
+    dados = dict(dados, hodometro_km=dados.get("hodometro_inicial_km", 0))
+    resposta = cliente().table("viaturas").insert(dados).execute()
+    invalidar("viaturas", juncoes=True)
+    return resposta
+
+
+@medir("escrita")
+def atualizar_viatura(id, dados):
+    resposta = cliente().table("viaturas").update(dados).eq("id", id).execute()
+    invalidar("viaturas", juncoes=True)
+    return resposta
+
+
+@medir("escrita")
+def conferir_resumos():
+    """Refaz os resumos de todas as viaturas a partir do diário de bordo."""
+    resposta = cliente().rpc("recalcular_resumos_viaturas").execute()
+    invalidar("viaturas_registros")
+    return resposta
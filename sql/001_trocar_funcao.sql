@@ -0,0 +1,41 @@
+-- sql/001_trocar_funcao.sql
+--
+-- Troca de função atômica, chamada pelo app via RPC (services/historico.py e services/cargos.py).
+-- Encerrar o mandato em aberto e inserir o novo acontecem na mesma transação:
+-- uma falha no meio não deixa o cargo vago.
+--
+-- Executar no SQL Editor do Supabase.
+
+create or replace function public.trocar_funcao(
+    p_equipe_id         historico_redec.equipe_id%type,
+    p_funcao            historico_redec.funcao%type,
+    p_data_entrada      historico_redec.data_entrada%type default current_date,
+    p_encerrar_anterior boolean default true
+)
+returns setof historico_redec
+language plpgsql
+as $$
+begin
+    -- Serializa trocas concorrentes da mesma função: o segundo operador espera o
+    -- primeiro terminar e então encerra o mandato que acabou de ser criado.
+    perform pg_advisory_xact_lock(hashtext('historico_redec:' || p_funcao));
+
+    if p_encerrar_anterior then
+        update historico_redec
+           set data_saida = p_data_entrada
+         where funcao = p_funcao
+           and data_saida is null;
+    end if;
+
+    return query
+        insert into historico_redec (equipe_id, funcao, data_entrada, data_saida)
+        values (p_equipe_id, p_funcao, p_data_entrada, null)
+        returning *;
+end;
+$$;
+
+-- No máximo um Coordenador ativo, mesmo para inserções que não passam pela função acima.
+-- Antes de criar, encerre manualmente eventuais Coordenadores ativos duplicados.
+create unique index if not exists historico_redec_coordenador_ativo
+    on historico_redec (funcao)
+    where funcao = 'Coordenador' and data_saida is null;
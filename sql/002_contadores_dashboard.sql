@@ -0,0 +1,19 @@
+-- sql/002_contadores_dashboard.sql
+--
+-- Contadores do Dashboard calculados no banco em uma única chamada RPC
+-- (services/contadores.py). Só devolve números: a página inicial não baixa tabelas.
+--
+-- Executar no SQL Editor do Supabase.
+
+create or replace function public.contadores_dashboard()
+returns json
+language sql
+stable
+as $$
+    select json_build_object(
+        'membros_ativos', (select count(*) from equipe where ativo),
+        'em_funcao',      (select count(distinct equipe_id) from historico_redec where data_saida is null),
+        'afastados_hoje', (select count(distinct equipe_id) from ferias_licencas
+                            where current_date between inicio and fim)
+    );
+$$;
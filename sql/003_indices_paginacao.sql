@@ -0,0 +1,21 @@
+-- sql/003_indices_paginacao.sql
+--
+-- Índices para a paginação por cursor (keyset) de services/historico.py e services/ferias.py.
+-- Cada página é uma busca por faixa no índice, sem OFFSET: o custo não cresce com o histórico.
+--
+-- Executar no SQL Editor do Supabase.
+
+create index if not exists historico_redec_entrada_id
+    on historico_redec (data_entrada desc, id desc);
+
+create index if not exists historico_redec_funcao_entrada_id
+    on historico_redec (funcao, data_entrada desc, id desc);
+
+create index if not exists historico_redec_equipe_entrada_id
+    on historico_redec (equipe_id, data_entrada desc, id desc);
+
+create index if not exists ferias_licencas_inicio_id
+    on ferias_licencas (inicio desc, id desc);
+
+create index if not exists ferias_licencas_equipe_inicio_id
+    on ferias_licencas (equipe_id, inicio desc, id desc);
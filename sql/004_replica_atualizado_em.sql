@@ -0,0 +1,31 @@
+-- sql/004_replica_atualizado_em.sql
+--
+-- Coluna atualizado_em usada pela sincronização incremental da réplica local
+-- (services/replica.py): cada sincronização busca só as linhas alteradas desde a marca d'água.
+--
+-- Executar no SQL Editor do Supabase.
+
+create or replace function public.marcar_atualizado_em()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.atualizado_em := now();
+    return new;
+end;
+$$;
+
+do $$
+declare
+    t text;
+begin
+    foreach t in array array['equipe', 'historico_redec', 'ferias_licencas'] loop
+        execute format('alter table %I add column if not exists atualizado_em timestamptz not null default now()', t);
+        execute format('create index if not exists %I on %I (atualizado_em, id)', t || '_atualizado_em_id', t);
+        execute format('drop trigger if exists marcar_atualizado_em on %I', t);
+        execute format(
+            'create trigger marcar_atualizado_em before insert or update on %I
+             for each row execute function public.marcar_atualizado_em()', t);
+    end loop;
+end;
+$$;
@@ -0,0 +1,61 @@
+-- sql/005_fila_idempotencia.sql
+--
+-- Chave de idempotência das inserções enviadas pela fila de escritas (services/fila.py).
+-- O app gera a chave ao enfileirar; se um envio chegou ao banco mas a resposta se perdeu,
+-- o reenvio encontra a chave e não duplica o registro.
+--
+-- Executar no SQL Editor do Supabase, depois de 001_trocar_funcao.sql.
+
+do $$
+declare
+    t text;
+begin
+    foreach t in array array['equipe', 'historico_redec', 'ferias_licencas'] loop
+        execute format('alter table %I add column if not exists chave_idempotencia uuid', t);
+        -- Índice único comum (não parcial): é o alvo do on_conflict do upsert.
+        -- Linhas antigas ficam com chave nula, e nulos não conflitam entre si.
+        execute format('create unique index if not exists %I on %I (chave_idempotencia)',
+                       t || '_chave_idempotencia', t);
+    end loop;
+end;
+$$;
+
+-- trocar_funcao passa a aceitar a chave: uma troca já aplicada devolve o registro existente.
+drop function if exists public.trocar_funcao(
+    historico_redec.equipe_id%type, historico_redec.funcao%type, historico_redec.data_entrada%type, boolean
+);
+
+create or replace function public.trocar_funcao(
+    p_equipe_id          historico_redec.equipe_id%type,
+    p_funcao             historico_redec.funcao%type,
+    p_data_entrada       historico_redec.data_entrada%type default current_date,
+    p_encerrar_anterior  boolean default true,
+    p_chave_idempotencia uuid default null
+)
+returns setof historico_redec
+language plpgsql
+as $$
+begin
+    perform pg_advisory_xact_lock(hashtext('historico_redec:' || p_funcao));
+
+    if p_chave_idempotencia is not null then
+        return query
+            select * from historico_redec where chave_idempotencia = p_chave_idempotencia;
+        if found then
+            return;
+        end if;
+    end if;
+
+    if p_encerrar_anterior then
+        update historico_redec
+           set data_saida = p_data_entrada
+         where funcao = p_funcao
+           and data_saida is null;
+    end if;
+
+    return query
+        insert into historico_redec (equipe_id, funcao, data_entrada, data_saida, chave_idempotencia)
+        values (p_equipe_id, p_funcao, p_data_entrada, null, p_chave_idempotencia)
+        returning *;
+end;
+$$;
@@ -0,0 +1,58 @@
+-- sql/006_rios.sql
+--
+-- Estações do Monitoramento de Rios (services/rios.py). As leituras ficam no
+-- armazenamento colunar local do app; o banco guarda só o cadastro e as cotas de
+-- cada estação e a situação mais recente calculada, usada pelo contador do Dashboard.
+--
+-- Executar no SQL Editor do Supabase, depois de 002_contadores_dashboard.sql.
+
+create table if not exists public.rios_estacoes (
+    id              text primary key,          -- código da estação (ex.: código ANA)
+    nome            text not null,
+    rio             text,
+    municipio       text,
+    -- Cotas da régua, em metros: atenção <= alerta <= transbordo
+    cota_atencao    numeric not null,
+    cota_alerta     numeric not null,
+    cota_transbordo numeric not null,
+    -- Subida (m/h) que eleva a estação a atenção mesmo abaixo da cota; nula desativa
+    taxa_atencao    numeric,
+    ativa           boolean not null default true,
+    -- Situação calculada pelo app a cada ingestão
+    situacao        text not null default 'normal'
+                    check (situacao in ('normal', 'atencao', 'alerta', 'transbordo')),
+    nivel_atual     numeric,
+    taxa_subida     numeric,
+    leitura_em      timestamp,
+    check (cota_atencao <= cota_alerta and cota_alerta <= cota_transbordo)
+);
+
+-- Grava a situação de várias estações em uma chamada:
+-- p_estados = [{"id", "situacao", "nivel_atual", "taxa_subida", "leitura_em"}, ...]
+create or replace function public.atualizar_situacao_rios(p_estados json)
+returns void
+language sql
+as $$
+    update rios_estacoes e
+       set situacao    = s.situacao,
+           nivel_atual = s.nivel_atual,
+           taxa_subida = s.taxa_subida,
+           leitura_em  = s.leitura_em
+      from json_to_recordset(p_estados)
+           as s(id text, situacao text, nivel_atual numeric, taxa_subida numeric, leitura_em timestamp)
+     where e.id = s.id;
+$$;
+
+create or replace function public.contadores_dashboard()
+returns json
+language sql
+stable
+as $$
+    select json_build_object(
+        'membros_ativos', (select count(*) from equipe where ativo),
+        'em_funcao',      (select count(distinct equipe_id) from historico_redec where data_saida is null),
+        'afastados_hoje', (select count(distinct equipe_id) from ferias_licencas
+                            where current_date between inicio and fim),
+        'rios_atencao',   (select count(*) from rios_estacoes where ativa and situacao <> 'normal')
+    );
+$$;
@@ -0,0 +1,230 @@
+-- sql/007_estoque.sql
+--
+-- Estoque do Contêiner Humanitário (services/estoque.py).
+--
+-- estoque_movimentos é o livro-razão: só recebe inserções (entradas, saídas e
+-- transferências a municípios); correções são novos movimentos. Os saldos por lote
+-- (estoque_lotes.saldo) e por item (estoque_itens.saldo) são mantidos pelo gatilho
+-- a cada movimento, no mesmo comando: nenhuma tela soma o histórico, e o custo de
+-- um movimento não cresce com o tamanho do livro.
+--
+-- Executar no SQL Editor do Supabase, depois de 006_rios.sql.
+
+create table if not exists public.estoque_itens (
+    id             bigint generated always as identity primary key,
+    nome           text not null unique,
+    unidade        text not null default 'un',
+    categoria      text,
+    estoque_minimo numeric not null default 0 check (estoque_minimo >= 0),
+    ativo          boolean not null default true,
+    -- Materializado: soma dos lotes, mantida pelo gatilho
+    saldo          numeric not null default 0 check (saldo >= 0)
+);
+
+create table if not exists public.estoque_lotes (
+    id            bigint generated always as identity primary key,
+    item_id       bigint not null references estoque_itens (id),
+    codigo        text not null default '',
+    validade      date,                           -- nula: item sem validade
+    -- Materializado: entradas menos saídas do lote, mantido pelo gatilho
+    saldo         numeric not null default 0 check (saldo >= 0),
+    atualizado_em timestamptz not null default now(),
+    unique nulls not distinct (item_id, codigo, validade)
+);
+
+create table if not exists public.estoque_movimentos (
+    id                 bigint generated always as identity primary key,
+    item_id            bigint not null references estoque_itens (id),
+    lote_id            bigint not null references estoque_lotes (id),
+    tipo               text not null check (tipo in ('entrada', 'saida', 'transferencia')),
+    quantidade         numeric not null check (quantidade > 0),
+    municipio          text,
+    documento          text,
+    observacao         text,
+    criado_em          timestamptz not null default now(),
+    -- Uma operação (ex.: saída que consome vários lotes) grava várias linhas com a mesma chave
+    chave_idempotencia uuid not null,
+    check (tipo <> 'transferencia' or municipio is not null)
+);
+
+-- FEFO (primeiro a vencer, primeiro a sair): lotes com saldo de um item em ordem de validade
+create index if not exists estoque_lotes_fefo
+    on estoque_lotes (item_id, validade nulls last, id) where saldo > 0;
+-- Lotes a vencer, de todos os itens
+create index if not exists estoque_lotes_validade
+    on estoque_lotes (validade) where saldo > 0 and validade is not null;
+-- Contador do Dashboard: só os itens abaixo do mínimo entram no índice
+create index if not exists estoque_itens_abaixo_minimo
+    on estoque_itens (id) where ativo and saldo < estoque_minimo;
+-- Extrato paginado por cursor (id decrescente), geral e por item
+create index if not exists estoque_movimentos_item_id on estoque_movimentos (item_id, id desc);
+create index if not exists estoque_movimentos_chave on estoque_movimentos (chave_idempotencia);
+
+
+-- ============================================================
+-- SALDOS MATERIALIZADOS
+-- ============================================================
+
+create or replace function public.aplicar_movimento_estoque()
+returns trigger
+language plpgsql
+as $$
+declare
+    v_delta numeric := case when new.tipo = 'entrada' then new.quantidade else -new.quantidade end;
+begin
+    -- Saldo negativo viola o check e desfaz o movimento inteiro
+    update estoque_lotes set saldo = saldo + v_delta, atualizado_em = now() where id = new.lote_id;
+    update estoque_itens set saldo = saldo + v_delta where id = new.item_id;
+    return new;
+end;
+$$;
+
+drop trigger if exists aplicar_movimento_estoque on estoque_movimentos;
+create trigger aplicar_movimento_estoque after insert on estoque_movimentos
+for each row execute function public.aplicar_movimento_estoque();
+
+create or replace function public.proibir_alteracao_movimento()
+returns trigger
+language plpgsql
+as $$
+begin
+    raise exception 'estoque_movimentos só aceita inserções: registre um movimento de correção';
+end;
+$$;
+
+drop trigger if exists proibir_alteracao_movimento on estoque_movimentos;
+create trigger proibir_alteracao_movimento before update or delete on estoque_movimentos
+for each row execute function public.proibir_alteracao_movimento();
+
+-- Conferência: refaz os saldos a partir do livro-razão e devolve quantos lotes estavam divergentes
+create or replace function public.recalcular_saldos_estoque()
+returns integer
+language plpgsql
+as $$
+declare
+    v_divergentes integer;
+begin
+    lock table estoque_movimentos in share mode;
+
+    with somas as (
+        select l.id, coalesce(sum(case when m.tipo = 'entrada' then m.quantidade else -m.quantidade end), 0) as saldo
+          from estoque_lotes l
+          left join estoque_movimentos m on m.lote_id = l.id
+         group by l.id
+    ), corrigidos as (
+        update estoque_lotes l set saldo = s.saldo, atualizado_em = now()
+          from somas s
+         where s.id = l.id and l.saldo <> s.saldo
+        returning l.id
+    )
+    select count(*) into v_divergentes from corrigidos;
+
+    update estoque_itens i set saldo = coalesce((select sum(saldo) from estoque_lotes where item_id = i.id), 0);
+    return v_divergentes;
+end;
+$$;
+
+
+-- ============================================================
+-- OPERAÇÕES (IDEMPOTENTES, VER 005_fila_idempotencia.sql)
+-- ============================================================
+
+create or replace function public.entrada_estoque(
+    p_item_id            bigint,
+    p_quantidade         numeric,
+    p_codigo_lote        text default '',
+    p_validade           date default null,
+    p_documento          text default null,
+    p_observacao         text default null,
+    p_chave_idempotencia uuid default gen_random_uuid()
+)
+returns setof estoque_movimentos
+language plpgsql
+as $$
+declare
+    v_lote_id bigint;
+begin
+    perform pg_advisory_xact_lock(hashtext('estoque:' || p_chave_idempotencia::text));
+    if exists (select 1 from estoque_movimentos where chave_idempotencia = p_chave_idempotencia) then
+        return query select * from estoque_movimentos where chave_idempotencia = p_chave_idempotencia order by id;
+        return;
+    end if;
+
+    insert into estoque_lotes (item_id, codigo, validade)
+    values (p_item_id, coalesce(p_codigo_lote, ''), p_validade)
+    on conflict (item_id, codigo, validade) do update set codigo = excluded.codigo
+    returning id into v_lote_id;
+
+    return query
+    insert into estoque_movimentos (item_id, lote_id, tipo, quantidade, documento, observacao, chave_idempotencia)
+    values (p_item_id, v_lote_id, 'entrada', p_quantidade, p_documento, p_observacao, p_chave_idempotencia)
+    returning *;
+end;
+$$;
+
+-- Saída ou transferência: consome os lotes em ordem FEFO (índice estoque_lotes_fefo).
+-- Os lotes do item ficam travados até o fim da transação, então duas saídas
+-- simultâneas do mesmo item não consomem o mesmo saldo.
+create or replace function public.saida_estoque(
+    p_item_id            bigint,
+    p_quantidade         numeric,
+    p_tipo               text default 'saida',
+    p_municipio          text default null,
+    p_documento          text default null,
+    p_observacao         text default null,
+    p_chave_idempotencia uuid default gen_random_uuid()
+)
+returns setof estoque_movimentos
+language plpgsql
+as $$
+declare
+    v_lote     record;
+    v_restante numeric := p_quantidade;
+    v_retirar  numeric;
+begin
+    perform pg_advisory_xact_lock(hashtext('estoque:' || p_chave_idempotencia::text));
+    if exists (select 1 from estoque_movimentos where chave_idempotencia = p_chave_idempotencia) then
+        return query select * from estoque_movimentos where chave_idempotencia = p_chave_idempotencia order by id;
+        return;
+    end if;
+
+    for v_lote in
+        select id, saldo from estoque_lotes
+         where item_id = p_item_id and saldo > 0
+         order by validade nulls last, id
+           for update
+    loop
+        exit when v_restante <= 0;
+        v_retirar := least(v_lote.saldo, v_restante);
+        return query
+        insert into estoque_movimentos (item_id, lote_id, tipo, quantidade, municipio, documento, observacao, chave_idempotencia)
+        values (p_item_id, v_lote.id, p_tipo, v_retirar, p_municipio, p_documento, p_observacao, p_chave_idempotencia)
+        returning *;
+        v_restante := v_restante - v_retirar;
+    end loop;
+
+    if v_restante > 0 then
+        raise exception 'Saldo insuficiente: faltam % para a saída', v_restante;
+    end if;
+end;
+$$;
+
+
+-- ============================================================
+-- DASHBOARD
+-- ============================================================
+
+create or replace function public.contadores_dashboard()
+returns json
+language sql
+stable
+as $$
+    select json_build_object(
+        'membros_ativos',      (select count(*) from equipe where ativo),
+        'em_funcao',           (select count(distinct equipe_id) from historico_redec where data_saida is null),
+        'afastados_hoje',      (select count(distinct equipe_id) from ferias_licencas
+                                 where current_date between inicio and fim),
+        'rios_atencao',        (select count(*) from rios_estacoes where ativa and situacao <> 'normal'),
+        'itens_estoque_baixo', (select count(*) from estoque_itens where ativo and saldo < estoque_minimo)
+    );
+$$;
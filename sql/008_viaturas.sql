@@ -0,0 +1,336 @@
+-- sql/008_viaturas.sql
+--
+-- Controle de Viaturas (services/viaturas.py).
+--
+-- viaturas_registros é o diário de bordo: saídas, retornos, abastecimentos,
+-- manutenções e leituras do hodômetro, só com inserções. A cada registro, o
+-- gatilho atualiza o resumo da viatura (situação, hodômetro, última revisão) e o
+-- resumo do mês (km rodados, litros, horas em manutenção). Nenhuma tela relê o
+-- diário para saber se a viatura está disponível ou quanto rodou no mês.
+--
+-- Executar no SQL Editor do Supabase, depois de 007_estoque.sql.
+
+create table if not exists public.viaturas (
+    id                     bigint generated always as identity primary key,
+    prefixo                text not null unique,
+    placa                  text,
+    modelo                 text,
+    ativa                  boolean not null default true,
+    intervalo_revisao_km   numeric not null default 10000 check (intervalo_revisao_km > 0),
+    intervalo_revisao_dias integer not null default 180 check (intervalo_revisao_dias > 0),
+    hodometro_inicial_km   numeric not null default 0,   -- no cadastro; ponto de partida da conferência
+
+    -- Resumo mantido pelo gatilho a cada registro
+    situacao               text not null default 'disponivel'
+                           check (situacao in ('disponivel', 'em_uso', 'manutencao')),
+    hodometro_km           numeric not null default 0,
+    em_uso_desde           timestamptz,
+    destino_atual          text,
+    motorista_atual_id     bigint references equipe (id),
+    manutencao_desde       timestamptz,
+    ultima_revisao_em      date not null default current_date,
+    ultima_revisao_km      numeric not null default 0,
+    ultimo_registro_em     timestamptz,
+    proxima_revisao_em     date generated always as (ultima_revisao_em + intervalo_revisao_dias) stored,
+    km_para_revisao        numeric generated always as (ultima_revisao_km + intervalo_revisao_km - hodometro_km) stored
+);
+
+create table if not exists public.viaturas_registros (
+    id                 bigint generated always as identity primary key,
+    viatura_id         bigint not null references viaturas (id),
+    tipo               text not null
+                       check (tipo in ('saida', 'retorno', 'abastecimento', 'manutencao', 'liberacao', 'hodometro')),
+    registrado_em      timestamptz not null default now(),
+    km                 numeric check (km >= 0),
+    litros             numeric check (litros > 0),
+    valor              numeric check (valor >= 0),
+    destino            text,
+    motorista_id       bigint references equipe (id),
+    descricao          text,
+    revisao            boolean not null default false,   -- liberação de uma revisão periódica
+    chave_idempotencia uuid not null unique,
+    check (tipo not in ('saida', 'retorno', 'hodometro') or km is not null),
+    check (tipo <> 'abastecimento' or litros is not null)
+);
+
+-- Resumo por viatura e mês
+create table if not exists public.viaturas_mensal (
+    viatura_id       bigint not null references viaturas (id),
+    mes              date not null,                 -- primeiro dia do mês
+    km               numeric not null default 0,
+    litros           numeric not null default 0,
+    valor            numeric not null default 0,
+    viagens          integer not null default 0,
+    manutencoes      integer not null default 0,
+    horas_manutencao numeric not null default 0,
+    primary key (viatura_id, mes)
+);
+
+-- Contador do Dashboard e tela de despacho: só as disponíveis entram no índice
+create index if not exists viaturas_disponiveis on viaturas (prefixo) where ativa and situacao = 'disponivel';
+-- Revisões vencidas, por data ou por quilometragem
+create index if not exists viaturas_revisao_data on viaturas (proxima_revisao_em) where ativa;
+create index if not exists viaturas_revisao_km on viaturas (km_para_revisao) where ativa;
+-- Diário paginado por cursor (id decrescente), geral e por viatura
+create index if not exists viaturas_registros_viatura_id on viaturas_registros (viatura_id, id desc);
+-- Diário de uma viatura na ordem dos fatos, para refazer o resumo quando um registro chega atrasado
+create index if not exists viaturas_registros_viatura_fato on viaturas_registros (viatura_id, registrado_em, id);
+-- Resumo dos últimos meses de todas as viaturas
+create index if not exists viaturas_mensal_mes on viaturas_mensal (mes);
+
+
+-- ============================================================
+-- RESUMOS
+-- ============================================================
+
+-- Registros chegam fora de ordem: a fila de escritas (services/fila.py) envia depois,
+-- com o instante do fato (registrado_em), o que foi registrado sem conexão. Um registro
+-- mais antigo que o último aplicado à viatura é "atrasado": o resumo da viatura é refeito
+-- a partir do diário (ver reaplicar_viatura), e o atrasado passa pelas conferências com a
+-- situação e o hodômetro daquele instante.
+drop function if exists public.aplicar_registro_viatura(viaturas_registros);
+
+create or replace function public.aplicar_registro_viatura(r viaturas_registros, p_conferir boolean default true)
+returns void
+language plpgsql
+as $$
+declare
+    v     viaturas%rowtype;
+    -- Prefixo v_: "mes" colidiria com a coluna no on conflict (viatura_id, mes)
+    v_mes date := date_trunc('month', r.registrado_em)::date;
+begin
+    select * into v from viaturas where id = r.viatura_id for update;
+
+    if r.registrado_em < v.ultimo_registro_em then
+        perform reaplicar_viatura(r, p_conferir);
+        return;
+    end if;
+
+    if p_conferir then
+        if r.km is not null and r.km < v.hodometro_km then
+            raise exception 'Hodômetro (% km) menor que o último registrado para % (% km)', r.km, v.prefixo, v.hodometro_km;
+        end if;
+        if r.tipo = 'saida' and v.situacao <> 'disponivel' then
+            raise exception 'A viatura % não está disponível', v.prefixo;
+        elsif r.tipo = 'retorno' and v.situacao <> 'em_uso' then
+            raise exception 'A viatura % não está em uso', v.prefixo;
+        elsif r.tipo = 'manutencao' and v.situacao = 'em_uso' then
+            raise exception 'A viatura % está em uso: registre o retorno antes da manutenção', v.prefixo;
+        elsif r.tipo = 'liberacao' and v.situacao <> 'manutencao' then
+            raise exception 'A viatura % não está em manutenção', v.prefixo;
+        end if;
+    end if;
+
+    -- Km rodados contam no mês do registro que os revelou (hodometro_km parte do inicial do cadastro)
+    insert into viaturas_mensal as m (viatura_id, mes, km, litros, valor, viagens, manutencoes)
+    values (r.viatura_id, v_mes,
+            coalesce(greatest(r.km - v.hodometro_km, 0), 0),
+            coalesce(r.litros, 0),
+            coalesce(r.valor, 0),
+            (r.tipo = 'saida')::int,
+            (r.tipo = 'manutencao')::int)
+    on conflict (viatura_id, mes) do update
+       set km          = m.km + excluded.km,
+           litros      = m.litros + excluded.litros,
+           valor       = m.valor + excluded.valor,
+           viagens     = m.viagens + excluded.viagens,
+           manutencoes = m.manutencoes + excluded.manutencoes;
+
+    -- Horas em manutenção, repartidas pelos meses que a parada atravessou
+    if r.tipo = 'liberacao' and v.manutencao_desde is not null then
+        insert into viaturas_mensal as m (viatura_id, mes, horas_manutencao)
+        select r.viatura_id, inicio::date,
+               extract(epoch from least(inicio + interval '1 month', r.registrado_em)
+                                  - greatest(inicio, v.manutencao_desde)) / 3600
+          from generate_series(date_trunc('month', v.manutencao_desde), date_trunc('month', r.registrado_em),
+                               interval '1 month') inicio
+        on conflict (viatura_id, mes) do update
+           set horas_manutencao = m.horas_manutencao + excluded.horas_manutencao;
+    end if;
+
+    update viaturas set
+        hodometro_km       = greatest(hodometro_km, coalesce(r.km, 0)),
+        ultimo_registro_em = r.registrado_em,
+        situacao           = case r.tipo when 'saida' then 'em_uso'
+                                         when 'manutencao' then 'manutencao'
+                                         when 'retorno' then 'disponivel'
+                                         when 'liberacao' then 'disponivel'
+                                         else situacao end,
+        em_uso_desde       = case r.tipo when 'saida' then r.registrado_em when 'retorno' then null else em_uso_desde end,
+        destino_atual      = case r.tipo when 'saida' then r.destino when 'retorno' then null else destino_atual end,
+        motorista_atual_id = case r.tipo when 'saida' then r.motorista_id when 'retorno' then null else motorista_atual_id end,
+        manutencao_desde   = case r.tipo when 'manutencao' then r.registrado_em when 'liberacao' then null else manutencao_desde end,
+        ultima_revisao_em  = case when r.revisao then r.registrado_em::date
+                                  else ultima_revisao_em end,
+        ultima_revisao_km  = case when r.revisao then greatest(hodometro_km, coalesce(r.km, 0))
+                                  else ultima_revisao_km end
+    where id = r.viatura_id;
+end;
+$$;
+
+-- Refaz o resumo de uma viatura pela cauda do diário, a partir do início do mês do registro
+-- atrasado `r` (já inserido). O estado naquele início sai de consultas pontuais ao diário
+-- (último km, última saída, retorno ou liberação); se uma parada estava em andamento, recua até o mês
+-- em que ela começou, para que as horas da liberação caiam só em meses refeitos. A revisão
+-- não é zerada: as da cauda são reaplicadas em ordem e a mais recente prevalece.
+-- Só `r` passa pelas conferências; os demais registros já foram aceitos.
+create or replace function public.reaplicar_viatura(r viaturas_registros, p_conferir boolean default true)
+returns void
+language plpgsql
+as $$
+declare
+    v_desde    timestamptz := date_trunc('month', r.registrado_em);
+    v_parada   viaturas_registros%rowtype;
+    v_saida    viaturas_registros%rowtype;
+    v_ultimo   viaturas_registros%rowtype;
+    v_registro viaturas_registros%rowtype;
+begin
+    loop
+        select * into v_parada from viaturas_registros
+         where viatura_id = r.viatura_id and tipo in ('manutencao', 'liberacao') and registrado_em < v_desde
+         order by registrado_em desc, id desc
+         limit 1;
+        exit when not found or v_parada.tipo = 'liberacao';
+        v_desde := date_trunc('month', v_parada.registrado_em);
+    end loop;
+
+    select * into v_saida from viaturas_registros
+     where viatura_id = r.viatura_id and tipo in ('saida', 'retorno') and registrado_em < v_desde
+     order by registrado_em desc, id desc
+     limit 1;
+    select * into v_ultimo from viaturas_registros
+     where viatura_id = r.viatura_id and tipo in ('saida', 'retorno', 'liberacao') and registrado_em < v_desde
+     order by registrado_em desc, id desc
+     limit 1;
+
+    delete from viaturas_mensal where viatura_id = r.viatura_id and mes >= v_desde::date;
+
+    update viaturas set
+        situacao           = case when v_ultimo.tipo = 'saida' then 'em_uso' else 'disponivel' end,
+        hodometro_km       = greatest(hodometro_inicial_km, (select max(km) from viaturas_registros
+                                                              where viatura_id = r.viatura_id and registrado_em < v_desde)),
+        em_uso_desde       = case when v_saida.tipo = 'saida' then v_saida.registrado_em end,
+        destino_atual      = case when v_saida.tipo = 'saida' then v_saida.destino end,
+        motorista_atual_id = case when v_saida.tipo = 'saida' then v_saida.motorista_id end,
+        manutencao_desde   = null,
+        ultimo_registro_em = (select max(registrado_em) from viaturas_registros
+                               where viatura_id = r.viatura_id and registrado_em < v_desde)
+    where id = r.viatura_id;
+
+    for v_registro in
+        select * from viaturas_registros
+         where viatura_id = r.viatura_id and registrado_em >= v_desde
+         order by registrado_em, id
+    loop
+        perform aplicar_registro_viatura(v_registro, p_conferir and v_registro.id = r.id);
+    end loop;
+end;
+$$;
+
+create or replace function public.registro_viatura_inserido()
+returns trigger
+language plpgsql
+as $$
+begin
+    -- Registro inválido (viatura indisponível, hodômetro voltando) desfaz a inserção
+    perform aplicar_registro_viatura(new);
+    return new;
+end;
+$$;
+
+drop trigger if exists registro_viatura_inserido on viaturas_registros;
+create trigger registro_viatura_inserido after insert on viaturas_registros
+for each row execute function public.registro_viatura_inserido();
+
+create or replace function public.proibir_alteracao_registro_viatura()
+returns trigger
+language plpgsql
+as $$
+begin
+    raise exception 'viaturas_registros só aceita inserções: registre uma nova leitura ou correção';
+end;
+$$;
+
+drop trigger if exists proibir_alteracao_registro_viatura on viaturas_registros;
+create trigger proibir_alteracao_registro_viatura before update or delete on viaturas_registros
+for each row execute function public.proibir_alteracao_registro_viatura();
+
+-- Conferência: refaz todos os resumos a partir do diário, na ordem dos fatos (registrado_em).
+-- O diário já foi aceito: a reaplicação não recusa registros (p_conferir = false).
+create or replace function public.recalcular_resumos_viaturas()
+returns void
+language plpgsql
+as $$
+declare
+    r viaturas_registros%rowtype;
+begin
+    lock table viaturas_registros in share mode;
+
+    delete from viaturas_mensal;
+    update viaturas set
+        situacao = 'disponivel', hodometro_km = hodometro_inicial_km, em_uso_desde = null, destino_atual = null,
+        motorista_atual_id = null, manutencao_desde = null, ultimo_registro_em = null;
+
+    for r in select * from viaturas_registros order by registrado_em, id loop
+        perform aplicar_registro_viatura(r, false);
+    end loop;
+end;
+$$;
+
+
+-- ============================================================
+-- OPERAÇÃO (IDEMPOTENTE, VER 005_fila_idempotencia.sql)
+-- ============================================================
+
+create or replace function public.registrar_viatura(
+    p_viatura_id         bigint,
+    p_tipo               text,
+    p_km                 numeric default null,
+    p_litros             numeric default null,
+    p_valor              numeric default null,
+    p_destino            text default null,
+    p_motorista_id       bigint default null,
+    p_descricao          text default null,
+    p_revisao            boolean default false,
+    p_registrado_em      timestamptz default now(),
+    p_chave_idempotencia uuid default gen_random_uuid()
+)
+returns setof viaturas_registros
+language plpgsql
+as $$
+begin
+    return query
+    insert into viaturas_registros (viatura_id, tipo, registrado_em, km, litros, valor, destino,
+                                    motorista_id, descricao, revisao, chave_idempotencia)
+    values (p_viatura_id, p_tipo, coalesce(p_registrado_em, now()), p_km, p_litros, p_valor, p_destino,
+            p_motorista_id, p_descricao, coalesce(p_revisao, false), p_chave_idempotencia)
+    on conflict (chave_idempotencia) do nothing
+    returning *;
+
+    -- Reenvio de um registro já aplicado: devolve o existente
+    if not found then
+        return query select * from viaturas_registros where chave_idempotencia = p_chave_idempotencia;
+    end if;
+end;
+$$;
+
+
+-- ============================================================
+-- DASHBOARD
+-- ============================================================
+
+create or replace function public.contadores_dashboard()
+returns json
+language sql
+stable
+as $$
+    select json_build_object(
+        'membros_ativos',       (select count(*) from equipe where ativo),
+        'em_funcao',            (select count(distinct equipe_id) from historico_redec where data_saida is null),
+        'afastados_hoje',       (select count(distinct equipe_id) from ferias_licencas
+                                  where current_date between inicio and fim),
+        'rios_atencao',         (select count(*) from rios_estacoes where ativa and situacao <> 'normal'),
+        'itens_estoque_baixo',  (select count(*) from estoque_itens where ativo and saldo < estoque_minimo),
+        'viaturas_disponiveis', (select count(*) from viaturas where ativa and situacao = 'disponivel')
+    );
+$$;
@@ -0,0 +1,81 @@
+-- sql/009_documentos.sql
+--
+-- Processos SEI e Boletins (services/documentos.py).
+--
+-- A busca por texto não roda no banco: o app mantém um índice invertido em memória
+-- (services/busca.py) e só busca aqui as linhas alteradas desde a última leitura,
+-- pelo índice (atualizado_em, id), como a réplica local (004_replica_atualizado_em.sql).
+--
+-- Executar no SQL Editor do Supabase, depois de 004_replica_atualizado_em.sql e 008_viaturas.sql.
+
+create table if not exists public.sei_processos (
+    id                 bigint generated always as identity primary key,
+    numero             text not null,                   -- como escrito: SEI-270009/000123/2024
+    -- Só os dígitos: a mesma chave para qualquer grafia do número
+    numero_normalizado text generated always as (regexp_replace(numero, '\D', '', 'g')) stored unique,
+    assunto            text not null,
+    interessado        text,
+    unidade            text,
+    situacao           text not null default 'em_andamento'
+                       check (situacao in ('em_andamento', 'concluido', 'arquivado')),
+    aberto_em          date,
+    observacao         text,
+    atualizado_em      timestamptz not null default now()
+);
+
+create table if not exists public.boletins (
+    id            bigint generated always as identity primary key,
+    numero        text,
+    data          date not null default current_date,
+    titulo        text not null,
+    texto         text not null default '',
+    situacao      text not null default 'pendente' check (situacao in ('pendente', 'publicado')),
+    processo_id   bigint references sei_processos (id),
+    publicado_em  timestamptz,
+    atualizado_em timestamptz not null default now(),
+    check (situacao = 'pendente' or publicado_em is not null)
+);
+
+-- Sincronização incremental do índice de busca
+create index if not exists sei_processos_atualizado_em_id on sei_processos (atualizado_em, id);
+create index if not exists boletins_atualizado_em_id on boletins (atualizado_em, id);
+-- Contador do Dashboard: só os boletins pendentes entram no índice
+create index if not exists boletins_pendentes on boletins (data) where situacao = 'pendente';
+-- Listagens paginadas por cursor (id decrescente)
+create index if not exists boletins_situacao_id on boletins (situacao, id desc);
+create index if not exists sei_processos_situacao_id on sei_processos (situacao, id desc);
+
+do $$
+declare
+    t text;
+begin
+    foreach t in array array['sei_processos', 'boletins'] loop
+        execute format('drop trigger if exists marcar_atualizado_em on %I', t);
+        execute format(
+            'create trigger marcar_atualizado_em before insert or update on %I
+             for each row execute function public.marcar_atualizado_em()', t);
+    end loop;
+end;
+$$;
+
+
+-- ============================================================
+-- DASHBOARD
+-- ============================================================
+
+create or replace function public.contadores_dashboard()
+returns json
+language sql
+stable
+as $$
+    select json_build_object(
+        'membros_ativos',       (select count(*) from equipe where ativo),
+        'em_funcao',            (select count(distinct equipe_id) from historico_redec where data_saida is null),
+        'afastados_hoje',       (select count(distinct equipe_id) from ferias_licencas
+                                  where current_date between inicio and fim),
+        'rios_atencao',         (select count(*) from rios_estacoes where ativa and situacao <> 'normal'),
+        'itens_estoque_baixo',  (select count(*) from estoque_itens where ativo and saldo < estoque_minimo),
+        'viaturas_disponiveis', (select count(*) from viaturas where ativa and situacao = 'disponivel'),
+        'boletins_pendentes',   (select count(*) from boletins where situacao = 'pendente')
+    );
+$$;
@@ -0,0 +1,20 @@
+# tests/conftest.py
+#
+# Postgres para os testes das funções de sql/: REDEC_TESTE_POSTGRES (URI de um
+# Postgres descartável) ou, sem ela, um Postgres embutido criado pelo pacote
+# pgserver num diretório temporário. Sem nenhum dos dois, os testes são pulados.
+
+import os
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def uri(tmp_path_factory):
+    if os.getenv("REDEC_TESTE_POSTGRES"):
+        yield os.environ["REDEC_TESTE_POSTGRES"]
+        return
+    pgserver = pytest.importorskip("pgserver")
+    servidor = pgserver.get_server(str(tmp_path_factory.mktemp("postgres")), cleanup_mode="stop")
+    yield servidor.get_uri()
+    servidor.cleanup()
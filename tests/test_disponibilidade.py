@@ -0,0 +1,85 @@
+# tests/test_disponibilidade.py
+#
+# Linha de varredura de services/disponibilidade.py: efetivo por trecho, conflitos de
+# um novo afastamento e coberturas, sobre um histórico e afastamentos montados à mão.
+#
+# Uso:
+#   python -m pytest -q tests/test_disponibilidade.py
+
+import os
+import sys
+from datetime import date
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from services.disponibilidade import Disponibilidade
+from services.intervalos import IndiceIntervalos
+
+# equipe_id: (funcao, nome)
+EQUIPE = {1: ("Coordenador", "ANA"), 2: ("Subcoordenador", "BRUNO"),
+          3: ("Oficial Administrativo", "CARLA"), 4: ("Oficial Administrativo", "DIEGO")}
+
+
+def d(mes, dia):
+    return date(2024, mes, dia)
+
+
+def motor(ferias=()):
+    historico = [{"equipe_id": id, "funcao": funcao, "data_entrada": "2024-01-01", "data_saida": None,
+                  "equipe": {"nome": nome, "posto_graduacao": "Ten"}}
+                 for id, (funcao, nome) in EQUIPE.items()]
+    return Disponibilidade(IndiceIntervalos(historico), [
+        {"equipe_id": id, "inicio": str(inicio), "fim": str(fim), "tipo": "Férias"} for id, inicio, fim in ferias])
+
+
+def test_efetivo_por_trecho():
+    """Afastamento [1, 10] inclusive: o trecho com Carla afastada vai até o dia 11, exclusivo."""
+    trechos = motor([(3, d(3, 1), d(3, 10))]).efetivo(d(2, 20), d(3, 20), ["Oficial Administrativo"])
+
+    assert [(t["inicio"], t["fim"], t["afastados"], t["disponiveis"]) for t in trechos] == [
+        (d(2, 20), d(3, 1), [], [3, 4]),
+        (d(3, 1), d(3, 11), [3], [4]),
+        (d(3, 11), d(3, 20), [], [3, 4]),
+    ]
+
+
+def test_efetivo_antes_do_primeiro_mandato_e_vago():
+    trechos = motor().efetivo(date(2023, 12, 20), d(1, 10), ["Coordenador"])
+
+    assert [(t["inicio"], t["fim"], t["titulares"]) for t in trechos] == [
+        (date(2023, 12, 20), d(1, 1), []), (d(1, 1), d(1, 10), [1])]
+
+
+def test_coordenador_afastado_coberto_pelo_subcoordenador():
+    assert motor().conflitos(1, d(3, 1), d(3, 10)) == []
+
+
+def test_coordenador_sem_cobertura_so_onde_o_subcoordenador_tambem_falta():
+    avisos = motor([(2, d(3, 5), d(3, 20))]).conflitos(1, d(3, 1), d(3, 10))
+
+    assert avisos == ["Coordenador: ficaria sem ninguém disponível de 05/03/2024 a 10/03/2024."]
+
+
+def test_funcao_sem_substituta():
+    avisos = motor([(4, d(3, 8), d(3, 15))]).conflitos(3, d(3, 1), d(3, 10))
+
+    assert avisos == [
+        "Oficial Administrativo: coincide com o afastamento de Ten DIEGO de 08/03/2024 a 10/03/2024.",
+        "Oficial Administrativo: ficaria sem ninguém disponível de 08/03/2024 a 10/03/2024.",
+    ]
+
+
+def test_afastamento_do_proprio_servidor():
+    avisos = motor([(3, d(3, 5), d(3, 6))]).conflitos(3, d(3, 1), d(3, 10))
+
+    assert avisos == ["Já possui afastamento (Férias) de 05/03/2024 a 06/03/2024."]
+
+
+def test_coberturas():
+    coberturas = motor([(1, d(3, 1), d(3, 10)), (3, d(3, 1), d(3, 10))]).coberturas(d(3, 1), d(3, 5))
+
+    assert sorted((c["funcao"], c["afastado"], c["cobrindo"]) for c in coberturas) == [
+        ("Coordenador", "Ten ANA", ["Ten BRUNO"]),
+        ("Oficial Administrativo", "Ten CARLA", ["Ten DIEGO"]),
+    ]
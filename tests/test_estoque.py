@@ -0,0 +1,174 @@
+# tests/test_estoque.py
+#
+# Roda o livro-razão do estoque (sql/007_estoque.sql) num Postgres de verdade:
+# ordem FEFO, reenvio com a mesma chave, saldo insuficiente e saídas simultâneas.
+#
+# O banco vem da fixture `uri` (tests/conftest.py).
+#
+# Uso:
+#   pip install "psycopg[binary]" pgserver
+#   python -m pytest -q tests/test_estoque.py
+
+import os
+import threading
+import uuid
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+psycopg = pytest.importorskip("psycopg")
+
+# contadores_dashboard usa tabelas de outros scripts e não é criada com o corpo conferido
+TABELAS = """
+    drop schema if exists public cascade;
+    create schema public;
+    set check_function_bodies = off;
+"""
+
+ENTRADA = """
+    select lote_id from entrada_estoque(
+        p_item_id => %(item)s, p_quantidade => %(quantidade)s, p_codigo_lote => %(lote)s,
+        p_validade => %(validade)s::date, p_chave_idempotencia => %(chave)s
+    )
+"""
+
+SAIDA = """
+    select lote_id, quantidade from saida_estoque(
+        p_item_id => %(item)s, p_quantidade => %(quantidade)s, p_chave_idempotencia => %(chave)s
+    )
+"""
+
+
+@pytest.fixture
+def banco(uri):
+    """Esquema recriado a cada teste com um item sem saldo; devolve (uri, id do item)."""
+    with psycopg.connect(uri, autocommit=True) as conexao:
+        conexao.execute(TABELAS)
+        with open(os.path.join(RAIZ, "sql", "007_estoque.sql"), encoding="utf-8") as arquivo:
+            conexao.execute(arquivo.read())
+        item = conexao.execute("insert into estoque_itens (nome) values ('Colchão') returning id").fetchone()[0]
+    return uri, item
+
+
+def entrada(uri, item, quantidade, lote="", validade=None, chave=None):
+    with psycopg.connect(uri) as conexao:
+        return conexao.execute(ENTRADA, {"item": item, "quantidade": quantidade, "lote": lote, "validade": validade,
+                                         "chave": chave or str(uuid.uuid4())}).fetchone()[0]
+
+
+def saida(uri, item, quantidade, chave=None):
+    """Uma saída na sua própria conexão e transação; devolve [(lote_id, quantidade)]."""
+    with psycopg.connect(uri) as conexao:
+        return [(lote, float(q)) for lote, q in conexao.execute(
+            SAIDA, {"item": item, "quantidade": quantidade, "chave": chave or str(uuid.uuid4())})]
+
+
+def saldos(uri, item):
+    """(saldo do item, {lote_id: saldo}), conferidos contra o livro-razão."""
+    with psycopg.connect(uri) as conexao:
+        assert conexao.execute("select recalcular_saldos_estoque()").fetchone() == (0,)
+        total = conexao.execute("select saldo from estoque_itens where id = %s", (item,)).fetchone()[0]
+        lotes = dict(conexao.execute("select id, saldo from estoque_lotes where item_id = %s", (item,)).fetchall())
+    return float(total), {lote: float(saldo) for lote, saldo in lotes.items()}
+
+
+def test_saida_consome_primeiro_o_lote_que_vence_antes(banco):
+    uri, item = banco
+    sem_validade = entrada(uri, item, 10, "C")
+    tarde = entrada(uri, item, 10, "B", "2025-06-30")
+    cedo = entrada(uri, item, 10, "A", "2025-01-31")
+
+    assert saida(uri, item, 15) == [(cedo, 10.0), (tarde, 5.0)]
+    assert saida(uri, item, 10) == [(tarde, 5.0), (sem_validade, 5.0)]
+    assert saldos(uri, item) == (5.0, {cedo: 0.0, tarde: 0.0, sem_validade: 5.0})
+
+
+def test_entrada_no_mesmo_lote_soma(banco):
+    uri, item = banco
+    lote = entrada(uri, item, 10, "A", "2025-01-31")
+
+    assert entrada(uri, item, 5, "A", "2025-01-31") == lote
+    assert saldos(uri, item) == (15.0, {lote: 15.0})
+
+
+def test_reenvio_com_a_mesma_chave(banco):
+    """A fila reenviando entrada e saída já gravadas: devolve os movimentos originais, sem mexer no saldo."""
+    uri, item = banco
+    chave_entrada, chave_saida = str(uuid.uuid4()), str(uuid.uuid4())
+    a = entrada(uri, item, 10, "A", "2025-01-31", chave=chave_entrada)
+    b = entrada(uri, item, 10, "B", "2025-06-30")
+    primeira = saida(uri, item, 12, chave=chave_saida)
+
+    assert entrada(uri, item, 10, "A", "2025-01-31", chave=chave_entrada) == a
+    assert saida(uri, item, 12, chave=chave_saida) == primeira == [(a, 10.0), (b, 2.0)]
+    assert saldos(uri, item) == (8.0, {a: 0.0, b: 8.0})
+
+
+def test_saldo_insuficiente_desfaz_a_saida_inteira(banco):
+    uri, item = banco
+    a = entrada(uri, item, 10, "A", "2025-01-31")
+    b = entrada(uri, item, 5, "B", "2025-06-30")
+
+    with pytest.raises(psycopg.errors.RaiseException, match="Saldo insuficiente"):
+        saida(uri, item, 16)
+    assert saldos(uri, item) == (15.0, {a: 10.0, b: 5.0})
+    with psycopg.connect(uri) as conexao:
+        assert conexao.execute("select count(*) from estoque_movimentos where tipo = 'saida'").fetchone() == (0,)
+
+
+def test_livro_razao_so_aceita_insercoes(banco):
+    uri, item = banco
+    entrada(uri, item, 10)
+    with psycopg.connect(uri) as conexao:
+        with pytest.raises(psycopg.errors.RaiseException, match="só aceita inserções"):
+            conexao.execute("update estoque_movimentos set quantidade = 1")
+
+
+def test_saidas_simultaneas_nao_consomem_o_mesmo_saldo(banco):
+    """Doze saídas de 3 sobre 30 em estoque: dez passam, duas recusadas, nenhum lote negativo."""
+    uri, item = banco
+    lotes = [entrada(uri, item, 10, codigo, validade)
+             for codigo, validade in (("A", "2025-01-31"), ("B", "2025-03-31"), ("C", None))]
+
+    largada = threading.Barrier(12)
+    feitas, recusadas = [], []
+
+    def retirar():
+        largada.wait()
+        try:
+            feitas.append(saida(uri, item, 3))
+        except psycopg.errors.RaiseException:
+            recusadas.append(True)
+
+    threads = [threading.Thread(target=retirar) for _ in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert (len(feitas), len(recusadas)) == (10, 2)
+    assert sum(q for movimentos in feitas for _, q in movimentos) == 30.0
+    assert saldos(uri, item) == (0.0, dict.fromkeys(lotes, 0.0))
+
+
+def test_reenvio_simultaneo_com_a_mesma_chave(banco):
+    uri, item = banco
+    entrada(uri, item, 10, "A", "2025-01-31")
+    chave = str(uuid.uuid4())
+
+    largada = threading.Barrier(4)
+    resultados = []
+
+    def retirar():
+        largada.wait()
+        resultados.append(saida(uri, item, 4, chave=chave))
+
+    threads = [threading.Thread(target=retirar) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(resultados) == 4 and all(r == resultados[0] for r in resultados)
+    assert saldos(uri, item)[0] == 6.0
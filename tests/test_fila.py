@@ -0,0 +1,145 @@
+# tests/test_fila.py
+#
+# Envio da fila de escritas (services/fila.py) contra um cliente falso, que recusa
+# ou deixa de responder conforme o teste manda.
+#
+# Uso:
+#   python -m pytest -q tests/test_fila.py
+
+import os
+import sys
+
+import httpx
+import pytest
+from postgrest.exceptions import APIError
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from services import fila
+
+
+class Envio:
+    def __init__(self, cliente, destino, dados):
+        self.cliente, self.destino, self.dados = cliente, destino, dados
+
+    def upsert(self, registros, **_):
+        return Envio(self.cliente, self.destino, registros)
+
+    def execute(self):
+        self.cliente.chamadas.append((self.destino, self.dados))
+        erro = self.cliente.falhas(self.destino, self.dados)
+        if erro:
+            raise erro
+
+
+class Cliente:
+    """Anota cada envio em `chamadas`; `falhas(destino, dados)` devolve o erro a levantar, ou None."""
+
+    def __init__(self, falhas=lambda destino, dados: None):
+        self.falhas = falhas
+        self.chamadas = []
+
+    def table(self, destino):
+        return Envio(self, destino, None)
+
+    def rpc(self, destino, parametros):
+        return Envio(self, destino, parametros)
+
+
+@pytest.fixture(autouse=True)
+def fila_temporaria(tmp_path, monkeypatch):
+    monkeypatch.setattr(fila, "FILA_CAMINHO", str(tmp_path / "fila.sqlite"))
+    monkeypatch.setattr(fila, "iniciar_enviador", lambda: None)
+
+
+def pendentes():
+    return [(p["destino"], p["situacao"], p["tentativas"]) for p in fila.situacao()]
+
+
+def recusa(mensagem="recusado"):
+    return APIError({"message": mensagem, "code": "P0001"})
+
+
+@pytest.mark.parametrize("erro", [
+    httpx.ConnectError("sem rede"),
+    APIError({"message": "Bad gateway", "code": 502}),
+    APIError({"message": "Too many requests", "code": 429}),
+    APIError({"message": "Request timeout", "code": "408"}),
+    APIError({"message": "Could not connect", "code": "PGRST001"}),
+    APIError({"message": "too many connections", "code": "53300"}),
+])
+def test_banco_indisponivel_nao_gasta_tentativa(erro):
+    fila.enfileirar("equipe", {"nome": "A"})
+    fila.enfileirar("ferias_licencas", {"equipe_id": 1})
+    cliente = Cliente(lambda destino, dados: erro)
+
+    assert fila.enviar_pendentes(cliente) == 0
+    assert len(cliente.chamadas) == 1
+    assert pendentes() == [("equipe", "pendente", 0), ("ferias_licencas", "pendente", 0)]
+
+
+def test_lote_recusado_so_o_invalido_conta_tentativa():
+    for nome in ("A", "B", "C"):
+        fila.enfileirar("equipe", {"nome": nome})
+    cliente = Cliente(lambda destino, dados: recusa() if any(r["nome"] == "B" for r in dados) else None)
+
+    assert fila.enviar_pendentes(cliente) == 2
+    assert len(cliente.chamadas) == 4
+    assert pendentes() == [("equipe", "pendente", 1)]
+
+
+def test_rpc_recusada_vai_uma_vez_so():
+    fila.enfileirar("trocar_funcao", {"p_funcao": "Coordenador", "p_equipe_id": 1})
+    cliente = Cliente(lambda destino, dados: recusa())
+
+    assert fila.enviar_pendentes(cliente) == 0
+    assert len(cliente.chamadas) == 1
+    assert pendentes() == [("trocar_funcao", "pendente", 1)]
+
+
+def test_rpc_recusada_segura_as_seguintes_do_mesmo_recurso():
+    """A saída recusada segura o retorno da mesma viatura (nesta rodada e nas próximas), não o de outra."""
+    fila.enfileirar("registrar_viatura", {"p_viatura_id": 1, "p_tipo": "saida"})
+    fila.enfileirar("registrar_viatura", {"p_viatura_id": 2, "p_tipo": "saida"})
+    fila.enfileirar("registrar_viatura", {"p_viatura_id": 1, "p_tipo": "retorno"})
+    cliente = Cliente(lambda destino, dados: recusa() if (dados["p_viatura_id"], dados["p_tipo"]) == (1, "saida")
+                      else None)
+
+    assert fila.enviar_pendentes(cliente) == 1
+    assert [(d["p_viatura_id"], d["p_tipo"]) for _, d in cliente.chamadas] == [(1, "saida"), (2, "saida")]
+    assert [p["dados"]["p_tipo"] for p in fila.situacao()] == ["saida", "retorno"]
+
+    # A saída espera nova tentativa; o retorno continua esperando por ela
+    assert fila.enviar_pendentes(cliente) == 0
+    assert len(cliente.chamadas) == 2
+
+    fila.tentar_novamente()
+    cliente.falhas = lambda destino, dados: None
+    assert fila.enviar_pendentes(cliente) == 2
+    assert [d["p_tipo"] for _, d in cliente.chamadas[2:]] == ["saida", "retorno"]
+    assert pendentes() == []
+
+
+def test_entrada_e_saida_do_mesmo_item_em_ordem():
+    fila.enfileirar("entrada_estoque", {"p_item_id": 7, "p_quantidade": 10})
+    fila.enfileirar("saida_estoque", {"p_item_id": 7, "p_quantidade": 4})
+    fila.enfileirar("saida_estoque", {"p_item_id": 8, "p_quantidade": 1})
+    cliente = Cliente(lambda destino, dados: recusa() if destino == "entrada_estoque" else None)
+
+    assert fila.enviar_pendentes(cliente) == 1
+    assert [(d, p["p_item_id"]) for d, p in cliente.chamadas] == [("entrada_estoque", 7), ("saida_estoque", 8)]
+
+
+def test_registro_que_falhou_segura_o_recurso_ate_ser_descartado(monkeypatch):
+    monkeypatch.setattr(fila, "FILA_TENTATIVAS", 1)
+    fila.enfileirar("trocar_funcao", {"p_funcao": "Coordenador", "p_equipe_id": 1})
+    fila.enfileirar("trocar_funcao", {"p_funcao": "Coordenador", "p_equipe_id": 2})
+    cliente = Cliente(lambda destino, dados: recusa() if dados["p_equipe_id"] == 1 else None)
+
+    assert fila.enviar_pendentes(cliente) == 0
+    assert pendentes() == [("trocar_funcao", "falhou", 1), ("trocar_funcao", "pendente", 0)]
+
+    fila.descartar(fila.situacao()[0]["chave"])
+    assert fila.enviar_pendentes(cliente) == 1
+    assert pendentes() == []
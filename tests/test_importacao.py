@@ -0,0 +1,52 @@
+# tests/test_importacao.py
+#
+# Validação das planilhas de importação (services/importacao.py).
+#
+# Uso:
+#   python -m pytest -q tests/test_importacao.py
+
+import os
+import sys
+
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from services.importacao import validar_equipe, validar_ferias
+
+POSTOS = ["CAP", "TEN"]
+
+
+def planilha(linhas):
+    return pd.DataFrame(linhas, dtype=str).fillna("")
+
+
+def test_equipe_valida_e_invalida():
+    registros, erros = validar_equipe(planilha([
+        {"nome": "ana", "posto_graduacao": "cap", "ativo": "não"},
+        {"nome": "", "posto_graduacao": "CAP"},
+        {"nome": "bruno", "posto_graduacao": "ten", "ativo": ""},
+    ]), POSTOS, [])
+
+    assert [(r["_linha"], r["nome"], r["ativo"]) for r in registros] == [(2, "ANA", False), (4, "BRUNO", True)]
+    assert erros.to_dict("records") == [{"Linha": 3, "Erro": "Nome não informado."}]
+
+
+def test_equipe_toda_invalida():
+    registros, erros = validar_equipe(planilha([
+        {"nome": "", "posto_graduacao": "CAP"},
+        {"nome": "ANA", "posto_graduacao": "SD", "ativo": "talvez"},
+    ]), POSTOS, [])
+
+    assert registros == []
+    assert erros["Linha"].tolist() == [2, 3, 3]
+
+
+def test_ferias_toda_invalida():
+    registros, erros = validar_ferias(planilha([
+        {"id_funcional": "999", "tipo": "Férias", "inicio": "01/02/2024", "fim": "10/02/2024"},
+    ]), ["Férias"], [{"id": 1, "id_funcional": "123"}])
+
+    assert registros == []
+    assert erros["Erro"].tolist() == ["ID funcional não encontrado na equipe."]
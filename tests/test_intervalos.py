@@ -0,0 +1,114 @@
+# tests/test_intervalos.py
+#
+# Consultas do índice de mandatos (services/intervalos.py), comparadas com uma
+# varredura dia a dia do histórico.
+#
+# Uso:
+#   python -m pytest -q tests/test_intervalos.py
+
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from services import intervalos
+from services.intervalos import IndiceIntervalos
+
+INICIO = date(2020, 1, 1)
+ATE = date(2021, 1, 1)
+
+
+def mandato(id, entrada, saida=None, funcao="Coordenador"):
+    return {"id": id, "funcao": funcao, "data_entrada": str(entrada), "data_saida": str(saida) if saida else None}
+
+
+def dia(n):
+    return INICIO + timedelta(days=n)
+
+
+def em_vigor(historico, data):
+    return sorted(m["id"] for m in historico
+                  if date.fromisoformat(m["data_entrada"]) <= data
+                  and (m["data_saida"] is None or data < date.fromisoformat(m["data_saida"])))
+
+
+def ids(mandatos):
+    return sorted(m["id"] for m in mandatos)
+
+
+def test_sucessao_no_mesmo_dia_nao_sobrepoe():
+    indice = IndiceIntervalos([mandato(1, dia(0), dia(10)), mandato(2, dia(10))])
+
+    assert ids(indice.ocupantes("Coordenador", dia(9))) == [1]
+    assert ids(indice.ocupantes("Coordenador", dia(10))) == [2]
+    assert ids(indice.ocupantes("Coordenador", dia(500))) == [2]
+    assert indice.ocupantes("Coordenador", dia(-1)) == []
+    assert indice.ocupantes("Subcoordenador", dia(5)) == []
+    assert indice.sobreposicoes("Coordenador", ATE) == []
+    assert indice.vacancias("Coordenador", ATE) == []
+
+
+def test_vacancias():
+    indice = IndiceIntervalos([mandato(1, dia(0), dia(10)), mandato(2, dia(15), dia(20))])
+
+    assert indice.vacancias("Coordenador", dia(30)) == [(dia(10), dia(15), 5), (dia(20), None, 10)]
+
+
+def test_sobreposicoes():
+    indice = IndiceIntervalos([mandato(1, dia(0), dia(10)), mandato(2, dia(5), dia(20)),
+                               mandato(3, dia(8), dia(12))])
+
+    assert [(inicio, fim, ids(m)) for inicio, fim, m in indice.sobreposicoes("Coordenador", ATE)] == [
+        (dia(5), dia(8), [1, 2]), (dia(8), dia(10), [1, 2, 3]), (dia(10), dia(12), [2, 3])]
+
+
+def test_mandato_sem_duracao():
+    """Substituído no mesmo dia: fica na linha do tempo, mas não ocupa nem divide a vacância."""
+    indice = IndiceIntervalos([mandato(1, dia(0), dia(10)), mandato(2, dia(12), dia(12)),
+                               mandato(3, dia(20), dia(19))])
+
+    assert indice.ocupantes("Coordenador", dia(12)) == []
+    assert indice.vacancias("Coordenador", dia(30)) == [(dia(10), None, 20)]
+    assert indice.no_periodo("Coordenador", dia(11), dia(13)) == []
+    assert sorted(item["registro"]["id"] for item in indice.linha_do_tempo(ATE)) == [1, 2]
+
+
+@pytest.mark.parametrize("semente", range(5))
+def test_igual_a_varredura_dia_a_dia(semente, monkeypatch):
+    """Muitos mandatos sobrepostos e um passo de marcos pequeno, para cruzar vários marcos."""
+    monkeypatch.setattr(intervalos, "PASSO_MARCOS", 4)
+    sorteio = random.Random(semente)
+    historico = []
+    for id in range(120):
+        entrada = dia(sorteio.randrange(360))
+        saida = None if sorteio.random() < 0.05 else entrada + timedelta(days=sorteio.randrange(0, 40))
+        historico.append(mandato(id, entrada, saida))
+    indice = IndiceIntervalos(historico)
+    validos = [m for m in historico if m["data_saida"] != m["data_entrada"]]
+
+    vagos, multiplos = set(), set()
+    for n in range(-5, 366):
+        data = dia(n)
+        esperado = em_vigor(validos, data)
+        assert ids(indice.ocupantes("Coordenador", data)) == esperado
+        if data >= min(date.fromisoformat(m["data_entrada"]) for m in validos) and data < ATE:
+            (vagos if not esperado else multiplos if len(esperado) > 1 else set()).add(data)
+
+        fim = data + timedelta(days=7)
+        periodo = sorted({i for d in range(7) for i in em_vigor(validos, data + timedelta(days=d))})
+        assert [registro["id"] for _, _, registro in indice.no_periodo("Coordenador", data, fim)] == sorted(
+            periodo, key=lambda i: (historico[i]["data_entrada"], i))
+
+    def dias(trechos):
+        return {inicio + timedelta(days=d) for inicio, fim, *_ in trechos
+                for d in range((min(fim or ATE, ATE) - inicio).days)}
+
+    assert dias(indice.vacancias("Coordenador", ATE)) == vagos
+    assert dias(indice.sobreposicoes("Coordenador", ATE)) == multiplos
+    for inicio, fim, mandatos in indice.sobreposicoes("Coordenador", ATE):
+        assert ids(mandatos) == em_vigor(validos, inicio)
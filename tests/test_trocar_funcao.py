@@ -0,0 +1,178 @@
+# tests/test_trocar_funcao.py
+#
+# Roda a RPC trocar_funcao (sql/001_trocar_funcao.sql e sql/005_fila_idempotencia.sql)
+# num Postgres de verdade, com trocas concorrentes da mesma função.
+#
+# O banco vem da fixture `uri` (tests/conftest.py).
+#
+# Uso:
+#   pip install "psycopg[binary]" pgserver
+#   python -m pytest -q tests/test_trocar_funcao.py
+
+import os
+import sys
+import threading
+import uuid
+from datetime import date
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+psycopg = pytest.importorskip("psycopg")
+
+from services.historico import FUNCAO_COM_SUCESSAO_ESTRITA, parametros_troca
+
+# Na ordem em que são executados no Supabase; 002 depende de tabelas fora deste teste
+SCRIPTS = ["001_trocar_funcao.sql", "003_indices_paginacao.sql",
+           "004_replica_atualizado_em.sql", "005_fila_idempotencia.sql"]
+
+# Só as colunas usadas pelos scripts; o restante do cadastro não interessa aqui
+TABELAS = """
+    drop schema if exists public cascade;
+    create schema public;
+    create table equipe (
+        id    bigint generated always as identity primary key,
+        nome  text not null,
+        ativo boolean not null default true
+    );
+    create table historico_redec (
+        id           bigint generated always as identity primary key,
+        equipe_id    bigint not null references equipe (id),
+        funcao       text not null,
+        data_entrada date not null,
+        data_saida   date
+    );
+    create table ferias_licencas (
+        id        bigint generated always as identity primary key,
+        equipe_id bigint not null references equipe (id),
+        inicio    date not null,
+        fim       date not null
+    );
+"""
+
+CHAMADA = """
+    select * from trocar_funcao(
+        p_equipe_id => %(p_equipe_id)s,
+        p_funcao => %(p_funcao)s,
+        p_data_entrada => %(p_data_entrada)s::date,
+        p_encerrar_anterior => %(p_encerrar_anterior)s,
+        p_chave_idempotencia => %(p_chave_idempotencia)s
+    )
+"""
+
+
+@pytest.fixture
+def banco(uri):
+    """Esquema recriado a cada teste, com os scripts de sql/ aplicados; devolve os ids da equipe."""
+    with psycopg.connect(uri, autocommit=True) as conexao:
+        conexao.execute(TABELAS)
+        for script in SCRIPTS:
+            with open(os.path.join(RAIZ, "sql", script), encoding="utf-8") as arquivo:
+                conexao.execute(arquivo.read())
+        ids = [linha[0] for linha in conexao.execute(
+            "insert into equipe (nome) select 'Militar ' || n from generate_series(1, 20) n returning id")]
+    return uri, ids
+
+
+def trocar(uri, parametros):
+    """Uma chamada da RPC na sua própria conexão e transação, como uma sessão do app."""
+    with psycopg.connect(uri) as conexao:
+        return conexao.execute(CHAMADA, {"p_chave_idempotencia": None, **parametros}).fetchall()
+
+
+def em_paralelo(uri, chamadas):
+    """Dispara as chamadas juntas (uma thread e uma conexão cada) e devolve os resultados na ordem."""
+    largada = threading.Barrier(len(chamadas))
+    resultados, erros = [None] * len(chamadas), []
+
+    def executar(i, parametros):
+        largada.wait()
+        try:
+            resultados[i] = trocar(uri, parametros)
+        except Exception as erro:
+            erros.append(erro)
+
+    threads = [threading.Thread(target=executar, args=(i, p)) for i, p in enumerate(chamadas)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not erros, erros
+    return resultados
+
+
+def abertos(uri, funcao):
+    with psycopg.connect(uri) as conexao:
+        return conexao.execute(
+            "select equipe_id from historico_redec where funcao = %s and data_saida is null", (funcao,)
+        ).fetchall()
+
+
+def test_trocas_concorrentes_do_coordenador(banco):
+    """Várias trocas simultâneas: todas aplicadas, uma linha cada, um único mandato aberto no fim."""
+    uri, ids = banco
+    for rodada in range(5):
+        chamadas = [parametros_troca(equipe_id, FUNCAO_COM_SUCESSAO_ESTRITA, date(2024, 1, 1 + rodada))
+                    for equipe_id in ids[:8]]
+        resultados = em_paralelo(uri, chamadas)
+        assert [len(r) for r in resultados] == [1] * len(chamadas)
+        assert len(abertos(uri, FUNCAO_COM_SUCESSAO_ESTRITA)) == 1
+
+    with psycopg.connect(uri) as conexao:
+        total, fechados = conexao.execute(
+            "select count(*), count(data_saida) from historico_redec where funcao = %s",
+            (FUNCAO_COM_SUCESSAO_ESTRITA,)).fetchone()
+    assert (total, fechados) == (40, 39)
+
+
+def test_trava_sem_indice_unico(banco):
+    """
+    Outra função, sem o índice parcial que protege o Coordenador, como em services/cargos.py:
+    só a trava consultiva impede dois mandatos abertos.
+    """
+    uri, ids = banco
+    for rodada in range(5):
+        chamadas = [{"p_equipe_id": equipe_id, "p_funcao": "Subcoordenador",
+                     "p_data_entrada": str(date(2024, 2, 1 + rodada)), "p_encerrar_anterior": True}
+                    for equipe_id in ids[:8]]
+        em_paralelo(uri, chamadas)
+        assert len(abertos(uri, "Subcoordenador")) == 1
+
+
+def test_segunda_troca_espera_a_primeira(banco):
+    """Com a primeira transação ainda aberta, a segunda espera e depois encerra o mandato criado por ela."""
+    uri, ids = banco
+    primeira = psycopg.connect(uri)
+    try:
+        primeira.execute(CHAMADA, {"p_chave_idempotencia": None,
+                                   **parametros_troca(ids[0], FUNCAO_COM_SUCESSAO_ESTRITA, date(2024, 3, 1))})
+        resultado = {}
+        segunda = threading.Thread(target=lambda: resultado.update(linhas=trocar(
+            uri, parametros_troca(ids[1], FUNCAO_COM_SUCESSAO_ESTRITA, date(2024, 3, 2)))))
+        segunda.start()
+        segunda.join(timeout=1)
+        assert segunda.is_alive(), "a segunda troca não esperou pela trava"
+        primeira.commit()
+        segunda.join(timeout=10)
+    finally:
+        primeira.close()
+
+    assert len(resultado["linhas"]) == 1
+    assert abertos(uri, FUNCAO_COM_SUCESSAO_ESTRITA) == [(ids[1],)]
+
+
+def test_reenvio_concorrente_com_a_mesma_chave(banco):
+    """A fila reenviando a mesma troca ao mesmo tempo: um registro só, devolvido às duas chamadas."""
+    uri, ids = banco
+    chave = str(uuid.uuid4())
+    parametros = dict(parametros_troca(ids[2], FUNCAO_COM_SUCESSAO_ESTRITA, date(2024, 4, 1)),
+                      p_chave_idempotencia=chave)
+    resultados = em_paralelo(uri, [parametros] * 4)
+
+    assert len({r[0][0] for r in resultados}) == 1
+    assert [len(r) for r in resultados] == [1] * 4
+    with psycopg.connect(uri) as conexao:
+        assert conexao.execute("select count(*) from historico_redec where chave_idempotencia = %s",
+                               (chave,)).fetchone() == (1,)
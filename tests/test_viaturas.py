@@ -0,0 +1,170 @@
+# tests/test_viaturas.py
+#
+# Roda o diário de bordo das viaturas (sql/008_viaturas.sql) num Postgres de verdade,
+# com registros da fila de escritas chegando depois de registros mais novos.
+#
+# O banco vem da fixture `uri` (tests/conftest.py).
+#
+# Uso:
+#   pip install "psycopg[binary]" pgserver
+#   python -m pytest -q tests/test_viaturas.py
+
+import os
+import uuid
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+psycopg = pytest.importorskip("psycopg")
+
+# Só o que sql/008 referencia; contadores_dashboard usa tabelas de outros scripts e
+# não é criada com o corpo conferido
+TABELAS = """
+    drop schema if exists public cascade;
+    create schema public;
+    create table equipe (
+        id   bigint generated always as identity primary key,
+        nome text not null
+    );
+    set check_function_bodies = off;
+"""
+
+CHAMADA = """
+    select id from registrar_viatura(
+        p_viatura_id => %(viatura)s, p_tipo => %(tipo)s, p_km => %(km)s, p_litros => %(litros)s,
+        p_revisao => %(revisao)s, p_registrado_em => %(em)s::timestamptz, p_chave_idempotencia => %(chave)s
+    )
+"""
+
+
+@pytest.fixture
+def banco(uri):
+    """Esquema recriado a cada teste com uma viatura disponível, hodômetro em 1000 km; devolve (uri, id)."""
+    with psycopg.connect(uri, autocommit=True) as conexao:
+        conexao.execute(TABELAS)
+        with open(os.path.join(RAIZ, "sql", "008_viaturas.sql"), encoding="utf-8") as arquivo:
+            conexao.execute(arquivo.read())
+        viatura = conexao.execute("""
+            insert into viaturas (prefixo, hodometro_inicial_km, hodometro_km) values ('ABT-01', 1000, 1000)
+            returning id
+        """).fetchone()[0]
+    return uri, viatura
+
+
+def registrar(uri, viatura, tipo, em, km=None, litros=None, revisao=False):
+    with psycopg.connect(uri) as conexao:
+        return conexao.execute(CHAMADA, {"viatura": viatura, "tipo": tipo, "km": km, "litros": litros,
+                                         "revisao": revisao, "em": em, "chave": str(uuid.uuid4())}).fetchone()[0]
+
+
+def resumo(uri, viatura):
+    with psycopg.connect(uri) as conexao:
+        situacao, hodometro = conexao.execute(
+            "select situacao, hodometro_km from viaturas where id = %s", (viatura,)).fetchone()
+        km, litros, viagens = conexao.execute(
+            "select km, litros, viagens from viaturas_mensal where viatura_id = %s", (viatura,)).fetchone()
+    return situacao, float(hodometro), float(km), float(litros), viagens
+
+
+def conferido(uri, viatura):
+    """Resumos da viatura, que precisam ser os mesmos depois de reaplicar o diário inteiro na ordem dos fatos."""
+    consulta = """
+        select v.situacao, v.hodometro_km, v.em_uso_desde, v.manutencao_desde, v.ultimo_registro_em,
+               v.ultima_revisao_em, v.ultima_revisao_km,
+               (select array_agg(m order by m.mes) from viaturas_mensal m where m.viatura_id = v.id)
+          from viaturas v where v.id = %s
+    """
+    with psycopg.connect(uri) as conexao:
+        antes = conexao.execute(consulta, (viatura,)).fetchone()
+        conexao.execute("select recalcular_resumos_viaturas()")
+        assert conexao.execute(consulta, (viatura,)).fetchone() == antes
+    return antes
+
+
+def test_registros_da_fila_chegando_depois_de_um_mais_novo(banco):
+    """Saída e retorno feitos sem conexão chegam depois de uma leitura online posterior: o resumo é refeito na ordem dos fatos."""
+    uri, viatura = banco
+    registrar(uri, viatura, "hodometro", "2024-05-10 13:00+00", km=1150)
+    registrar(uri, viatura, "saida", "2024-05-10 09:00+00", km=1000)
+    registrar(uri, viatura, "retorno", "2024-05-10 12:00+00", km=1100)
+    registrar(uri, viatura, "abastecimento", "2024-05-10 11:00+00", km=1060, litros=40)
+
+    assert resumo(uri, viatura) == ("disponivel", 1150.0, 150.0, 40.0, 1)
+    conferido(uri, viatura)
+
+
+def test_saida_atrasada_permite_o_retorno(banco):
+    """Leitura online às 10h, saída da fila às 9h: a viatura passa a em uso e o retorno das 12h é aceito."""
+    uri, viatura = banco
+    registrar(uri, viatura, "hodometro", "2024-05-10 10:00+00", km=1050)
+    registrar(uri, viatura, "saida", "2024-05-10 09:00+00", km=1000)
+    assert resumo(uri, viatura)[0] == "em_uso"
+
+    registrar(uri, viatura, "retorno", "2024-05-10 12:00+00", km=1100)
+    assert resumo(uri, viatura) == ("disponivel", 1100.0, 100.0, 0.0, 1)
+    conferido(uri, viatura)
+
+
+def test_registro_atrasado_conferido_no_seu_instante(banco):
+    """Uma saída da fila no meio de uma viagem já registrada é recusada, como seria na hora."""
+    uri, viatura = banco
+    registrar(uri, viatura, "saida", "2024-05-10 09:00+00", km=1000)
+    registrar(uri, viatura, "retorno", "2024-05-10 12:00+00", km=1100)
+    with pytest.raises(psycopg.errors.RaiseException, match="não está disponível"):
+        registrar(uri, viatura, "saida", "2024-05-10 10:00+00", km=1010)
+    with pytest.raises(psycopg.errors.RaiseException, match="Hodômetro"):
+        registrar(uri, viatura, "abastecimento", "2024-05-10 13:00+00", km=1090, litros=30)
+    assert resumo(uri, viatura) == ("disponivel", 1100.0, 100.0, 0.0, 1)
+
+
+def test_liberacao_atrasada_com_revisao(banco):
+    """Manutenção e liberação com revisão feitas sem conexão, depois de uma leitura online: revisão e horas contam."""
+    uri, viatura = banco
+    registrar(uri, viatura, "hodometro", "2024-05-10 11:00+00", km=1020)
+    registrar(uri, viatura, "manutencao", "2024-05-10 08:00+00")
+    assert resumo(uri, viatura)[0] == "manutencao"
+    registrar(uri, viatura, "liberacao", "2024-05-10 10:00+00", revisao=True)
+
+    situacao, _, _, manutencao_desde, _, revisao_em, revisao_km, _ = conferido(uri, viatura)
+    assert (situacao, manutencao_desde, str(revisao_em), float(revisao_km)) == ("disponivel", None, "2024-05-10", 1000.0)
+    with psycopg.connect(uri) as conexao:
+        assert conexao.execute("select horas_manutencao, manutencoes from viaturas_mensal where viatura_id = %s",
+                               (viatura,)).fetchone() == (2, 1)
+
+
+def test_liberacao_atrasada_de_parada_iniciada_no_mes_anterior(banco):
+    """A cauda refeita recua ao mês em que a parada começou: as horas de abril não são contadas duas vezes."""
+    uri, viatura = banco
+    registrar(uri, viatura, "manutencao", "2024-04-15 10:00+00")
+    registrar(uri, viatura, "hodometro", "2024-05-20 10:00+00", km=1000)
+    registrar(uri, viatura, "liberacao", "2024-05-15 10:00+00")
+
+    conferido(uri, viatura)
+    with psycopg.connect(uri) as conexao:
+        assert conexao.execute("select sum(horas_manutencao) from viaturas_mensal where viatura_id = %s",
+                               (viatura,)).fetchone() == (30 * 24,)
+
+
+def test_registro_atual_continua_conferido(banco):
+    """Sem atraso, as conferências de situação e hodômetro continuam recusando o registro."""
+    uri, viatura = banco
+    registrar(uri, viatura, "saida", "2024-05-10 09:00+00", km=1000)
+    with pytest.raises(psycopg.errors.RaiseException, match="não está disponível"):
+        registrar(uri, viatura, "saida", "2024-05-10 10:00+00", km=1010)
+    with pytest.raises(psycopg.errors.RaiseException, match="Hodômetro"):
+        registrar(uri, viatura, "retorno", "2024-05-10 10:00+00", km=990)
+
+
+def test_conferencia_reaplica_na_ordem_dos_fatos(banco):
+    """recalcular_resumos_viaturas segue registrado_em: o diário gravado fora de ordem não a faz falhar."""
+    uri, viatura = banco
+    registrar(uri, viatura, "hodometro", "2024-05-10 13:00+00", km=1150)
+    registrar(uri, viatura, "saida", "2024-05-10 09:00+00", km=1000)
+    registrar(uri, viatura, "retorno", "2024-05-10 12:00+00", km=1100)
+    registrar(uri, viatura, "saida", "2024-05-11 08:00+00", km=1150)
+
+    with psycopg.connect(uri) as conexao:
+        conexao.execute("select recalcular_resumos_viaturas()")
+
+    assert resumo(uri, viatura) == ("em_uso", 1150.0, 150.0, 0.0, 2)